@@ -1,6 +1 @@
-window.mobileCheck = function() {
-return (
-navigator.maxTouchPoints > 0 &&
-window.matchMedia("(hover: none)").matches
-);
-};
\ No newline at end of file
+window.mobileCheck=function(){return(navigator.maxTouchPoints>0&&window.matchMedia("(hover: none)").matches);};
\ No newline at end of file
@@ -0,0 +1,12 @@
+var manifest={"precache":{"/":"04771668","/404.html":"a3fa8fb6","/demo/":"01387545","/fonts/roboto-latin-ext.woff2":"cedb374b","/fonts/roboto-latin.woff2":"1404ca34","/js/detectMobile.js":"61089a55","/js/loadDemo.js":"3d14211b","/js/nav.js":"fe2f705a"},"payloads":{"/demo/autotile/app/autotile.bin":["99b5c377",871902],"/demo/autotile/app/autotile.data":["ec8d21d6",112884],"/demo/bomb-tap/app/bomb-tap.bin":["1b33279e",872216],"/demo/bomb-tap/app/bomb-tap.data":["17b09085",296406],"/demo/break-the-loop/app/break-the-loop.bin":["a22f8464",871999],"/demo/get-a-job-baby/app/get-a-job-baby.bin":["6e6376ac",872437],"/demo/get-a-job-baby/app/get-a-job-baby.data":["596e74f6",540594],"/demo/gone-diggin/app/gone-diggin.bin":["77b5380b",872540],"/demo/gone-diggin/app/gone-diggin.data":["7f67ccff",2973191],"/demo/grav-o-delivery/app/grav-o-delivery.bin":["810cf268",872487],"/demo/grav-o-delivery/app/grav-o-delivery.data":["69827650",2802837],"/demo/last-stand/app/last-stand.bin":["8efe429e",872330],"/demo/morph/app/morph.bin":["dbd60084",871913],"/demo/morph/app/morph.data":["019ffc65",562517],"/demo/performance-meter/app/performance-meter.bin":["9d2fa51e",871945],"/demo/performance-meter/app/performance-meter.data":["4c0bd2b7",528001],"/demo/print-to-display/app/print-to-display.bin":["3e4eae8d",871942],"/demo/print-to-display/app/print-to-display.data":["00603bb1",537891],"/demo/progress-ring/app/progress-ring.bin":["9071e2b7",871943],"/demo/progress-ring/app/progress-ring.data":["72e74dc8",715664],"/demo/runners/app/runners.bin":["5f7a21d0",872366],"/demo/runners/app/runners.data":["06071225",1128548],"/demo/speed-test/app/speed-test.bin":["f730a55d",872316],"/demo/speed-test/app/speed-test.data":["ae3881e5",1789930],"/demo/the-dark/app/the-dark.bin":["5695889b",872159],"/demo/the-dark/app/the-dark.data":["989788db",463397],"/demo/uranium-236/app/uranium-236.bin":["dfcd5988",872500],"/demo/uranium-236/app/uranium-236.data":["3d91fd48",971061],"/demo/verify-domain/app/verify-domain.bin":["4a02be90",871766],"/demo/verify-domain/app/verify-domain.data":["f26f40b8",1553],"/demo/weaver/app/weaver.bin":["3f2c3f29",872586],"/demo/weaver/app/weaver.data":["2685adea",2616286],"/demo/xperiment/app/xperiment.bin":["ee675955",873105]},"payloadLimit":52428800};var PRECACHE="xedur-precache";var PAYLOADS="xedur-demos";var INDEX_KEY="/__sw/payload-index";function cacheKey(path,revision){return path+"?rev="+revision;}
+function requestPath(url){var path=url.pathname;if(path.slice(-11)==="/index.html")path=path.slice(0,-10);return path;}
+self.addEventListener("install",function(event){event.waitUntil(caches.open(PRECACHE).then(function(cache){return Promise.all(Object.keys(manifest.precache).map(function(path){var key=cacheKey(path,manifest.precache[path]);return cache.match(key).then(function(cached){if(cached)return;return fetch(path,{cache:"no-cache"}).then(function(response){if(!response.ok)throw new Error("Precache failed: "+path);return cache.put(key,response);});});}));}).then(function(){return self.skipWaiting();}));});self.addEventListener("activate",function(event){event.waitUntil(Promise.all([removeStale(PRECACHE,manifest.precache),removeStale(PAYLOADS,manifest.payloads).then(function(){return updateIndex(function(index){Object.keys(index).forEach(function(key){if(!isCurrent(key,manifest.payloads))delete index[key];});});}),]).then(function(){return self.clients.claim();}));});function isCurrent(key,entries){var url=new URL(key,self.location.origin);var entry=entries[url.pathname];var revision=Array.isArray(entry)?entry[0]:entry;return revision!==undefined&&url.searchParams.get("rev")===revision;}
+function removeStale(name,entries){return caches.open(name).then(function(cache){return cache.keys().then(function(requests){return Promise.all(requests.map(function(request){var path=new URL(request.url).pathname;if(path!==INDEX_KEY&&!isCurrent(request.url,entries)){return cache.delete(request);}}));});});}
+var indexQueue=Promise.resolve();function updateIndex(change){indexQueue=indexQueue.then(function(){return caches.open(PAYLOADS);}).then(function(cache){return cache.match(INDEX_KEY).then(function(response){return response?response.json():{};}).then(function(index){var result=change(index,cache);return Promise.resolve(result).then(function(){return cache.put(INDEX_KEY,new Response(JSON.stringify(index),{headers:{"Content-Type":"application/json"},}));});});}).catch(function(){});return indexQueue;}
+function makeRoom(index,cache,size){var keys=Object.keys(index).sort(function(a,b){return index[a].used-index[b].used;});var total=keys.reduce(function(sum,key){return sum+index[key].size;},0);var removals=[];while(keys.length&&total+size>manifest.payloadLimit){var key=keys.shift();total-=index[key].size;delete index[key];removals.push(cache.delete(key));}
+return Promise.all(removals);}
+function fetchPayload(request,path){var revision=manifest.payloads[path][0];var size=manifest.payloads[path][1];var key=cacheKey(path,revision);return caches.open(PAYLOADS).then(function(cache){return cache.match(key).then(function(cached){if(cached){updateIndex(function(index){index[key]={size:size,used:Date.now()};});return cached;}
+return fetch(request).then(function(response){if(response.status===200&&size<=manifest.payloadLimit){var copy=response.clone();updateIndex(function(index){return makeRoom(index,cache,size).then(function(){return cache.put(key,copy);}).then(function(){index[key]={size:size,used:Date.now()};});});}
+return response;});});});}
+function fetchPrecached(request,path){return caches.open(PRECACHE).then(function(cache){return cache.match(cacheKey(path,manifest.precache[path]));}).then(function(cached){return cached||fetch(request);});}
+self.addEventListener("fetch",function(event){var request=event.request;if(request.method!=="GET")return;var url=new URL(request.url);if(url.origin!==self.location.origin)return;var path=requestPath(url);if(manifest.payloads.hasOwnProperty(path)){event.respondWith(fetchPayload(request,path));}else if(manifest.precache.hasOwnProperty(path)){event.respondWith(fetchPrecached(request,path));}});
\ No newline at end of file
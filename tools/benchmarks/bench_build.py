@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Scaling benchmark for update_website.py.
+Generates synthetic catalogs of hundreds to thousands of demos in a temporary
+site root, then times a full build, a no-op build (with and without -i) and an
+incremental build after editing one demo, in normal and min mode.  Throughput
+is reported in site pages per second.
+
+Results can be saved as a baseline and later runs compared against it, so
+that changes which make the builder scale worse (templates, minification,
+the sitemap, ...) show up as regressions.  The comparison uses the time per
+page, and baselines are machine specific, so record one on the machine that
+runs the comparison.
+
+Usage:
+    python bench_build.py                        # 100 and 500 demos, both modes
+    python bench_build.py --sizes 200,1000,2000 --modes min
+    python bench_build.py --save-baseline        # record the results as the baseline
+    python bench_build.py --tolerance 15         # fail on a >15% slowdown per page
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import zipfile
+import argparse
+import tempfile
+import subprocess
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+TOOLS_DIR = os.path.dirname(BENCH_DIR)
+ROOT_DIR = os.path.dirname(TOOLS_DIR)
+DATA_DIR = os.path.join(TOOLS_DIR, "components", "data")
+BASELINE_FILE = os.path.join(BENCH_DIR, "bench_build_baseline.json")
+
+sys.path.insert(0, TOOLS_DIR)
+import update_website  # noqa: E402
+
+line_length = 86
+
+SCENARIOS = ["full", "no-op", "no-op -i", "change -i"]
+
+
+def link_or_copy(src, dst):
+    """Hard-link src to dst, or copy it where links aren't possible."""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+def fake_bin(path, name, seed):
+    """Write a small .bin archive holding a .js and a .wasm like a Solar2D build."""
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr(f"{name}.js", f"// {name} {seed}\n" + "var Module = Module || {};\n" * 200)
+        archive.writestr(f"{name}.wasm", b"\0asm\1\0\0\0" + seed.to_bytes(4, "little") * 1024)
+
+
+def make_catalog(temp_root, size):
+    """Create a site root in temp_root whose catalog has ``size`` entries.
+
+    The entries are copies of the real ones, taken in turn from every
+    category, so the synthetic catalog has the same mix of regular,
+    standalone and external entries and the same text lengths as the real
+    site.  Regular demos get their card images (hard links) and a small
+    fake .bin, standalone demos a copy of their source folder.
+    """
+    shutil.copytree(TOOLS_DIR, os.path.join(temp_root, "tools"),
+                    ignore=shutil.ignore_patterns(".cache", "__pycache__", "benchmarks"))
+    for folder in ("fonts", os.path.join("img", "external")):
+        shutil.copytree(os.path.join(ROOT_DIR, folder), os.path.join(temp_root, folder))
+
+    originals = []
+    for cat in update_website.CATEGORIES:
+        with open(os.path.join(DATA_DIR, f"{cat}.json"), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        originals.append((cat, data))
+    catalogs = {cat: dict(data, demos=[]) for cat, data in originals}
+    pool = [(cat, demo) for cat, data in originals for demo in data["demos"]]
+
+    for i in range(size):
+        cat, demo = pool[i % len(pool)]
+        demo = dict(demo, title=f"{demo['title']} {i}")
+        if update_website.is_external(demo):
+            demo["externalUrl"] = f"{demo['externalUrl'].rstrip('/')}/{i}"
+        else:
+            source = demo["folder"]
+            folder = f"{source}-{i}"
+            demo["folder"] = folder
+            out_dir = os.path.join(temp_root, "demo", folder)
+            os.makedirs(out_dir)
+            for suffix in ("small", "large"):
+                src = os.path.join(ROOT_DIR, "demo", source, f"{source}-{suffix}.jpg")
+                if os.path.exists(src):
+                    link_or_copy(src, os.path.join(out_dir, f"{folder}-{suffix}.jpg"))
+            if update_website.is_standalone(demo):
+                shutil.copytree(os.path.join(TOOLS_DIR, "standalone", source),
+                                os.path.join(temp_root, "tools", "standalone", folder))
+            else:
+                os.makedirs(os.path.join(out_dir, "app"))
+                fake_bin(os.path.join(out_dir, "app", f"{folder}.bin"), folder, i)
+        catalogs[cat]["demos"].append(demo)
+
+    for cat, data in catalogs.items():
+        with open(os.path.join(temp_root, "tools", "components", "data", f"{cat}.json"), "w",
+                  encoding="utf-8") as f:
+            json.dump(data, f, indent=4)
+            f.write("\n")
+
+
+def edit_one_demo(temp_root):
+    """Change the short description of the first game, like a typical content edit."""
+    path = os.path.join(temp_root, "tools", "components", "data", "games.json")
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    data["demos"][0]["descriptionShort"] += " (edited)"
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=4)
+        f.write("\n")
+
+
+def count_pages(temp_root):
+    """Return the number of HTML pages in the built site."""
+    count = 0
+    for dirpath, dirnames, filenames in os.walk(temp_root):
+        dirnames[:] = [d for d in dirnames if d != "tools"]
+        count += sum(filename.endswith(".html") for filename in filenames)
+    return count
+
+
+def run_build(temp_root, args):
+    """Run update_website.py in temp_root and return its wall time in seconds."""
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "update_website.py", "--no-daemon"] + args,
+        cwd=os.path.join(temp_root, "tools"), check=True, stdout=subprocess.DEVNULL,
+    )
+    return time.perf_counter() - start
+
+
+def bench_size(size, mode, jobs):
+    """Time every scenario for one catalog size and mode.
+
+    Returns ``(pages, {scenario: seconds})``.
+    """
+    base_args = (["min"] if mode == "min" else []) + ["--jobs", str(jobs)]
+    with tempfile.TemporaryDirectory() as temp_root:
+        make_catalog(temp_root, size)
+        times = {"full": run_build(temp_root, base_args)}
+        pages = count_pages(temp_root)
+        times["no-op"] = run_build(temp_root, base_args)
+        times["no-op -i"] = run_build(temp_root, base_args + ["-i"])
+        edit_one_demo(temp_root)
+        times["change -i"] = run_build(temp_root, base_args + ["-i"])
+    return pages, times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark how update_website.py scales with the catalog size.")
+    parser.add_argument("--sizes", default="100,500",
+                        help="comma-separated catalog sizes in demos (default: 100,500)")
+    parser.add_argument("--modes", default="normal,min", help="comma-separated build modes (default: normal,min)")
+    parser.add_argument("--jobs", type=int, default=1, help="worker processes per build (default: 1)")
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="run every size this many times and keep the best times (default: 1)")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="baseline file to compare against or save to")
+    parser.add_argument("--save-baseline", action="store_true", help="save the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=25,
+                        help="percent slowdown per page that counts as a regression (default: 25)")
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(",")]
+    modes = args.modes.split(",")
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    print("=" * line_length)
+    print(f"{'mode':<8}{'demos':>6}{'pages':>7}  {'scenario':<11}{'seconds':>9}{'pages/s':>10}"
+          f"{'ms/page':>9}{'baseline':>10}{'change':>9}")
+    print("-" * line_length)
+
+    results = {}
+    regressions = []
+    for mode in modes:
+        for size in sizes:
+            pages, times = bench_size(size, mode, args.jobs)
+            for _ in range(args.repeat - 1):
+                again = bench_size(size, mode, args.jobs)[1]
+                times = {scenario: min(times[scenario], again[scenario]) for scenario in SCENARIOS}
+            for scenario in SCENARIOS:
+                seconds = times[scenario]
+                per_page = seconds * 1000 / pages
+                key = f"{mode}/{size}/{scenario}"
+                results[key] = {"pages": pages, "seconds": round(seconds, 4), "ms_per_page": round(per_page, 4)}
+                line = (f"{mode:<8}{size:>6}{pages:>7}  {scenario:<11}{seconds:>9.3f}"
+                        f"{pages / seconds:>10.0f}{per_page:>9.3f}")
+                old = baseline.get(key)
+                if old:
+                    change = (per_page / old["ms_per_page"] - 1) * 100
+                    line += f"{old['ms_per_page']:>10.3f}{change:>+8.0f}%"
+                    if change > args.tolerance:
+                        regressions.append(key)
+                        line += "  REGRESSION"
+                print(line)
+    print("=" * line_length)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline saved to {args.baseline}")
+    elif not baseline:
+        print("No baseline to compare against (record one with --save-baseline).")
+
+    if regressions:
+        print(f"{len(regressions)} result(s) more than {args.tolerance:g}% slower per page than the baseline: "
+              + ", ".join(regressions))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,601 @@
+#!/usr/bin/env python3
+"""
+Benchmark and differential test for minify_html, minify_css and minify_js in
+update_website.py.
+Renders the site (unminified) into a temporary copy and runs each minifier
+over a corpus of real inputs: every generated page (index.html, 404.html,
+the demo pages and the demo/*/app/index.html loaders with their large inline
+scripts), the inline styles and scripts of those pages, the static scripts
+and the service worker.  A fuzzed corpus is added on top: the real inputs
+with their whitespace and comments shuffled, and generated JavaScript
+programs that lean on automatic semicolon insertion, regex/division
+ambiguity, local renaming and unusual literals.
+
+For every input the throughput (MB/s, best of --repeat rounds) and the
+output ratio are reported, and the output is checked against the input:
+
+    HTML  same elements and attributes, same text (whitespace-only text
+          between tags and comments aside), and equivalent inline scripts
+          and styles
+    CSS   same token stream once comments and insignificant whitespace
+          are dropped
+    JS    same token stream, apart from renamed local names
+
+A fuzzed input must also minify to exactly the same output as the input it
+was made from.  When node is available, every script is compiled before and
+after minification, and the generated programs are run and their results
+compared.  The exit status is 1 if any check fails.
+
+Usage:
+    python bench_minifiers.py                    # 5 rounds, 200 generated programs
+    python bench_minifiers.py --repeat 20 --fuzz 1000 --seed 7
+    python bench_minifiers.py --verbose          # list every input
+    python bench_minifiers.py --rename-js        # minify_js with local renaming, as --rename-js builds
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import random
+import shutil
+import functools
+import argparse
+import tempfile
+import subprocess
+from html.parser import HTMLParser
+
+from bench_minify_html import render_site, ROOT_DIR, TOOLS_DIR, update_website  # noqa: F401
+
+line_length = 86
+
+minify_html = update_website.minify_html
+tokenize_js = update_website.tokenize_js
+# minify_css is memoized; time and test the function itself.
+minify_css = update_website.minify_css.__wrapped__
+minify_js = update_website.minify_js
+
+
+# ---------------------------------------------------------------------------
+# Corpus
+# ---------------------------------------------------------------------------
+
+def script_type(attrs):
+    """Return the lower-cased type attribute of a <script> tag's attributes."""
+    return (dict(attrs).get("type") or "").lower()
+
+
+class InlineBlocks(HTMLParser):
+    """Collect the contents of the inline <script> (JavaScript only) and <style> elements."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.scripts = []
+        self.styles = []
+        self.current = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "style" or (tag == "script" and script_type(attrs) in update_website.JS_SCRIPT_TYPES
+                              and "src" not in dict(attrs)):
+            self.current = (tag, [])
+
+    def handle_data(self, data):
+        if self.current is not None:
+            self.current[1].append(data)
+
+    def handle_endtag(self, tag):
+        if self.current is not None and self.current[0] == tag:
+            text = "".join(self.current[1])
+            if text.strip():
+                (self.scripts if tag == "script" else self.styles).append(text)
+            self.current = None
+
+
+def load_corpus(temp_root):
+    """Render the site into temp_root and return the real inputs of each minifier.
+
+    Returns ``{"html": [...], "css": [...], "js": [...]}`` with
+    ``(name, text)`` items.  Inline blocks repeated across pages are
+    listed once.
+    """
+    pages = render_site(temp_root)
+    corpus = {"html": pages, "css": [], "js": []}
+    seen = set()
+    for rel_path, html in pages:
+        parser = InlineBlocks()
+        parser.feed(html)
+        parser.close()
+        for kind, blocks in (("js", parser.scripts), ("css", parser.styles)):
+            for i, text in enumerate(blocks):
+                if text not in seen:
+                    seen.add(text)
+                    corpus[kind].append((f"{rel_path} <{'script' if kind == 'js' else 'style'} {i}>", text))
+
+    sources = [os.path.join(TOOLS_DIR, "css", name) for name in sorted(os.listdir(os.path.join(TOOLS_DIR, "css")))
+               if name.endswith(".css")]
+    sources += [os.path.join(temp_root, "js", name) for name in sorted(os.listdir(os.path.join(temp_root, "js")))
+                if name.endswith(".js")]
+    sources.append(os.path.join(temp_root, "sw.js"))
+    for path in sources:
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+        name = os.path.relpath(path, TOOLS_DIR if path.startswith(TOOLS_DIR) else temp_root).replace("\\", "/")
+        corpus["css" if path.endswith(".css") else "js"].append((name, text))
+    return corpus
+
+
+# ---------------------------------------------------------------------------
+# Fuzzing
+# ---------------------------------------------------------------------------
+
+def random_space(rng, newline=False):
+    """Return a random whitespace run, with a line break in it if newline is set."""
+    space = "".join(rng.choice(" \t") for _ in range(rng.randint(0, 3)))
+    if newline:
+        space += "\n" * rng.randint(1, 2) + "".join(rng.choice(" \t") for _ in range(rng.randint(0, 8)))
+    return space or " "
+
+
+def fuzz_js(text, rng):
+    """Re-emit a script with random whitespace and comments between its tokens.
+
+    Line breaks only go where the original had one, and comments never
+    contain one where it didn't, so the result must minify to exactly the
+    same output.
+    """
+    tokens, _ = tokenize_js(text)
+    out = []
+    for kind, value, newline in tokens:
+        if out:
+            roll = rng.random()
+            if newline and roll < 0.2:
+                out.append(f"{random_space(rng)}// fuzz{random_space(rng, True)}")
+            elif roll < 0.1:
+                out.append(f"{random_space(rng)}/* fuzz {'/' * rng.randint(0, 2)} */{random_space(rng)}")
+            elif roll < 0.15 and newline:
+                out.append(" /* fuzz\n */ ")
+            else:
+                out.append(random_space(rng, newline))
+        out.append(value)
+    return "".join(out)
+
+
+CSS_FUZZ_RE = re.compile(r"(\"(?:[^\"\\]|\\.)*\"|'(?:[^'\\]|\\.)*'|/\*.*?\*/)|(\s+)|([;}])", re.DOTALL)
+
+
+def fuzz_css(text, rng):
+    """Vary the whitespace of a stylesheet and add comments after ``;`` and ``}``."""
+    def replace(match):
+        if match.group(1):
+            return match.group(1)
+        if match.group(2):
+            return random_space(rng, "\n" in match.group(2) and rng.random() < 0.5)
+        if rng.random() < 0.3:
+            return match.group(3) + "/* fuzz; } */"
+        return match.group(3)
+    return CSS_FUZZ_RE.sub(replace, text)
+
+
+def fuzz_html(text, rng):
+    """Vary the whitespace of a page's markup and add comments after tags.
+
+    Script, style, pre and textarea contents and the tags' own text are
+    left alone, so the page must minify to exactly the same output.
+    """
+    out = []
+    pos = 0
+
+    def fuzz_markup(markup):
+        parts = re.split(r"(<[^>]*>)", markup)
+        for i, part in enumerate(parts):
+            if i % 2:
+                out.append(part)
+                if rng.random() < 0.1:
+                    out.append("<!-- fuzz <p> -->")
+            else:
+                out.append(re.sub(r"\s+", lambda m: random_space(rng, "\n" in m.group() or rng.random() < 0.3),
+                                  part))
+
+    for match in update_website.HTML_TOKEN_RE.finditer(text):
+        fuzz_markup(text[pos:match.start()])
+        out.append(match.group())
+        pos = match.end()
+    fuzz_markup(text[pos:])
+    return "".join(out)
+
+
+# Statements for generated programs.  A..G are replaced with local names,
+# P and Q are the parameters, and every statement reports what it computed
+# with out.push() so that a run of the original and of the minified
+# program can be compared.
+JS_FUZZ_STATEMENTS = [
+    "A = A / 2 / (P || 1)\nout.push(A)",
+    "out.push(/[a-z]+\\d*/g.test(B), B.replace(/a|b/g, \"$&$&\"), B.split(/(?:,|;)/).length)",
+    "B = B + \"x\"\n;[A, P].forEach(function(C) { out.push(C) })",
+    "var C = A\n++P\nout.push(C, P)",
+    "out.push(function() { return\nA }())",
+    "out.push(`t${A + `in${B}`}`, `a\\`b`)",
+    "out.push(A - -P, A + +Q, A++ + ++Q, A - --Q, A-- - Q)",
+    "out.push(1..toString(), .5 + 0x1f, 1e3 / 10, 2 .toFixed(1), 0b101, 1_000)",
+    "out.push(\"a\\\nb\", 'q\\'s', \"\\u2028\".length, '/* not a comment */', \"// nor this\")",
+    "for (var C = 0; C < 3; C++) A += C\nout.push(A)",
+    "if (P > Q) out.push(\"gt\")\nelse out.push(\"le\")",
+    "var D = { B: A, \"k\": P, n: function(C) { return C * 2 } }\nout.push(D.n(3), D.k, D.B)",
+    "try { throw A } catch (C) { out.push(C) }",
+    "out.push(typeof A, void 0, !P, ~Q, typeof undefinedName)",
+    "A = P ? Q : A\nout.push(A % 3)",
+    "out.push(A < P / 2 || Q > /x/.source.length, A /* / */ / 2)",
+    "var E = function F(C) { return C > 0 ? F(C - 1) + 1 : 0 }\nout.push(E(3))",
+    "function G(C) { var D = C + A; return D }\nout.push(G(P), G(Q))",
+    "do A--\nwhile (A > 0)\nout.push(A)",
+    "var C = [A, B]\nout.push(C\n.join(\"-\"))",
+    "var C = P\n/2/\n1\nout.push(C)",
+    "{ let C = A; { let D = C + 1; out.push(D) } }",
+    "var C = (D) => D + P\nout.push(C(1))",
+    "out.push(A in { 0: 1 }, \"length\" in [], [] instanceof Array)",
+    "var C = \"\\x41\\u0042\\u{43}\"\nout.push(C, C.length)",
+    "out.push(P\n? \"yes\"\n: \"no\")",
+    "switch (P % 3) { case 0: out.push(0); break\ncase 1: out.push(1)\ndefault: out.push(\"d\") }",
+    "var C = 1, D = 2\nC\n++\nD\nout.push(C, D)",
+]
+
+# "of" is left out: the tokenizer reads "of /" as the start of a regular
+# expression, and minify_js returns such scripts unminified.
+JS_FUZZ_NAMES = ["counter", "total", "label", "value", "index", "item", "result", "get", "set",
+                 "node", "length", "data", "temp", "source", "state", "a", "b"]
+JS_FUZZ_PLACEHOLDER_RE = re.compile(r"\b[A-GPQ]\b")
+
+
+def generate_js(rng, count):
+    """Return a random program of ``count`` functions built from JS_FUZZ_STATEMENTS."""
+    lines = []
+    for k in range(count):
+        names = dict(zip("ABCDEFGPQ", rng.sample(JS_FUZZ_NAMES, 9)))
+        names["F"] = f"inner{k}"
+        names["G"] = f"helper{k}"
+        body = [f"var {names['A']} = {names['P']} * 2, {names['B']} = \"ab,cd;{k}\""]
+        body += rng.sample(JS_FUZZ_STATEMENTS, rng.randint(2, 6))
+        body.append("return [A, B, P, Q]")
+        source = "\n".join(body).replace("\n", "\n    ")
+        source = JS_FUZZ_PLACEHOLDER_RE.sub(lambda m: names[m.group()], source)
+        lines.append(f"function program{k}({names['P']}, {names['Q']}) {{\n    {source}\n}}")
+        lines.append(f"out.push(program{k}({rng.randint(-5, 20)}, {rng.randint(-5, 20)}))")
+    return "\n".join(lines) + "\n"
+
+
+def fuzz_corpus(corpus, rng, programs):
+    """Return the fuzzed corpus: shuffled copies of the real inputs and generated programs.
+
+    Each item is ``(name, text, original)``, where original is the text
+    the item must minify the same as (None for generated programs).
+    """
+    fuzzed = {"html": [], "css": [], "js": []}
+    fuzzers = {"html": fuzz_html, "css": fuzz_css, "js": fuzz_js}
+    for kind, items in corpus.items():
+        for name, text in items:
+            fuzzed[kind].append((f"{name} (fuzzed)", fuzzers[kind](text, rng), text))
+    for i in range(programs):
+        fuzzed["js"].append((f"generated program {i}", generate_js(rng, rng.randint(1, 4)), None))
+    return fuzzed
+
+
+# ---------------------------------------------------------------------------
+# Equivalence checks
+# ---------------------------------------------------------------------------
+
+# Reserved words that the renamer never treats as a variable name.
+JS_KEYWORDS = update_website.JS_RESERVED - {"arguments", "undefined", "NaN", "Infinity", "get", "set", "of"}
+
+
+def js_difference(before, after):
+    """Return a description of how two scripts' token streams differ, or None.
+
+    Names may differ where the minifier renamed a local: neither spelling
+    is a keyword and the name isn't a property (after ".").  A script
+    the tokenizer rejects must come back unchanged.
+    """
+    try:
+        a, _ = tokenize_js(before)
+    except ValueError:
+        return None if after == before.strip() else "changed although it can't be tokenized"
+    try:
+        b, _ = tokenize_js(after)
+    except ValueError as e:
+        return f"output can't be tokenized: {e}"
+    for i, (x, y) in enumerate(zip(a, b)):
+        if x[:2] == y[:2]:
+            continue
+        renamed = (x[0] == y[0] == "name" and x[1] not in JS_KEYWORDS
+                   and y[1] not in JS_KEYWORDS and not (i and a[i - 1][1] == "."))
+        if not renamed:
+            return f"token {i}: {x[1]!r} became {y[1]!r}"
+    if len(a) != len(b):
+        return f"{len(a)} tokens became {len(b)}"
+    return None
+
+
+CSS_TOKEN_RE = re.compile(r"(/\*.*?\*/)|(\s+)|(\"(?:[^\"\\]|\\.)*\"|'(?:[^'\\]|\\.)*'|url\([^)]*\)"
+                          r"|[^\s\"'{}():;,>~+/]+|.)", re.DOTALL)
+# Whitespace next to these doesn't change the meaning.  A space before ":"
+# would matter in a selector ("a :hover"), which the stylesheets don't use.
+CSS_SEPARATORS = set("{}():;,>~")
+
+
+def css_tokens(text):
+    """Tokenize CSS, dropping comments and whitespace that doesn't separate two tokens.
+
+    Whitespace around "+" is kept inside parentheses, where calc() needs it,
+    and semicolons before a "}" are dropped.
+    """
+    tokens = []
+    depth = 0
+    space = False
+    for comment, whitespace, token in CSS_TOKEN_RE.findall(text):
+        if comment or whitespace:
+            space = True
+            continue
+        if space and tokens:
+            prev = tokens[-1]
+            significant = prev not in CSS_SEPARATORS and token not in CSS_SEPARATORS
+            if (prev == "+" or token == "+") and not depth:
+                significant = False
+            if significant:
+                tokens.append(" ")
+        if token == "}":
+            while tokens and tokens[-1] == ";":
+                tokens.pop()  # The last declaration needs no semicolon.
+        tokens.append(token)
+        space = False
+        depth += (token == "(") - (token == ")")
+    return tokens
+
+
+def css_difference(before, after):
+    """Return a description of how two stylesheets' token streams differ, or None."""
+    a = css_tokens(before)
+    b = css_tokens(after)
+    for i, (x, y) in enumerate(zip(a, b)):
+        if x != y:
+            return f"token {i}: {''.join(a[max(i - 4, 0):i + 4])!r} became {''.join(b[max(i - 4, 0):i + 4])!r}"
+    if len(a) != len(b):
+        return f"{len(a)} tokens became {len(b)}"
+    return None
+
+
+class DomEvents(HTMLParser):
+    """Reduce a page to the events that matter for its rendering.
+
+    Records start and end tags with their attributes, text with runs of
+    whitespace collapsed (text between tags that is only whitespace is
+    dropped), <pre>/<textarea> text verbatim, and the contents of
+    <script> and <style> elements for their own checks.
+    """
+
+    RAW_TAGS = ("script", "style")
+    VERBATIM_TAGS = ("pre", "textarea")
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.events = []
+        self.text = []
+        self.raw = None
+        self.verbatim = 0
+
+    def flush(self):
+        text = "".join(self.text)
+        self.text = []
+        if self.verbatim:
+            if text:
+                self.events.append(("text", text))
+        else:
+            text = " ".join(text.split())
+            if text:
+                self.events.append(("text", text))
+
+    def handle_starttag(self, tag, attrs):
+        self.flush()
+        self.events.append(("start", tag, tuple(attrs)))
+        if tag in self.RAW_TAGS:
+            self.raw = (tag, script_type(attrs))
+        elif tag in self.VERBATIM_TAGS:
+            self.verbatim += 1
+
+    def handle_startendtag(self, tag, attrs):
+        self.flush()
+        self.events.append(("start", tag, tuple(attrs)))
+
+    def handle_endtag(self, tag):
+        if self.raw is not None and self.raw[0] == tag:
+            self.events.append(("raw",) + self.raw + ("".join(self.text),))
+            self.text = []
+            self.raw = None
+        else:
+            self.flush()
+            if tag in self.VERBATIM_TAGS and self.verbatim:
+                self.verbatim -= 1
+        self.events.append(("end", tag))
+
+    def handle_data(self, data):
+        self.text.append(data)
+
+    def close(self):
+        super().close()
+        self.flush()
+
+
+def dom_events(text):
+    parser = DomEvents()
+    parser.feed(text)
+    parser.close()
+    return parser.events
+
+
+def html_difference(before, after):
+    """Return a description of how two pages' DOM events differ, or None."""
+    a = dom_events(before)
+    b = dom_events(after)
+    for x, y in zip(a, b):
+        if x == y:
+            continue
+        if x[0] == y[0] == "raw" and x[1:3] == y[1:3]:
+            tag, kind = x[1:3]
+            if tag == "style":
+                difference = css_difference(x[3], y[3])
+            elif kind in update_website.JS_SCRIPT_TYPES:
+                difference = js_difference(x[3], y[3])
+            else:
+                difference = "non-JS script changed"
+            if difference:
+                return f"<{tag}>: {difference}"
+            continue
+        return f"{x[:3]!r} became {y[:3]!r}"
+    if len(a) != len(b):
+        return f"{len(a)} DOM events became {len(b)}"
+    return None
+
+
+# Compiles each script before and after minification (and runs the generated
+# programs) in a fresh context, and reports whether the results match.
+NODE_CHECK = r"""
+const vm = require("vm");
+const cases = JSON.parse(require("fs").readFileSync(0, "utf8"));
+function result(source, run) {
+    const out = [];
+    try {
+        const script = new vm.Script(source);
+        if (run) script.runInNewContext({ out: out }, { timeout: 1000 });
+        return JSON.stringify(out);
+    } catch (e) {
+        return "error: " + e.name + (run ? ": " + e.message : "");
+    }
+}
+process.stdout.write(JSON.stringify(cases.map(function(c) {
+    return [result(c[0], c[2]), result(c[1], c[2])];
+})));
+"""
+
+
+def node_check(cases):
+    """Run NODE_CHECK on ``(before, after, run)`` cases and return their result pairs."""
+    process = subprocess.run(["node", "-e", NODE_CHECK], input=json.dumps(cases), capture_output=True,
+                             text=True, check=True)
+    return json.loads(process.stdout)
+
+
+# ---------------------------------------------------------------------------
+# Benchmark
+# ---------------------------------------------------------------------------
+
+MINIFIERS = {
+    "html": (minify_html, html_difference),
+    "css": (minify_css, css_difference),
+    "js": (minify_js, js_difference),
+}
+
+
+def best_time(func, text, repeat):
+    """Return the fastest of ``repeat`` runs of func(text), in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        update_website.minify_css.cache_clear()
+        start = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_corpus(kind, items, repeat, verbose, failures):
+    """Minify, time and check every item; return the row totals.
+
+    Items are ``(name, text, original)``; an item with an original must
+    minify to the same output as it.  Failures are appended as
+    ``(kind, name, description)``.  Returns ``(count, bytes in, bytes
+    out, seconds, passed, outputs)``, where outputs holds each item's
+    minified text.
+    """
+    minify, difference = MINIFIERS[kind]
+    total_in = total_out = total_time = passed = 0
+    outputs = []
+    for name, text, original in items:
+        output = minify(text)
+        outputs.append(output)
+        problem = difference(text, output)
+        if problem is None and original is not None and output != minify(original):
+            problem = "minifies differently from the input it was fuzzed from"
+        if problem is None:
+            passed += 1
+        else:
+            failures.append((kind, name, problem))
+        seconds = best_time(minify, text, repeat)
+        size_in = len(text.encode("utf-8"))
+        size_out = len(output.encode("utf-8"))
+        total_in += size_in
+        total_out += size_out
+        total_time += seconds
+        if verbose:
+            print(f"  {name[:50]:<50}{size_in / 1024:>9.1f}{size_out / size_in:>8.1%}"
+                  f"{size_in / seconds / 1e6:>9.1f}  {'ok' if problem is None else 'FAIL'}")
+    return len(items), total_in, total_out, total_time, passed, outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark and check the minifiers in update_website.py.")
+    parser.add_argument("--repeat", type=int, default=5, help="timed rounds per input (best is kept)")
+    parser.add_argument("--fuzz", type=int, default=200, help="number of generated JavaScript programs")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for the fuzzed corpus")
+    parser.add_argument("--no-node", action="store_true", help="skip the checks that run node")
+    parser.add_argument("--verbose", action="store_true", help="print a line for every input")
+    parser.add_argument("--rename-js", action="store_true", help="minify JavaScript with local renaming")
+    args = parser.parse_args()
+    if args.rename_js:
+        MINIFIERS["js"] = (functools.partial(minify_js, rename=True), js_difference)
+
+    with tempfile.TemporaryDirectory() as temp_root:
+        corpus = load_corpus(temp_root)
+    fuzzed = fuzz_corpus(corpus, random.Random(args.seed), args.fuzz)
+
+    print("=" * line_length)
+    print(f"{'minifier':<10}{'corpus':<8}{'inputs':>7}{'KB in':>10}{'KB out':>10}{'ratio':>8}{'MB/s':>8}"
+          f"{'checked':>11}")
+    print("-" * line_length)
+
+    failures = []
+    node_cases = []
+    for kind in ("html", "css", "js"):
+        for label, items in (("real", [(name, text, None) for name, text in corpus[kind]]),
+                             ("fuzzed", fuzzed[kind])):
+            if args.verbose:
+                print(f"minify_{kind}, {label}:")
+            count, size_in, size_out, seconds, passed, outputs = bench_corpus(
+                kind, items, args.repeat, args.verbose, failures)
+            print(f"minify_{kind:<5}{label:<8}{count:>7}{size_in / 1024:>10.1f}{size_out / 1024:>10.1f}"
+                  f"{size_out / size_in:>8.1%}{size_in / seconds / 1e6:>8.1f}{passed:>6}/{count:<4}")
+            if kind == "js":
+                node_cases += [(name, text, output, label == "fuzzed" and original is None)
+                               for (name, text, original), output in zip(items, outputs)]
+    print("=" * line_length)
+
+    if args.no_node:
+        pass
+    elif shutil.which("node") is None:
+        print("node not found, scripts were not compiled or run.")
+    else:
+        results = node_check([case[1:] for case in node_cases])
+        ran = sum(case[3] for case in node_cases)
+        for (name, _, _, _), (before, after) in zip(node_cases, results):
+            if before != after:
+                failures.append(("node", name, f"{before[:80]} became {after[:80]}"))
+        print(f"node: compiled {len(node_cases)} scripts before and after minification, "
+              f"ran {ran} generated programs.")
+
+    if failures:
+        print(f"{len(failures)} check(s) failed:")
+        for kind, name, problem in failures:
+            print(f"  {kind}: {name}: {problem}")
+        sys.exit(1)
+    print("All outputs are equivalent to their inputs.")
+
+
+if __name__ == "__main__":
+    main()
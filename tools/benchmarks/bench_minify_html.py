@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Benchmark for minify_html in update_website.py.
+Renders the site (unminified) into a temporary copy, then times the current
+single-scan minify_html against the previous regex-pass implementation on
+the generated index.html, 404.html and demo pages, and checks that both
+produce the same output.
+
+The per-page times cover the markup pass alone, with the inline scripts and
+styles passed through unchanged, since both versions hand those to the same
+minify_js and minify_css.  The totals are also given with those included.
+
+Usage:
+    python bench_minify_html.py              # 20 rounds per page
+    python bench_minify_html.py --repeat 100
+"""
+
+import os
+import re
+import sys
+import time
+import shutil
+import argparse
+import contextlib
+import tempfile
+import subprocess
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+TOOLS_DIR = os.path.dirname(BENCH_DIR)
+ROOT_DIR = os.path.dirname(TOOLS_DIR)
+
+sys.path.insert(0, TOOLS_DIR)
+import update_website  # noqa: E402
+
+line_length = 86
+
+
+def legacy_minify_html(text):
+    """The regex-pass minify_html that the single-scan version replaced."""
+    minify_js = update_website.minify_js
+    minify_css = update_website.minify_css
+
+    text = re.sub(r'<!--.*?-->', '', text, flags=re.DOTALL)
+
+    blocks = []
+
+    def _extract(match):
+        blocks.append(match.group(0))
+        return f'\x00BLOCK{len(blocks) - 1}\x00'
+
+    text = re.sub(r'<script[^>]*>.*?</script>', _extract, text,
+                  flags=re.DOTALL | re.IGNORECASE)
+    text = re.sub(r'<style[^>]*>.*?</style>', _extract, text,
+                  flags=re.DOTALL | re.IGNORECASE)
+
+    text = re.sub(r'>\s+<', '><', text)
+    text = re.sub(r'\s+', ' ', text)
+
+    for i, block in enumerate(blocks):
+        m = re.match(r'(<script[^>]*>)(.*?)(</script>)',
+                     block, flags=re.DOTALL | re.IGNORECASE)
+        if m:
+            block = m.group(1) + minify_js(m.group(2)) + m.group(3)
+        else:
+            m = re.match(r'(<style[^>]*>)(.*?)(</style>)',
+                         block, flags=re.DOTALL | re.IGNORECASE)
+            if m:
+                block = m.group(1) + minify_css(m.group(2)) + m.group(3)
+        text = text.replace(f'\x00BLOCK{i}\x00', block, 1)
+
+    return text.strip()
+
+
+def render_site(temp_root):
+    """Build the site without minification into temp_root and return its pages.
+
+    Only the build inputs are copied.  Demo app folders get empty .bin
+    placeholders so the iframe loaders are generated without copying the
+    multi-megabyte app binaries.
+    """
+    shutil.copytree(TOOLS_DIR, os.path.join(temp_root, "tools"),
+                    ignore=shutil.ignore_patterns(".cache", "__pycache__", "benchmarks"))
+    for folder in sorted(os.listdir(os.path.join(ROOT_DIR, "demo"))):
+        app_dir = os.path.join(ROOT_DIR, "demo", folder, "app")
+        if not os.path.isdir(app_dir):
+            continue
+        out_app = os.path.join(temp_root, "demo", folder, "app")
+        os.makedirs(out_app, exist_ok=True)
+        for filename in os.listdir(app_dir):
+            if filename.endswith(".bin"):
+                open(os.path.join(out_app, filename), "wb").close()
+
+    subprocess.run(
+        [sys.executable, "update_website.py", "--jobs", "1"],
+        cwd=os.path.join(temp_root, "tools"), check=True, stdout=subprocess.DEVNULL,
+    )
+
+    pages = []
+    for dirpath, dirnames, filenames in os.walk(temp_root):
+        dirnames[:] = sorted(d for d in dirnames if d != "tools")
+        for filename in sorted(filenames):
+            if filename.endswith(".html"):
+                path = os.path.join(dirpath, filename)
+                with open(path, "r", encoding="utf-8") as f:
+                    pages.append((os.path.relpath(path, temp_root).replace("\\", "/"), f.read()))
+    return pages
+
+
+@contextlib.contextmanager
+def markup_only():
+    """Pass inline scripts and styles through unminified while active."""
+    minify_js, minify_css = update_website.minify_js, update_website.minify_css
+    update_website.minify_js = update_website.minify_css = lambda text, *args: text
+    try:
+        yield
+    finally:
+        update_website.minify_js, update_website.minify_css = minify_js, minify_css
+
+
+def best_time(func, text, repeat):
+    """Return the fastest of ``repeat`` runs of func(text), in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        # Time the inline scripts and styles too, not the memoized results.
+        for minify in (update_website.minify_css, update_website.minify_js):
+            if hasattr(minify, "cache_clear"):
+                minify.cache_clear()
+        start = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark minify_html against the legacy implementation.")
+    parser.add_argument("--repeat", type=int, default=20, help="timed rounds per page (best is kept)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_root:
+        pages = render_site(temp_root)
+
+    print("=" * line_length)
+    print(f"{'page (markup pass only)':<48}{'KB':>7}{'legacy ms':>11}{'new ms':>9}{'speedup':>9}  same")
+    print("-" * line_length)
+
+    total_legacy = total_new = total_bytes = 0
+    full_legacy = full_new = 0
+    mismatches = []
+    for rel_path, html in pages:
+        legacy_out = legacy_minify_html(html)
+        new_out = update_website.minify_html(html)
+        same = legacy_out == new_out
+        if not same:
+            mismatches.append(rel_path)
+
+        with markup_only():
+            legacy_time = best_time(legacy_minify_html, html, args.repeat)
+            new_time = best_time(update_website.minify_html, html, args.repeat)
+        full_legacy += best_time(legacy_minify_html, html, args.repeat)
+        full_new += best_time(update_website.minify_html, html, args.repeat)
+        total_legacy += legacy_time
+        total_new += new_time
+        total_bytes += len(html)
+        print(f"{rel_path:<48}{len(html) / 1024:>7.1f}{legacy_time * 1000:>11.3f}"
+              f"{new_time * 1000:>9.3f}{legacy_time / new_time:>8.2f}x  {'yes' if same else 'NO'}")
+
+    print("-" * line_length)
+    print(f"{'total (' + str(len(pages)) + ' pages)':<48}{total_bytes / 1024:>7.1f}"
+          f"{total_legacy * 1000:>11.3f}{total_new * 1000:>9.3f}{total_legacy / total_new:>8.2f}x")
+    print(f"{'total with inline scripts and styles':<55}"
+          f"{full_legacy * 1000:>11.3f}{full_new * 1000:>9.3f}{full_legacy / full_new:>8.2f}x")
+    print("=" * line_length)
+
+    if mismatches:
+        # Differences are expected only where the legacy version was wrong,
+        # e.g. whitespace inside <pre>/<textarea> or comments inside scripts.
+        print(f"{len(mismatches)} page(s) minify differently: {', '.join(mismatches)}")
+
+
+if __name__ == "__main__":
+    main()
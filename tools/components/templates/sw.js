@@ -0,0 +1,162 @@
+// Service worker generated by update_website.py.  The manifest lists every
+// precached file and every demo payload with a hash of its content, so this
+// file only changes (and browsers only install a new worker) when one of
+// them does.
+var manifest = {{swManifest}};
+
+var PRECACHE = "xedur-precache";
+var PAYLOADS = "xedur-demos";
+var INDEX_KEY = "/__sw/payload-index";
+
+function cacheKey(path, revision) {
+    return path + "?rev=" + revision;
+}
+
+function requestPath(url) {
+    var path = url.pathname;
+    if (path.slice(-11) === "/index.html") path = path.slice(0, -10);
+    return path;
+}
+
+self.addEventListener("install", function(event) {
+    // Only files whose revision changed are downloaded again.
+    event.waitUntil(caches.open(PRECACHE).then(function(cache) {
+        return Promise.all(Object.keys(manifest.precache).map(function(path) {
+            var key = cacheKey(path, manifest.precache[path]);
+            return cache.match(key).then(function(cached) {
+                if (cached) return;
+                return fetch(path, { cache: "no-cache" }).then(function(response) {
+                    if (!response.ok) throw new Error("Precache failed: " + path);
+                    return cache.put(key, response);
+                });
+            });
+        }));
+    }).then(function() {
+        return self.skipWaiting();
+    }));
+});
+
+self.addEventListener("activate", function(event) {
+    event.waitUntil(Promise.all([
+        removeStale(PRECACHE, manifest.precache),
+        removeStale(PAYLOADS, manifest.payloads).then(function() {
+            return updateIndex(function(index) {
+                Object.keys(index).forEach(function(key) {
+                    if (!isCurrent(key, manifest.payloads)) delete index[key];
+                });
+            });
+        }),
+    ]).then(function() {
+        return self.clients.claim();
+    }));
+});
+
+function isCurrent(key, entries) {
+    var url = new URL(key, self.location.origin);
+    var entry = entries[url.pathname];
+    var revision = Array.isArray(entry) ? entry[0] : entry;
+    return revision !== undefined && url.searchParams.get("rev") === revision;
+}
+
+function removeStale(name, entries) {
+    return caches.open(name).then(function(cache) {
+        return cache.keys().then(function(requests) {
+            return Promise.all(requests.map(function(request) {
+                var path = new URL(request.url).pathname;
+                if (path !== INDEX_KEY && !isCurrent(request.url, entries)) {
+                    return cache.delete(request);
+                }
+            }));
+        });
+    });
+}
+
+// Demo payloads are cached on first use.  The payload index maps each cached
+// key to its size and last use, and is stored in the cache itself so it
+// survives the worker being stopped.  Updates are chained so that concurrent
+// requests never overwrite each other's changes.
+var indexQueue = Promise.resolve();
+
+function updateIndex(change) {
+    indexQueue = indexQueue.then(function() {
+        return caches.open(PAYLOADS);
+    }).then(function(cache) {
+        return cache.match(INDEX_KEY).then(function(response) {
+            return response ? response.json() : {};
+        }).then(function(index) {
+            var result = change(index, cache);
+            return Promise.resolve(result).then(function() {
+                return cache.put(INDEX_KEY, new Response(JSON.stringify(index), {
+                    headers: { "Content-Type": "application/json" },
+                }));
+            });
+        });
+    }).catch(function() {});
+    return indexQueue;
+}
+
+// Evict the least recently used payloads until size more bytes fit.
+function makeRoom(index, cache, size) {
+    var keys = Object.keys(index).sort(function(a, b) {
+        return index[a].used - index[b].used;
+    });
+    var total = keys.reduce(function(sum, key) { return sum + index[key].size; }, 0);
+    var removals = [];
+    while (keys.length && total + size > manifest.payloadLimit) {
+        var key = keys.shift();
+        total -= index[key].size;
+        delete index[key];
+        removals.push(cache.delete(key));
+    }
+    return Promise.all(removals);
+}
+
+function fetchPayload(request, path) {
+    var revision = manifest.payloads[path][0];
+    var size = manifest.payloads[path][1];
+    var key = cacheKey(path, revision);
+    return caches.open(PAYLOADS).then(function(cache) {
+        return cache.match(key).then(function(cached) {
+            if (cached) {
+                updateIndex(function(index) {
+                    index[key] = { size: size, used: Date.now() };
+                });
+                return cached;
+            }
+            return fetch(request).then(function(response) {
+                if (response.status === 200 && size <= manifest.payloadLimit) {
+                    var copy = response.clone();
+                    updateIndex(function(index) {
+                        return makeRoom(index, cache, size).then(function() {
+                            return cache.put(key, copy);
+                        }).then(function() {
+                            index[key] = { size: size, used: Date.now() };
+                        });
+                    });
+                }
+                return response;
+            });
+        });
+    });
+}
+
+function fetchPrecached(request, path) {
+    return caches.open(PRECACHE).then(function(cache) {
+        return cache.match(cacheKey(path, manifest.precache[path]));
+    }).then(function(cached) {
+        return cached || fetch(request);
+    });
+}
+
+self.addEventListener("fetch", function(event) {
+    var request = event.request;
+    if (request.method !== "GET") return;
+    var url = new URL(request.url);
+    if (url.origin !== self.location.origin) return;
+    var path = requestPath(url);
+    if (manifest.payloads.hasOwnProperty(path)) {
+        event.respondWith(fetchPayload(request, path));
+    } else if (manifest.precache.hasOwnProperty(path)) {
+        event.respondWith(fetchPrecached(request, path));
+    }
+});
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Client for the update_website.py build daemon.
+Hands a build to the running daemon (``update_website.py daemon``) without
+importing the builder, so a build costs little more than starting Python.
+Without a daemon the build runs in-process, as with update_website.py.
+
+Usage:
+    python daemon_client.py                   # normal build, in the daemon if one runs
+    python daemon_client.py min -i            # takes the same arguments as update_website.py
+"""
+
+import os
+import sys
+import json
+import socket
+
+DAEMON_SOCKET = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "daemon.sock")
+
+
+def run_in_daemon(argv):
+    """Run a build in the build daemon, printing its output as it arrives.
+
+    The daemon runs the build in this process's working directory, so
+    relative paths on the command line mean the same as in-process.
+    Returns the build's exit status, or None when there is no daemon to run
+    it (none is listening, the command line is for serve or the daemon
+    itself, or the daemon is stopping because update_website.py changed);
+    the caller then builds in-process.
+    """
+    if not hasattr(socket, "AF_UNIX") or {"serve", "daemon", "--no-daemon"} & set(argv):
+        return None
+    try:
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        client.connect(DAEMON_SOCKET)
+    except OSError:
+        return None
+    request = {"argv": argv, "cwd": os.getcwd()}
+    # The daemon streams the build output, then a NUL byte and the exit status.
+    trailer = None
+    with client:
+        client.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        while chunk := client.recv(1 << 16):
+            if trailer is None:
+                output, nul, trailer = chunk.partition(b"\0")
+                sys.stdout.buffer.write(output)
+                sys.stdout.buffer.flush()
+                if not nul:
+                    trailer = None
+            else:
+                trailer += chunk
+    if trailer is None:
+        print("Build daemon closed the connection before the build finished.")
+        return 1
+    return None if trailer == b"restart" else int(trailer)
+
+
+def main():
+    status = run_in_daemon(sys.argv[1:])
+    if status is None:
+        import update_website
+        update_website.main(use_daemon=False)
+    sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,114 +4,397 @@ Solar2D HTML5 Build - Post-Build Patcher (WASM builds)
 1. Removes the blur callback registration to prevent HTML5 builds from freezing when user clicks outside of the app.
 2. Removes the alert() from printErr to prevent blocking popups on non-fatal WASM errors.
 3. Deletes index-debug.html and index-nosplash.html (unused in production).
+4. With --split-bins, unpacks the .js and .wasm from the .bin into content-hashed
+   files next to it, which the website's iframe loader streams instead of
+   unzipping the .bin.
+
+Usage:
+    python html5_build_patcher.py [path]             # one build, prompts for the path if omitted
+    python html5_build_patcher.py --batch ROOT [-j N] # every .bin under ROOT, no prompts
+    python html5_build_patcher.py --split-bins [path] # also unpack the .js and .wasm
 """
 
 import zipfile
 import os
+import io
 import sys
-import shutil
 import re
+import json
+import struct
+import zlib
+import time
+import fnmatch
+import hashlib
+import functools
+import argparse
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 line_length = 60
 
-def remove_blur_callback(js_content):
+# Batch mode records the hashes of every build it patched here, so re-running it
+# skips builds that are already done.
+SCRIPT_DIR = Path(__file__).resolve().parent
+BATCH_STATE_FILE = SCRIPT_DIR / ".cache" / "patcher_state.json"
+UNUSED_HTML_FILES = ["index-debug.html", "index-nosplash.html"]
+
+# Zip record layouts (see the PKWARE APPNOTE).  Field order:
+#   local header:   signature, version, flags, method, time, date, crc, compressed size,
+#                   size, name length, extra length
+#   central header: signature, version made by, version, flags, method, time, date, crc,
+#                   compressed size, size, name length, extra length, comment length,
+#                   disk, internal attributes, external attributes, local header offset
+#   end record:     signature, disk, central directory disk, entries on disk, entries,
+#                   central directory size, central directory offset, comment length
+LOCAL_HEADER = struct.Struct("<4s5H3L2H")
+CENTRAL_HEADER = struct.Struct("<4s6H3L5H2L")
+END_RECORD = struct.Struct("<4s4H2LH")
+DATA_DESCRIPTOR_FLAG = 0x08
+UTF8_NAME_FLAG = 0x800
+COPY_CHUNK_SIZE = 1 << 20
+
+# Split files are named <name>.<hash>.<ext> after the first eight hex digits of
+# their SHA-256, the same names tools/update_website.py gives them.
+SPLIT_EXTENSIONS = (".js", ".wasm")
+SPLIT_FILE_RE = re.compile(r"^.+\.[0-9a-f]{8}\.(?:js|wasm)$")
+
+# Patch rules, applied to every file whose name matches the rule's "files" glob:
+# the members of the .bin and the index.html next to it.  A rule either has a
+# compiled "pattern" (whose "replacement" may use its groups, but the pattern
+# itself mustn't use backreferences) or a plain "literal" to replace.  Files
+# that don't contain a rule's "anchor" (the literal itself for literal rules)
+# skip the rule without any regex work, and all remaining rules for a file are
+# combined into one alternation so each file is scanned once.  "expected" is
+# the number of matches an unpatched build has; anything else is reported.
+# "applied" is a compiled pattern found only in a file the rule has already
+# patched, which tells an already patched file apart from one whose structure
+# changed so that the rule no longer matches.
+PATCH_RULES = [
+    {
+        # Remove the blur callback registration from
+        # _emscripten_set_blur_callback_on_thread, so the app doesn't freeze
+        # when the user clicks outside of it.
+        "name": "blur callback",
+        "files": "*.js",
+        "anchor": "function _emscripten_set_blur_callback_on_thread(",
+        "pattern": re.compile(
+            r'(function _emscripten_set_blur_callback_on_thread\([^)]*\)\{)'
+            r'registerFocusEventCallback\([^)]*\);(return 0\})'
+        ),
+        "replacement": r'\1\2',
+        "expected": 1,
+        "applied": re.compile(r'function _emscripten_set_blur_callback_on_thread\([^)]*\)\{return 0\}'),
+    },
+    {
+        # The Solar2D-generated printErr calls alert() for any error containing
+        # 'ERROR', which blocks the UI thread and can cause cascading WASM
+        # crashes.  The console.error call is kept.
+        "name": "printErr alert",
+        "files": "index.html",
+        "anchor": "alert(text)",
+        "pattern": re.compile(
+            r'if\(\s*typeof\(text\)\s*===\s*"string"\s*&&\s*'
+            r'text\.toUpperCase\(\)\.indexOf\("ERROR"\)\s*>=\s*0\)\s*alert\(text\);'
+        ),
+        "replacement": '// alert removed: blocking alert() on errors causes WASM crashes and freezes the UI',
+        "expected": 1,
+        # printErr is defined without any alert(text).  Matching the
+        # replacement comment isn't enough, minified loaders drop it.
+        "applied": re.compile(r'\A(?![\s\S]*alert\(text\))[\s\S]*?printErr\s*:\s*function\s*\('),
+    },
+]
+
+
+def rules_for_file(filename):
     """
-    Remove the blur callback registration from _emscripten_set_blur_callback_on_thread.
+    Return the indexes of the patch rules whose glob matches a file name.
     """
-    pattern = r'(function _emscripten_set_blur_callback_on_thread\([^)]*\)\{)registerFocusEventCallback\([^)]*\);(return 0\})'
+    return [i for i, rule in enumerate(PATCH_RULES) if fnmatch.fnmatch(filename, rule["files"])]
 
-    modified_content = re.sub(pattern, r'\1\2', js_content)
 
-    if modified_content != js_content:
-        print("Successfully removed blur callback registration")
-        return modified_content, True
+@functools.lru_cache(maxsize=None)
+def combined_pattern(rule_indexes):
+    """
+    Compile one alternation of the given rules, with a named group per rule.
+    Each rule's flags are kept by scoping them to its own alternative.
+    """
+    alternatives = []
+    for i in rule_indexes:
+        rule = PATCH_RULES[i]
+        if "literal" in rule:
+            alternatives.append(f"(?P<rule{i}>{re.escape(rule['literal'])})")
+            continue
+        pattern = rule["pattern"]
+        flags = "".join(letter for flag, letter in ((re.I, "i"), (re.M, "m"), (re.S, "s"), (re.X, "x"))
+                        if pattern.flags & flag)
+        body = f"(?{flags}:{pattern.pattern})" if flags else pattern.pattern
+        alternatives.append(f"(?P<rule{i}>{body})")
+    return re.compile("|".join(alternatives))
+
+
+def apply_patch_rules(filename, content):
+    """
+    Apply every patch rule that targets filename to its content in a single scan.
+    Returns the new content and one stats dict per rule (name, matches,
+    expected count, whether a rule without matches was already applied and
+    the seconds spent on the rule's anchor check and replacements).  The
+    time of the shared scan is reported as "scan".
+    """
+    stats = {}
+    active = []
+    for i in rules_for_file(filename):
+        rule = PATCH_RULES[i]
+        start = time.perf_counter()
+        anchor = rule.get("anchor", rule.get("literal"))
+        found = anchor is None or anchor in content
+        stats[i] = {"rule": rule["name"], "file": filename, "matches": 0,
+                    "expected": rule["expected"], "seconds": time.perf_counter() - start}
+        if found:
+            active.append(i)
+
+    scan_seconds = 0.0
+    if active:
+        def replace(match):
+            start = time.perf_counter()
+            i = int(match.lastgroup[len("rule"):])
+            rule = PATCH_RULES[i]
+            if "literal" in rule:
+                result = rule["replacement"]
+            else:
+                result = rule["pattern"].sub(rule["replacement"], match.group(), count=1)
+            stats[i]["matches"] += 1
+            stats[i]["seconds"] += time.perf_counter() - start
+            return result
 
-    print("Warning: Could not find the expected function pattern.")
-    print("This file may already be modified or have a different structure.")
-    return js_content, False
+        start = time.perf_counter()
+        content = combined_pattern(tuple(active)).sub(replace, content)
+        scan_seconds = time.perf_counter() - start
 
+    for i, stat in stats.items():
+        stat["scan"] = scan_seconds
+        stat["applied"] = stat["matches"] == 0 and bool(PATCH_RULES[i]["applied"].search(content))
+    return content, list(stats.values())
 
-def process_bin_file(bin_path):
+
+def print_rule_stats(stats):
     """
-    Process the .bin file (zip archive):
-    1. Extract it
-    2. Modify the .js file (same name as .bin)
-    3. Re-zip it
+    Print one line per applied patch rule, warning when the match count is unexpected.
     """
-    bin_path = Path(bin_path)
+    for stat in stats:
+        line = (f"  {stat['rule']} ({stat['file']}): {stat['matches']} of {stat['expected']} "
+                f"expected match(es), {stat['seconds'] * 1000:.2f} ms "
+                f"(+{stat['scan'] * 1000:.2f} ms scan)")
+        print(line)
+        if stat["applied"]:
+            print(f"  Note: '{stat['rule']}' didn't match; {stat['file']} is already patched.")
+        elif stat["matches"] == 0:
+            print(f"  Warning: '{stat['rule']}' didn't match and {stat['file']} isn't patched; "
+                  f"its structure may have changed.")
+        elif stat["matches"] != stat["expected"]:
+            print(f"  Warning: '{stat['rule']}' matched {stat['matches']} times; "
+                  f"the {stat['file']} structure may have changed.")
+
+
+def read_central_directory(f):
+    """
+    Read the central directory of an open zip file.
+    Returns a list of (header fields, name + extra + comment bytes) records
+    and the archive comment.  ZIP64 archives aren't supported.
+    """
+    f.seek(0, os.SEEK_END)
+    size = f.tell()
+    tail_length = min(size, END_RECORD.size + 0xFFFF)
+    f.seek(size - tail_length)
+    tail = f.read()
+
+    pos = tail.rfind(b"PK\x05\x06")
+    if pos < 0:
+        raise zipfile.BadZipFile("End of central directory not found")
+    end = END_RECORD.unpack_from(tail, pos)
+    count, directory_size, directory_offset, comment_length = end[4:8]
+    if count == 0xFFFF or directory_offset == 0xFFFFFFFF:
+        raise zipfile.BadZipFile("ZIP64 archives are not supported")
+    comment = tail[pos + END_RECORD.size:pos + END_RECORD.size + comment_length]
+
+    f.seek(directory_offset)
+    directory = f.read(directory_size)
+    records = []
+    pos = 0
+    for _ in range(count):
+        fields = list(CENTRAL_HEADER.unpack_from(directory, pos))
+        if fields[0] != b"PK\x01\x02":
+            raise zipfile.BadZipFile("Bad central directory record")
+        start = pos + CENTRAL_HEADER.size
+        pos = start + fields[10] + fields[11] + fields[12]
+        records.append((fields, directory[start:pos]))
+    return records, comment
+
+
+def member_name(fields, tail):
+    """
+    Decode a member name from its central directory record (same rules as zipfile).
+    """
+    raw_name = tail[:fields[10]]
+    return raw_name.decode("utf-8" if fields[3] & UTF8_NAME_FLAG else "cp437")
 
-    if not bin_path.exists():
-        print(f"Error: File '{bin_path}' not found!")
-        return False
 
-    print(f"Processing: {bin_path}")
+def copy_bytes(src, dst, length):
+    """
+    Copy length bytes from src to dst in bounded chunks.
+    """
+    while length > 0:
+        chunk = src.read(min(COPY_CHUNK_SIZE, length))
+        if not chunk:
+            raise zipfile.BadZipFile("Unexpected end of archive")
+        dst.write(chunk)
+        length -= len(chunk)
 
-    temp_dir = bin_path.parent / f"{bin_path.stem}_temp"
+
+def repack_bin(bin_path, replacements):
+    """
+    Rewrite a zip archive with new contents for some of its members.
+    Members not in replacements (name -> bytes) have their compressed bytes
+    copied across as they are, so only the replaced members are compressed
+    again.  The archive is written to a temporary file next to the original
+    and renamed over it, so an interrupted run never leaves a broken .bin.
+    """
+    bin_path = Path(bin_path)
+    temp_path = bin_path.with_name(bin_path.name + ".tmp")
 
     try:
-        # .bin is a zip archive containing the JS app and WASM module
-        print("Extracting files...")
-        with zipfile.ZipFile(bin_path, 'r') as zip_ref:
-            zip_ref.extractall(temp_dir)
-
-        # Find the .js file (same name as .bin file)
-        js_filename = bin_path.stem + ".js"
-        js_file = temp_dir / js_filename
-
-        if not js_file.exists():
-            print(f"Error: {js_filename} not found in the archive!")
-            print("Looking for any .js files in the archive...")
-            js_files = list(temp_dir.glob("*.js"))
-            if js_files:
-                print(f"Found: {[f.name for f in js_files]}")
-                print(f"Expected: {js_filename}")
-            return False
+        with open(bin_path, "rb") as src, open(temp_path, "wb") as dst:
+            records, comment = read_central_directory(src)
+            central = []
+
+            for fields, tail in records:
+                src.seek(fields[16])
+                local = list(LOCAL_HEADER.unpack(src.read(LOCAL_HEADER.size)))
+                if local[0] != b"PK\x03\x04":
+                    raise zipfile.BadZipFile("Bad local file header")
+                local_tail = src.read(local[9] + local[10])
+                fields[16] = dst.tell()
+
+                name = member_name(fields, tail)
+                if name in replacements:
+                    data = replacements[name]
+                    compressor = zlib.compressobj(9, zlib.DEFLATED, -15)
+                    packed = compressor.compress(data) + compressor.flush()
+                    crc = zlib.crc32(data)
+                    flags = local[2] & ~DATA_DESCRIPTOR_FLAG
+                    local[2:4] = flags, zipfile.ZIP_DEFLATED
+                    local[6:9] = crc, len(packed), len(data)
+                    fields[3:5] = flags, zipfile.ZIP_DEFLATED
+                    fields[7:10] = crc, len(packed), len(data)
+                    dst.write(LOCAL_HEADER.pack(*local) + local_tail)
+                    dst.write(packed)
+                else:
+                    dst.write(LOCAL_HEADER.pack(*local) + local_tail)
+                    copy_bytes(src, dst, fields[8])
+                    if local[2] & DATA_DESCRIPTOR_FLAG:
+                        descriptor = src.read(16)
+                        if descriptor[:4] != b"PK\x07\x08":
+                            descriptor = descriptor[:12]
+                        dst.write(descriptor)
+
+                central.append(CENTRAL_HEADER.pack(*fields) + tail)
+
+            directory_offset = dst.tell()
+            for record in central:
+                dst.write(record)
+            directory_size = dst.tell() - directory_offset
+            dst.write(END_RECORD.pack(
+                b"PK\x05\x06", 0, 0, len(central), len(central),
+                directory_size, directory_offset, len(comment),
+            ) + comment)
+
+        os.replace(temp_path, bin_path)
+    finally:
+        if temp_path.exists():
+            temp_path.unlink()
 
-        print(f"Found: {js_file.name}")
 
-        with open(js_file, 'r', encoding='utf-8') as f:
-            js_content = f.read()
+def patch_bin(bin_path, rule_stats=None):
+    """
+    Apply the patch rules to the members of a .bin file (zip archive), which
+    must contain a .js file with the same name, and repack the archive,
+    copying every other member as is.  The rules' stats are appended to
+    rule_stats if it is given.
+    Returns True if the archive was modified, False if there was nothing to patch.
+    Raises KeyError if the archive has no such .js file.
+    """
+    bin_path = Path(bin_path)
 
-        print("Modifying blur callback function...")
-        modified_content, was_modified = remove_blur_callback(js_content)
+    # .bin is a zip archive containing the JS app and WASM module
+    js_filename = bin_path.stem + ".js"
+    with zipfile.ZipFile(bin_path, 'r') as zip_ref:
+        names = zip_ref.namelist()
+        if js_filename not in names:
+            js_files = [name for name in names if name.endswith(".js")]
+            raise KeyError(f"{js_filename} not found in the archive (found: {js_files})")
+
+        print(f"Found: {js_filename}")
+
+        replacements = {}
+        for name in names:
+            if not rules_for_file(name):
+                continue
+            content = zip_ref.read(name).decode("utf-8")
+            print(f"Applying patch rules to {name}...")
+            modified, stats = apply_patch_rules(name, content)
+            print_rule_stats(stats)
+            if rule_stats is not None:
+                rule_stats.extend(stats)
+            if modified != content:
+                replacements[name] = modified.encode("utf-8")
+
+    if not replacements:
+        return False
 
-        if not was_modified:
-            print("No modifications made. The file may already be modified.")
-            user_input = input("Continue anyway? (y/n): ").strip().lower()
-            if user_input != 'y':
-                return False
+    # Repack the archive with the patched files
+    print("Re-creating archive...")
+    repack_bin(bin_path, replacements)
+    return True
 
-        with open(js_file, 'w', encoding='utf-8') as f:
-            f.write(modified_content)
 
-        # Repack the archive with the patched JS file
-        print("Re-creating archive...")
-        with zipfile.ZipFile(bin_path, 'w', zipfile.ZIP_DEFLATED) as zip_ref:
-            for root, dirs, files in os.walk(temp_dir):
-                for file in files:
-                    file_path = Path(root) / file
-                    arcname = file_path.relative_to(temp_dir)
-                    zip_ref.write(file_path, arcname)
+def process_bin_file(bin_path):
+    """
+    Process the .bin file (zip archive):
+    1. Read the .js file (same name as .bin) from the archive
+    2. Modify it
+    3. Repack the archive, copying every other member as is
+    """
+    bin_path = Path(bin_path)
 
-        print(f"Successfully processed {bin_path.name}")
-        return True
+    if not bin_path.exists():
+        print(f"Error: File '{bin_path}' not found!")
+        return False
+
+    print(f"Processing: {bin_path}")
 
+    try:
+        was_modified = patch_bin(bin_path)
     except Exception as e:
         print(f"Error: {e}")
         return False
 
-    finally:
-        if temp_dir.exists():
-            shutil.rmtree(temp_dir)
-            print("Cleaned up temporary files")
+    if not was_modified:
+        print("No modifications made. The file may already be modified.")
+        user_input = input("Continue anyway? (y/n): ").strip().lower()
+        if user_input != 'y':
+            return False
+        print(f"Left {bin_path.name} unchanged")
+        return True
 
+    print(f"Successfully processed {bin_path.name}")
+    return True
 
-def patch_index_html(bin_dir):
+
+def patch_index_html(bin_dir, rule_stats=None):
     """
-    Patch bin/index.html to remove alert() from printErr.
-    The Solar2D-generated printErr calls alert() for any error containing 'ERROR',
-    which blocks the UI thread and can cause cascading WASM crashes.
+    Apply the patch rules for index.html (the printErr alert() removal) to
+    bin/index.html.  The rules' stats are appended to rule_stats if it is
+    given.  Returns True if the file was modified.
     """
     index_path = bin_dir / "index.html"
 
@@ -122,19 +405,16 @@ def patch_index_html(bin_dir):
     with open(index_path, 'r', encoding='utf-8') as f:
         content = f.read()
 
-    # Remove the alert() call from printErr, keeping the console.error
-    pattern = r'''if\(\s*typeof\(text\)\s*===\s*"string"\s*&&\s*text\.toUpperCase\(\)\.indexOf\("ERROR"\)\s*>=\s*0\)\s*alert\(text\);'''
-
-    modified = re.sub(pattern, '// alert removed: blocking alert() on errors causes WASM crashes and freezes the UI', content)
+    modified, stats = apply_patch_rules(index_path.name, content)
+    print_rule_stats(stats)
+    if rule_stats is not None:
+        rule_stats.extend(stats)
 
     if modified != content:
         with open(index_path, 'w', encoding='utf-8') as f:
             f.write(modified)
-        print("Removed alert() from printErr in index.html")
         return True
-    else:
-        print("Note: printErr alert pattern not found in index.html (may already be patched)")
-        return False
+    return False
 
 
 def delete_unused_html(bin_dir):
@@ -142,10 +422,9 @@ def delete_unused_html(bin_dir):
     Delete index-debug.html and index-nosplash.html from the bin directory.
     These are generated by Solar2D but not used in production.
     """
-    files_to_delete = ["index-debug.html", "index-nosplash.html"]
     deleted = []
 
-    for filename in files_to_delete:
+    for filename in UNUSED_HTML_FILES:
         file_path = bin_dir / filename
         if file_path.exists():
             file_path.unlink()
@@ -158,6 +437,44 @@ def delete_unused_html(bin_dir):
     return len(deleted) > 0
 
 
+def split_files(bin_dir):
+    """
+    Return the names of the split .js/.wasm files in the bin directory.
+    """
+    return sorted(p.name for p in Path(bin_dir).iterdir() if p.is_file() and SPLIT_FILE_RE.match(p.name))
+
+
+def split_bin(bin_path):
+    """
+    Unpack the .js and .wasm members of a .bin file into content-hashed files
+    next to it and delete split files left over from earlier builds.
+    Existing split files are never rewritten.  Returns the split file names.
+    """
+    bin_path = Path(bin_path)
+    names = []
+    with zipfile.ZipFile(bin_path, 'r') as zip_ref:
+        for name in zip_ref.namelist():
+            stem, ext = os.path.splitext(name)
+            if ext not in SPLIT_EXTENSIONS or "/" in name:
+                continue
+            data = zip_ref.read(name)
+            split_name = f"{stem}.{hashlib.sha256(data).hexdigest()[:8]}{ext}"
+            split_path = bin_path.parent / split_name
+            if not split_path.exists():
+                tmp_path = split_path.with_name(split_name + ".tmp")
+                tmp_path.write_bytes(data)
+                os.replace(tmp_path, split_path)
+                print(f"Wrote {split_name}")
+            names.append(split_name)
+
+    for name in split_files(bin_path.parent):
+        if name not in names:
+            (bin_path.parent / name).unlink()
+            print(f"Deleted stale {name}")
+
+    return names
+
+
 def clean_path(raw_path):
     """
     Clean up a path string from terminal input.
@@ -241,17 +558,210 @@ def auto_detect_bin():
     return None
 
 
+def hash_file(path):
+    """
+    Return the SHA-256 of a file (None if it doesn't exist), read in chunks.
+    """
+    path = Path(path)
+    if not path.is_file():
+        return None
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(COPY_CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def build_hashes(bin_path, split=False):
+    """
+    Return the hashes that identify the patched state of a build:
+    its .bin and the index.html next to it, the names of its split files
+    and whether it was patched with split.
+    """
+    bin_path = Path(bin_path)
+    return {
+        "bin": hash_file(bin_path),
+        "index": hash_file(bin_path.parent / "index.html"),
+        "split": split_files(bin_path.parent),
+        "split_bins": split,
+    }
+
+
+def patch_build(bin_path, split=False):
+    """
+    Patch one build (.bin, index.html, unused HTML files and, with split,
+    the split files) without prompting.
+    Runs in a worker process, so its output is captured into the returned
+    result instead of being printed.
+    The status is "unmatched" (listing the rules in "detail") when a rule
+    neither matched nor was found already applied, for example after the
+    engine export changed, so such a build is never reported as patched.
+    """
+    bin_path = Path(bin_path)
+    log = io.StringIO()
+    result = {"path": str(bin_path), "status": "failed"}
+
+    with contextlib.redirect_stdout(log):
+        try:
+            stats = []
+            bin_modified = patch_bin(bin_path, stats)
+            html_modified = patch_index_html(bin_path.parent, stats)
+            delete_unused_html(bin_path.parent)
+            if split:
+                split_bin(bin_path)
+            seen = {stat["rule"] for stat in stats if stat["matches"] or stat["applied"]}
+            unmatched = [rule["name"] for rule in PATCH_RULES if rule["name"] not in seen]
+            if unmatched:
+                result["status"] = "unmatched"
+                result["detail"] = ", ".join(unmatched)
+            else:
+                result["status"] = "patched" if bin_modified or html_modified else "already patched"
+                result["hashes"] = build_hashes(bin_path, split)
+        except Exception as e:
+            print(f"Error: {e}")
+
+    result["log"] = log.getvalue()
+    return result
+
+
+def load_batch_state():
+    """
+    Load the hashes recorded by earlier batch runs (empty if missing or unreadable).
+    """
+    try:
+        with open(BATCH_STATE_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_batch_state(state):
+    """
+    Persist the hashes of the patched builds for the next batch run.
+    """
+    BATCH_STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with open(BATCH_STATE_FILE, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=1, sort_keys=True)
+        f.write("\n")
+
+
+def run_batch(root, jobs=None, force=False, split=False):
+    """
+    Patch every .bin under root across a process pool.
+    Builds whose .bin, index.html and split files are still what the last
+    batch run recorded (and that have no unused HTML files left) are skipped,
+    unless that run was with a different split setting.
+    With split, the .js and .wasm of each patched build are unpacked too.
+    Prints a summary table and returns the number of builds that failed
+    or had a rule that didn't match.
+    """
+    root = Path(root)
+    if not root.is_dir():
+        print(f"Error: '{root}' is not a directory")
+        return 1
+
+    bin_paths = sorted(p for p in root.rglob("*.bin") if p.is_file())
+    print(f"Found {len(bin_paths)} .bin file(s) under {root}")
+
+    state = load_batch_state()
+    results = {}
+    pending = []
+    for bin_path in bin_paths:
+        key = str(bin_path.resolve())
+        leftovers = any((bin_path.parent / name).exists() for name in UNUSED_HTML_FILES)
+        if not force and not leftovers and state.get(key) == build_hashes(bin_path, split):
+            results[bin_path] = {"path": str(bin_path), "status": "up to date", "log": ""}
+        else:
+            pending.append(bin_path)
+
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    jobs = min(jobs, len(pending))
+    if jobs <= 1:
+        patched = [patch_build(bin_path, split) for bin_path in pending]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            patched = list(pool.map(functools.partial(patch_build, split=split), pending))
+
+    for bin_path, result in zip(pending, patched):
+        results[bin_path] = result
+        if "hashes" in result:
+            state[str(bin_path.resolve())] = result["hashes"]
+    save_batch_state(state)
+
+    failed = [results[p] for p in bin_paths if results[p]["status"] in ("failed", "unmatched")]
+    for result in failed:
+        print()
+        print("-" * line_length)
+        if result["status"] == "unmatched":
+            print(f"{result['path']}: no match for {result['detail']}:")
+        else:
+            print(f"{result['path']} failed:")
+        print(result["log"].rstrip())
+
+    print()
+    print("=" * line_length)
+    width = max([len("build")] + [len(str(p.relative_to(root))) for p in bin_paths])
+    print(f"{'build':<{width}}  result")
+    for bin_path in bin_paths:
+        result = results[bin_path]
+        detail = f" ({result['detail']})" if "detail" in result else ""
+        print(f"{str(bin_path.relative_to(root)):<{width}}  {result['status']}{detail}")
+    counts = {}
+    for result in results.values():
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+    print("-" * line_length)
+    print(", ".join(f"{count} {status}" for status, count in sorted(counts.items())) or "Nothing to patch")
+    print("=" * line_length)
+    return len(failed)
+
+
+def parse_args(argv=None):
+    """
+    Parse the command line arguments.
+    """
+    parser = argparse.ArgumentParser(description="Solar2D HTML5 post-build patcher (WASM builds).")
+    parser.add_argument(
+        "path", nargs="?",
+        help=".bin file or the folder containing it (asked for when omitted)",
+    )
+    parser.add_argument(
+        "--batch", metavar="ROOT",
+        help="patch every .bin under ROOT in parallel, without any prompts",
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=None, metavar="N",
+        help="worker processes for --batch (default: CPU count)",
+    )
+    parser.add_argument(
+        "--force", action="store_true",
+        help="with --batch, also re-patch builds recorded as already patched",
+    )
+    parser.add_argument(
+        "--split-bins", action="store_true",
+        help="also unpack the .js and .wasm next to the .bin for the streaming loader",
+    )
+    return parser.parse_args(argv)
+
+
 def main():
+    args = parse_args()
+    if args.batch:
+        print("=" * line_length)
+        print("Solar2D HTML5 - Post-Build Patcher (WASM), batch mode")
+        print("=" * line_length)
+        sys.exit(1 if run_batch(clean_path(args.batch), args.jobs, args.force, args.split_bins) else 0)
+
     print("=" * line_length)
     print("Solar2D HTML5 - Post-Build Patcher (WASM)")
-    print("Patches blur callback + printErr alert + cleanup")
+    print("Patches blur callback + printErr alert + cleanup" + (" + split" if args.split_bins else ""))
     print("=" * line_length)
     print()
 
     bin_path = None
 
-    if len(sys.argv) > 1:
-        bin_path = resolve_bin_path(clean_path(sys.argv[1]))
+    if args.path:
+        bin_path = resolve_bin_path(clean_path(args.path))
     else:
         print("Provide the path to your .bin file or its folder by:")
         print("  - Typing or pasting a path to the .bin file or its folder")
@@ -291,6 +801,15 @@ def main():
     print("Cleaning up unused HTML files...")
     delete_unused_html(bin_dir)
 
+    if args.split_bins:
+        print()
+        print("-" * line_length)
+        print("Unpacking .js and .wasm for the streaming loader...")
+        try:
+            split_bin(bin_path)
+        except (OSError, zipfile.BadZipFile) as e:
+            print(f"Warning: could not split {bin_path.name}: {e}")
+
     print()
     print("=" * line_length)
 
@@ -299,6 +818,8 @@ def main():
         print("- Blur callback removed (no freeze on click outside)")
         print("- printErr alert removed (no blocking popups on errors)")
         print("- Unused HTML files cleaned up")
+        if args.split_bins:
+            print("- .js and .wasm unpacked next to the .bin")
     elif bin_success:
         print("Blur callback removed successfully.")
         print("Note: index.html printErr patch was skipped (see above).")
@@ -49,4 +49,10 @@ function toggleMobileNav(event) {
         item.classList.toggle("active");
     });
     event.stopPropagation();
-}
\ No newline at end of file
+}
+// The service worker is written to the site root by update_website.py.
+if ("serviceWorker" in navigator) {
+    window.addEventListener("load", function() {
+        navigator.serviceWorker.register("/sw.js").catch(function() {});
+    });
+}
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Tests for the 404 page's search index (build_404_index in update_website.py).
+Checks the BK-tree over the site's own paths and, when node is installed,
+runs the lookup from components/templates/404.html against a brute-force
+scan of every key.
+
+Usage:
+    python -m unittest tools/tests/test_404_index.py
+"""
+
+import os
+import re
+import sys
+import json
+import math
+import random
+import shutil
+import unittest
+import subprocess
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+TOOLS_DIR = os.path.dirname(TESTS_DIR)
+
+sys.path.insert(0, TOOLS_DIR)
+import update_website  # noqa: E402
+
+# Runs the page's search() over an index for each [query, maxDistance] pair.
+NODE_RUNNER = """
+const input = JSON.parse(require("fs").readFileSync(0, "utf8"));
+const searchIndex = input.index;
+%s
+console.log(JSON.stringify(input.queries.map(([query, maxDistance]) => search(query, maxDistance))));
+"""
+
+
+def site_index():
+    """Build the search index for the site's own data, as the build does."""
+    category_data = {}
+    for cat in update_website.CATEGORIES:
+        json_path = os.path.join(TOOLS_DIR, "components", "data", f"{cat}.json")
+        if os.path.exists(json_path):
+            with open(json_path, "r", encoding="utf-8") as f:
+                category_data[cat] = json.load(f)
+    paths = update_website.collect_site_paths(category_data, include_hashes=True)
+    return update_website.build_404_index(paths, category_data)
+
+
+def brute_force(index, query, max_distance):
+    """Return the path of the closest key within max_distance, ties going to the first key."""
+    distance, key = min((update_website.levenshtein(query, key), i) for i, key in enumerate(index["keys"]))
+    return index["paths"][index["targets"][key]] if distance <= max_distance else None
+
+
+def misspell(rng, text):
+    """Return text with one to three random edits."""
+    for _ in range(rng.randint(1, 3)):
+        pos = rng.randrange(len(text) + 1)
+        char = rng.choice("abcdefghijklmnopqrstuvwxyz-/")
+        edit = rng.choice(("insert", "delete", "replace"))
+        if edit == "insert" or not text:
+            text = text[:pos] + char + text[pos:]
+        elif edit == "delete":
+            text = text[:pos] + text[pos + 1:]
+        else:
+            text = text[:pos] + char + text[pos + 1:]
+    return text
+
+
+class SearchIndexTest(unittest.TestCase):
+
+    def test_empty(self):
+        self.assertIsNone(update_website.build_bk_tree([]))
+
+    def test_edges_hold_subtree_distances(self):
+        index = site_index()
+        keys = index["keys"]
+        seen = []
+
+        def subtree_keys(node):
+            yield node[0]
+            for _, child in node[1] if len(node) > 1 else []:
+                yield from subtree_keys(child)
+
+        stack = [index["tree"]]
+        while stack:
+            node = stack.pop()
+            seen.append(node[0])
+            for distance, child in node[1] if len(node) > 1 else []:
+                for key in subtree_keys(child):
+                    self.assertEqual(update_website.levenshtein(keys[key], keys[node[0]]), distance)
+                stack.append(child)
+        self.assertEqual(sorted(seen), list(range(len(keys))))
+
+    def test_demo_names_and_aliases(self):
+        category_data = {"games": {"demos": [
+            {"folder": "space-game", "title": "Cosmic Drift", "aliases": ["Star Racer"]},
+            {"folder": "elsewhere", "title": "External", "externalUrl": "https://example.com/"},
+        ]}}
+        paths = update_website.collect_site_paths(category_data, include_hashes=True)
+        index = update_website.build_404_index(paths, category_data)
+        targets = {key: index["paths"][target] for key, target in zip(index["keys"], index["targets"])}
+        for key in ("/demo/space-game", "/space-game", "/cosmic-drift", "/demo/star-racer", "/star-racer"):
+            self.assertEqual(targets[key], "/demo/space-game/")
+        self.assertEqual(targets["/"], "/")
+        self.assertNotIn("/elsewhere", targets)
+        self.assertNotIn("/external", targets)
+
+    @unittest.skipUnless(shutil.which("node"), "node is not installed")
+    def test_page_search_matches_brute_force(self):
+        with open(os.path.join(TOOLS_DIR, "components", "templates", "404.html"), "r", encoding="utf-8") as f:
+            template = f.read()
+        functions = re.search(r"^ *function levenshtein\(.*?(?=^ *function normalize\()", template, re.M | re.S)
+        self.assertIsNotNone(functions)
+
+        index = site_index()
+        rng = random.Random(404)
+        queries = []
+        for key in index["keys"]:
+            queries.append(key)
+            queries.append(misspell(rng, key))
+            queries.append(misspell(rng, key))
+        queries += ["/", "/xyz", "/demo/", "/totally-unrelated-page", ""]
+        cases = []
+        for query in queries:
+            cases.append([query, min(3, math.ceil(len(query) * 0.3))])
+            cases.append([query, rng.randint(0, 5)])
+
+        result = subprocess.run(
+            ["node", "-e", NODE_RUNNER % functions.group()],
+            input=json.dumps({"index": index, "queries": cases}),
+            capture_output=True, text=True, check=True,
+        )
+        for (query, max_distance), found in zip(cases, json.loads(result.stdout)):
+            with self.subTest(query=query, max_distance=max_distance):
+                self.assertEqual(found, brute_force(index, query, max_distance))
+
+
+if __name__ == "__main__":
+    unittest.main()
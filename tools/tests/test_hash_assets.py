@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Regression test for --hash-assets combined with --compress.
+Builds a copy of the site twice and checks that the .gz/.br siblings written
+by the first build aren't fingerprinted by the second.
+
+Usage:
+    python -m unittest tools/tests/test_hash_assets.py
+"""
+
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+import subprocess
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+TOOLS_DIR = os.path.dirname(TESTS_DIR)
+ROOT_DIR = os.path.dirname(TOOLS_DIR)
+
+
+def copy_site(temp_root):
+    """Copy the build inputs and asset folders into temp_root.
+
+    Demo app folders get empty .bin placeholders instead of the
+    multi-megabyte app binaries.
+    """
+    shutil.copytree(TOOLS_DIR, os.path.join(temp_root, "tools"),
+                    ignore=shutil.ignore_patterns(".cache", "__pycache__", "benchmarks", "tests"))
+    for folder in ("fonts", "img", "js"):
+        shutil.copytree(os.path.join(ROOT_DIR, folder), os.path.join(temp_root, folder),
+                        ignore=shutil.ignore_patterns("*.gz", "*.br"))
+    for folder in sorted(os.listdir(os.path.join(ROOT_DIR, "demo"))):
+        app_dir = os.path.join(ROOT_DIR, "demo", folder, "app")
+        if not os.path.isdir(app_dir):
+            continue
+        out_app = os.path.join(temp_root, "demo", folder, "app")
+        os.makedirs(out_app, exist_ok=True)
+        for filename in os.listdir(app_dir):
+            if filename.endswith(".bin"):
+                open(os.path.join(out_app, filename), "wb").close()
+
+
+class HashAssetsWithCompressTest(unittest.TestCase):
+
+    def test_compressed_siblings_are_not_fingerprinted(self):
+        with tempfile.TemporaryDirectory() as temp_root:
+            copy_site(temp_root)
+            for _ in range(2):
+                subprocess.run(
+                    [sys.executable, "update_website.py", "--no-daemon", "--jobs", "1",
+                     "--hash-assets", "--compress"],
+                    cwd=os.path.join(temp_root, "tools"), check=True, stdout=subprocess.DEVNULL,
+                )
+
+            with open(os.path.join(temp_root, "asset-manifest.json"), "r", encoding="utf-8") as f:
+                names = json.load(f)
+            self.assertTrue(names)
+            compressed = [path for path in list(names) + list(names.values()) if path.endswith((".gz", ".br"))]
+            self.assertEqual(compressed, [])
+
+            # Fingerprinted copies of compressed siblings, e.g. js/nav.js.e98dd80d.gz.
+            for asset_dir in ("js", "fonts", "img"):
+                for _, _, filenames in os.walk(os.path.join(temp_root, asset_dir)):
+                    for filename in filenames:
+                        self.assertNotRegex(filename, r"\.[0-9a-f]{8}\.(gz|br)$")
+
+
+if __name__ == "__main__":
+    unittest.main()
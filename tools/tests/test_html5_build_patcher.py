@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Tests for the .bin repacking and the patch rules in html5_build_patcher.py.
+Repacks small zip archives laid out the way different zip writers lay them
+out (data descriptors, stored members, an archive comment) and checks that
+zipfile still reads them, that every record ends where the next one starts
+and that only the replaced members changed.  The patch rules are run on
+excerpts of an emscripten export, before and after patching.
+
+Usage:
+    python -m unittest tools/tests/test_html5_build_patcher.py
+"""
+
+import io
+import os
+import sys
+import struct
+import zipfile
+import tempfile
+import unittest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+TOOLS_DIR = os.path.dirname(TESTS_DIR)
+
+sys.path.insert(0, TOOLS_DIR)
+import html5_build_patcher  # noqa: E402
+
+
+class UnseekableWriter(io.RawIOBase):
+    """A write-only stream that can't seek, which makes zipfile write data descriptors."""
+
+    def __init__(self, f):
+        self.f = f
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        return self.f.write(data)
+
+
+def read_members(path):
+    """Return {name: (compress type, flag bits, data)} and the comment of a zip archive."""
+    with zipfile.ZipFile(path) as archive:
+        if archive.testzip() is not None:
+            raise AssertionError(f"bad CRC in {archive.testzip()}")
+        members = {info.filename: (info.compress_type, info.flag_bits, archive.read(info))
+                   for info in archive.infolist()}
+        return members, archive.comment
+
+
+def check_layout(path):
+    """Walk the local records of a zip archive in order and check that each one,
+    including its data descriptor, ends where the central directory says the
+    next record starts.  zipfile itself only follows the directory's offsets,
+    so it doesn't notice stray or missing bytes between members.
+    """
+    with open(path, "rb") as f:
+        records, _ = html5_build_patcher.read_central_directory(f)
+        f.seek(0)
+        data = f.read()
+    end = data.rfind(b"PK\x05\x06")
+    directory_offset = html5_build_patcher.END_RECORD.unpack_from(data, end)[6]
+    next_offsets = [fields[16] for fields, _ in records[1:]] + [directory_offset]
+    for (fields, _), next_offset in zip(records, next_offsets):
+        pos = fields[16]
+        local = html5_build_patcher.LOCAL_HEADER.unpack_from(data, pos)
+        if local[0] != b"PK\x03\x04":
+            raise AssertionError(f"no local header at {pos}")
+        pos += html5_build_patcher.LOCAL_HEADER.size + local[9] + local[10] + fields[8]
+        if local[2] & html5_build_patcher.DATA_DESCRIPTOR_FLAG:
+            if data[pos:pos + 4] == b"PK\x07\x08":
+                pos += 4
+            if struct.unpack_from("<3L", data, pos) != tuple(fields[7:10]):
+                raise AssertionError(f"bad data descriptor at {pos}")
+            pos += 12
+        if pos != next_offset:
+            raise AssertionError(f"record ends at {pos}, the next one starts at {next_offset}")
+
+
+class RepackBinTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.bin_path = os.path.join(self.temp_dir.name, "app.bin")
+        self.wasm = bytes(range(256)) * 64
+        self.js = b"function _emscripten_set_blur_callback_on_thread(a){return 0}\n" * 50
+
+    def write_bin(self, streamed):
+        with open(self.bin_path, "wb") as f:
+            target = UnseekableWriter(f) if streamed else f
+            with zipfile.ZipFile(target, "w") as archive:
+                archive.writestr(zipfile.ZipInfo("app.wasm"), self.wasm, zipfile.ZIP_STORED)
+                archive.writestr(zipfile.ZipInfo("app.js"), self.js, zipfile.ZIP_DEFLATED)
+                archive.writestr(zipfile.ZipInfo("data/readme.txt"), b"kept\n" * 10, zipfile.ZIP_DEFLATED)
+                archive.comment = b"built by a test"
+
+    def check_repack(self, streamed):
+        self.write_bin(streamed)
+        before, _ = read_members(self.bin_path)
+        check_layout(self.bin_path)
+        if streamed:
+            self.assertTrue(all(flags & html5_build_patcher.DATA_DESCRIPTOR_FLAG
+                                for _, flags, _ in before.values()))
+
+        patched = b"// patched\n" + self.js
+        html5_build_patcher.repack_bin(self.bin_path, {"app.js": patched})
+
+        after, comment = read_members(self.bin_path)
+        check_layout(self.bin_path)
+        self.assertEqual(comment, b"built by a test")
+        self.assertEqual(list(after), ["app.wasm", "app.js", "data/readme.txt"])
+        self.assertEqual(after["app.js"][0], zipfile.ZIP_DEFLATED)
+        self.assertEqual(after["app.js"][1] & html5_build_patcher.DATA_DESCRIPTOR_FLAG, 0)
+        self.assertEqual(after["app.js"][2], patched)
+        # Unchanged members keep their compression method, flags and contents.
+        self.assertEqual(after["app.wasm"], before["app.wasm"])
+        self.assertEqual(after["app.wasm"][0], zipfile.ZIP_STORED)
+        self.assertEqual(after["data/readme.txt"], before["data/readme.txt"])
+        self.assertEqual(os.listdir(self.temp_dir.name), ["app.bin"])
+
+    def test_repack(self):
+        self.check_repack(streamed=False)
+
+    def test_repack_with_data_descriptors(self):
+        self.check_repack(streamed=True)
+
+    def test_repack_without_descriptor_signature(self):
+        # Some writers leave out the optional PK\x07\x08 signature.
+        self.write_bin(streamed=True)
+        with open(self.bin_path, "rb") as f:
+            data = f.read()
+        self.assertEqual(data.count(b"PK\x07\x08"), 3)
+        stripped = bytearray(data.replace(b"PK\x07\x08", b""))
+        # Move the central directory offset back by the 12 removed bytes.
+        end = stripped.rfind(b"PK\x05\x06")
+        fields = list(html5_build_patcher.END_RECORD.unpack_from(stripped, end))
+        fields[6] -= 12
+        html5_build_patcher.END_RECORD.pack_into(stripped, end, *fields)
+        with open(self.bin_path, "wb") as f:
+            f.write(self.fix_local_offsets(stripped))
+        check_layout(self.bin_path)
+
+        html5_build_patcher.repack_bin(self.bin_path, {"app.js": b"patched"})
+        after, comment = read_members(self.bin_path)
+        check_layout(self.bin_path)
+        self.assertEqual(after["app.js"][2], b"patched")
+        self.assertEqual(after["app.wasm"][2], self.wasm)
+        self.assertEqual(after["data/readme.txt"][2], b"kept\n" * 10)
+        self.assertEqual(comment, b"built by a test")
+
+    @staticmethod
+    def fix_local_offsets(data):
+        """Point each central directory record at its local header again."""
+        header = html5_build_patcher.CENTRAL_HEADER
+        local_offsets = []
+        pos = data.find(b"PK\x03\x04")
+        while pos >= 0:
+            local_offsets.append(pos)
+            pos = data.find(b"PK\x03\x04", pos + 1)
+        pos = data.find(b"PK\x01\x02")
+        for offset in local_offsets:
+            fields = list(header.unpack_from(data, pos))
+            fields[16] = offset
+            header.pack_into(data, pos, *fields)
+            pos += header.size + fields[10] + fields[11] + fields[12]
+        return data
+
+
+BLUR_FUNCTION = (
+    "function _emscripten_set_blur_callback_on_thread(target,userData,useCapture,callbackfunc,targetThread)"
+    "{registerFocusEventCallback(target,userData,useCapture,callbackfunc,12,\"blur\",targetThread);return 0}"
+)
+PATCHED_BLUR_FUNCTION = (
+    "function _emscripten_set_blur_callback_on_thread(target,userData,useCapture,callbackfunc,targetThread)"
+    "{return 0}"
+)
+PRINT_ERR = """printErr: function(text) {
+if (arguments.length > 1) text = Array.prototype.slice.call(arguments).join(' ');
+console.error(text);
+if(typeof(text)==="string"&&text.toUpperCase().indexOf("ERROR")>=0)alert(text);
+},"""
+
+
+def rule_stat(stats, name):
+    """Return the stats of the named rule."""
+    [stat] = [stat for stat in stats if stat["rule"] == name]
+    return stat
+
+
+class ApplyPatchRulesTest(unittest.TestCase):
+
+    def test_blur_callback(self):
+        content = "var a=1;" + BLUR_FUNCTION + "function f(){}"
+        patched, stats = html5_build_patcher.apply_patch_rules("app.js", content)
+        self.assertEqual(patched, "var a=1;" + PATCHED_BLUR_FUNCTION + "function f(){}")
+        stat = rule_stat(stats, "blur callback")
+        self.assertEqual((stat["matches"], stat["expected"], stat["applied"]), (1, 1, False))
+
+    def test_counts_every_match(self):
+        patched, stats = html5_build_patcher.apply_patch_rules("app.js", BLUR_FUNCTION + ";" + BLUR_FUNCTION)
+        self.assertEqual(patched, PATCHED_BLUR_FUNCTION + ";" + PATCHED_BLUR_FUNCTION)
+        self.assertEqual(rule_stat(stats, "blur callback")["matches"], 2)
+
+    def test_already_patched(self):
+        patched, stats = html5_build_patcher.apply_patch_rules("app.js", PATCHED_BLUR_FUNCTION)
+        self.assertEqual(patched, PATCHED_BLUR_FUNCTION)
+        stat = rule_stat(stats, "blur callback")
+        self.assertEqual((stat["matches"], stat["applied"]), (0, True))
+
+    def test_missing_anchor_is_not_applied(self):
+        content = "function _emscripten_set_focus_callback_on_thread(a){return 0}"
+        patched, stats = html5_build_patcher.apply_patch_rules("app.js", content)
+        self.assertEqual(patched, content)
+        stat = rule_stat(stats, "blur callback")
+        self.assertEqual((stat["matches"], stat["applied"]), (0, False))
+
+    def test_changed_structure_is_not_applied(self):
+        content = BLUR_FUNCTION.replace(";return 0}", ";return 1}")
+        patched, stats = html5_build_patcher.apply_patch_rules("app.js", content)
+        self.assertEqual(patched, content)
+        stat = rule_stat(stats, "blur callback")
+        self.assertEqual((stat["matches"], stat["applied"]), (0, False))
+
+    def test_rules_only_apply_to_their_files(self):
+        _, stats = html5_build_patcher.apply_patch_rules("index.html", BLUR_FUNCTION)
+        self.assertEqual([stat["rule"] for stat in stats], ["printErr alert"])
+        self.assertEqual(html5_build_patcher.apply_patch_rules("app.wasm", BLUR_FUNCTION), (BLUR_FUNCTION, []))
+
+    def test_print_err_alert(self):
+        patched, stats = html5_build_patcher.apply_patch_rules("index.html", PRINT_ERR)
+        self.assertNotIn("alert(text)", patched)
+        self.assertIn("console.error(text);", patched)
+        stat = rule_stat(stats, "printErr alert")
+        self.assertEqual((stat["matches"], stat["applied"]), (1, False))
+
+        again, stats = html5_build_patcher.apply_patch_rules("index.html", patched)
+        self.assertEqual(again, patched)
+        stat = rule_stat(stats, "printErr alert")
+        self.assertEqual((stat["matches"], stat["applied"]), (0, True))
+
+    def test_print_err_alert_with_spaces(self):
+        content = PRINT_ERR.replace('if(typeof(text)==="string"&&', 'if( typeof(text) === "string" && ')
+        patched, stats = html5_build_patcher.apply_patch_rules("index.html", content)
+        self.assertNotIn("alert(text)", patched)
+        self.assertEqual(rule_stat(stats, "printErr alert")["matches"], 1)
+
+    def test_minified_loader_without_alert_is_applied(self):
+        # Minified loaders have neither the alert nor the replacement comment.
+        content = "var Module={printErr:function(text){console.error(text)}};"
+        patched, stats = html5_build_patcher.apply_patch_rules("index.html", content)
+        self.assertEqual(patched, content)
+        stat = rule_stat(stats, "printErr alert")
+        self.assertEqual((stat["matches"], stat["applied"]), (0, True))
+
+        content = "var Module={printErr:function(text){alert(text)}};"
+        _, stats = html5_build_patcher.apply_patch_rules("index.html", content)
+        stat = rule_stat(stats, "printErr alert")
+        self.assertEqual((stat["matches"], stat["applied"]), (0, False))
+
+
+if __name__ == "__main__":
+    unittest.main()
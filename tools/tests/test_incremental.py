@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Tests for incremental builds (-i/--incremental).
+Builds a copy of the site, edits one input at a time and checks that the
+next incremental build rewrites exactly the outputs that depend on it.
+
+Usage:
+    python -m unittest tools/tests/test_incremental.py
+"""
+
+import os
+import re
+import sys
+import json
+import tempfile
+import unittest
+import subprocess
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+TOOLS_DIR = os.path.dirname(TESTS_DIR)
+
+sys.path.insert(0, TESTS_DIR)
+from test_hash_assets import copy_site  # noqa: E402
+
+
+class IncrementalBuildTest(unittest.TestCase):
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.root = temp_dir.name
+        copy_site(self.root)
+        self.build()
+
+    def build(self):
+        """Run an incremental build and return the set of outputs it wrote."""
+        result = subprocess.run(
+            [sys.executable, "update_website.py", "--no-daemon", "--jobs", "1", "-i"],
+            cwd=os.path.join(self.root, "tools"), check=True, capture_output=True, text=True,
+        )
+        return set(re.findall(r"^  Built: (.+)$", result.stdout, re.M))
+
+    def edit_first_game(self, field, suffix):
+        """Append suffix to a field of the first games.json entry and return its folder."""
+        json_path = os.path.join(self.root, "tools", "components", "data", "games.json")
+        with open(json_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        demo = data["demos"][0]
+        demo[field] += suffix
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=4)
+        return demo["folder"]
+
+    def demo_pages(self):
+        """Return the pages of the hosted demos, which demo.html renders."""
+        demo_dir = os.path.join(self.root, "demo")
+        return {f"demo/{folder}/index.html" for folder in os.listdir(demo_dir)
+                if os.path.isdir(os.path.join(demo_dir, folder, "app"))}
+
+    def test_noop_build_writes_nothing(self):
+        self.assertEqual(self.build(), set())
+
+    def test_demo_description_rebuilds_only_its_page(self):
+        folder = self.edit_first_game("descriptionLong", " Edited.")
+        self.assertEqual(self.build(), {f"demo/{folder}/index.html"})
+        self.assertEqual(self.build(), set())
+
+    def test_demo_title_rebuilds_pages_that_list_it(self):
+        folder = self.edit_first_game("title", " Edited")
+        built = self.build()
+        for path in ("index.html", "404.html", "demo/index.html",
+                     f"demo/{folder}/index.html", f"demo/{folder}/app/index.html"):
+            self.assertIn(path, built)
+        self.assertEqual(built & self.demo_pages(), {f"demo/{folder}/index.html"})
+
+    def test_shared_template_rebuilds_every_demo_page(self):
+        template_path = os.path.join(self.root, "tools", "components", "templates", "demo.html")
+        with open(template_path, "a", encoding="utf-8") as f:
+            f.write("<!-- edited -->\n")
+        built = self.build()
+        self.assertEqual(built & self.demo_pages(), self.demo_pages())
+        self.assertNotIn("index.html", built)
+        self.assertNotIn("404.html", built)
+
+    def test_deleted_and_edited_outputs_are_rebuilt(self):
+        first, second = sorted(self.demo_pages())[:2]
+        os.remove(os.path.join(self.root, first))
+        with open(os.path.join(self.root, second), "a", encoding="utf-8") as f:
+            f.write("edited by hand\n")
+        self.assertEqual(self.build(), {first, second})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Tests for the JavaScript minifier in update_website.py.
+Checks that line breaks survive where automatic semicolon insertion needs
+them, that regex literals are told apart from division, and that renaming
+only touches function-local names.  When node is installed, the minified
+scripts are also run and compared with the originals.
+
+Usage:
+    python -m unittest tools/tests/test_minify_js.py
+"""
+
+import io
+import os
+import sys
+import json
+import shutil
+import unittest
+import contextlib
+import subprocess
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+TOOLS_DIR = os.path.dirname(TESTS_DIR)
+
+sys.path.insert(0, TOOLS_DIR)
+import update_website  # noqa: E402
+
+# Runs each script in its own context and collects what it prints.
+NODE_RUNNER = """
+const vm = require("vm");
+const scripts = JSON.parse(require("fs").readFileSync(0, "utf8"));
+console.log(JSON.stringify(scripts.map(source => {
+    const out = [];
+    try {
+        vm.runInNewContext(source, {print: (...args) => out.push(args.map(String).join(" "))});
+    } catch (e) {
+        out.push("error " + e.name);
+    }
+    return out;
+})));
+"""
+
+# Scripts whose meaning depends on line breaks, regex literals or spacing.
+PROGRAMS = [
+    "var a = 1\nvar b = a\n++b\nprint(a, b)",
+    "function f() { return\n42 }\nprint(f())",
+    "var a = 10, b = 5, c = 2\nprint(a / b / c)",
+    "var s = 'aabbc'\nprint(/ab+c/g.test(s), s.replace(/b/g, '/'))",
+    "var x = 4, g = 2\nvar y = x\n/2/g\nprint(y)",
+    "function f() { return /x/.test('x') }\nprint(f())",
+    "var i = 3\nvar j = i++ / 2\nprint(i, j)",
+    "print(1 .toString(), 1.5.toFixed(2), 0x10.toString())",
+    "var a = 1, b = 2\nprint(a + +b, a - -b, a + ++b, a - --b)",
+    "var t = `a${1 + 1}/c // not a comment`\nprint(t)",
+    "var s = \"/* kept */ // kept\"\nprint(s)",
+    "var o = {a: 1}\nvar k = 'a' in o\nprint(k, typeof o, void 0)",
+    "var a = [1, 2]\n;[3, 4].forEach(function (v) { a.push(v) })\nprint(a.join())",
+    "var n = 0\nlabel: for (var i = 0; i < 3; i++) { for (;;) { n++\ncontinue label } }\nprint(n)",
+    "let x = 1\n{\nlet x = 2\nprint(x)\n}\nprint(x)",
+    "var f = x => x\n* 2\nprint(f(3))",
+    "var a = [...[1, 2], ...'ab']\nprint(a.length)",
+    "(function () {\n  var counter = 5;\n  function helper(value) { return value + counter }\n"
+    "  print(helper(1), typeof helper)\n})()",
+    "(function (first, second) {\n  var total = first + second\n  var inner = function (step) { return total * step }\n"
+    "  print(inner(2), arguments.length)\n})(3, 4)",
+]
+
+
+def node_outputs(scripts):
+    """Run the scripts with node and return what each one printed."""
+    result = subprocess.run(["node", "-e", NODE_RUNNER], input=json.dumps(scripts),
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout)
+
+
+class MinifyJsTest(unittest.TestCase):
+
+    def test_keeps_line_breaks_needed_by_asi(self):
+        self.assertEqual(update_website.minify_js("a\n++b"), "a\n++b")
+        self.assertEqual(update_website.minify_js("return\nx"), "return\nx")
+        self.assertEqual(update_website.minify_js("var a = 1\nvar b = 2"), "var a=1\nvar b=2")
+
+    def test_drops_line_breaks_that_asi_ignores(self):
+        self.assertEqual(update_website.minify_js("a = b\n+ c\nf(\nx\n)"), "a=b+c\nf(x)")
+
+    def test_regex_literals_and_division(self):
+        self.assertEqual(update_website.minify_js("a = b / c / d"), "a=b/c/d")
+        self.assertEqual(update_website.minify_js("x = /ab+c/g.test(s)"), "x=/ab+c/g.test(s)")
+        self.assertEqual(update_website.minify_js("function f(){return /x/}"), "function f(){return/x/}")
+        self.assertEqual(update_website.minify_js("a++ / 2"), "a++/2")
+        self.assertEqual(update_website.minify_js("x = /[/]/ / 2"), "x=/[/]/ /2")
+
+    def test_keeps_spaces_that_separate_tokens(self):
+        self.assertEqual(update_website.minify_js("1 .toString()"), "1 .toString()")
+        self.assertEqual(update_website.minify_js("a + +b"), "a+ +b")
+        self.assertEqual(update_website.minify_js("a - -b"), "a- -b")
+        self.assertEqual(update_website.minify_js("typeof x === 'y'"), "typeof x==='y'")
+
+    def test_comments(self):
+        self.assertEqual(update_website.minify_js("/*! keep */\nvar x = 1 // drop"), "/*! keep */\nvar x=1")
+        self.assertEqual(update_website.minify_js('var s = "/* not a comment */";'),
+                         'var s="/* not a comment */";')
+        self.assertEqual(update_website.minify_js("var t = `a${b}/c // d`;"), "var t=`a${b}/c // d`;")
+
+    def test_compaction_matches_token_join(self):
+        scripts = PROGRAMS[:]
+        js_dir = os.path.join(TOOLS_DIR, "js")
+        for filename in sorted(os.listdir(js_dir)):
+            with open(os.path.join(js_dir, filename), "r", encoding="utf-8") as f:
+                scripts.append(f.read())
+        for script in scripts:
+            with self.subTest(script=script[:40]):
+                tokens, _ = update_website.tokenize_js(script)
+                self.assertEqual(update_website.compact_js(script), update_website.join_js_tokens(tokens))
+
+    def test_renaming_shortens_locals_only(self):
+        script = ("(function(){var counter = 1; function helper(value){return value+counter}"
+                  " window.go = helper(2);})();")
+        self.assertEqual(update_website.minify_js(script, rename=True),
+                         "(function(){var a=1;function b(c){return c+a}window.go=b(2);})();")
+        # Block-scoped declarations are left alone.
+        script = "(function(){let counter = 1; window.go = counter;})();"
+        self.assertEqual(update_website.minify_js(script, rename=True),
+                         "(function(){let counter=1;window.go=counter;})();")
+
+    def test_untokenizable_script_is_left_unchanged(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            result = update_website.minify_js('  var s = "unterminated\n')
+        self.assertEqual(result, 'var s = "unterminated')
+        self.assertIn("Warning: JS not minified", output.getvalue())
+
+    @unittest.skipUnless(shutil.which("node"), "node is not installed")
+    def test_minified_programs_behave_the_same(self):
+        expected = node_outputs(PROGRAMS)
+        for rename in (False, True):
+            minified = [update_website.minify_js(program, rename) for program in PROGRAMS]
+            for program, output, want in zip(PROGRAMS, node_outputs(minified), expected):
+                with self.subTest(program=program, rename=rename):
+                    self.assertNotIn("error SyntaxError", want)
+                    self.assertEqual(output, want)
+
+
+if __name__ == "__main__":
+    unittest.main()
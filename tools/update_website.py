@@ -5,17 +5,53 @@ Reads templates and JSON data from components/,
 then generates HTML pages in the site root directory.
 
 Usage:
-    python update_website.py          # normal build
-    python update_website.py min      # build with minified HTML
+    python update_website.py                  # normal build
+    python update_website.py min              # build with minified HTML
+    python update_website.py --incremental    # only rebuild pages whose inputs changed
+    python update_website.py serve            # serve the site locally, rebuilding on changes
+    python update_website.py daemon           # keep a warm builder running for later builds
 """
 
 import os
 import re
 import sys
 import json
+import gzip
 import shutil
+import html
+import socket
+import hashlib
+import time
+import posixpath
+import zipfile
+import argparse
+import functools
+import contextlib
+import threading
+import traceback
+import http.server
+import urllib.parse
+from concurrent.futures import ProcessPoolExecutor
 from datetime import date
 
+try:
+    import brotli  # Optional: pip install brotli
+except ImportError:
+    brotli = None
+
+try:
+    from PIL import Image  # Optional: pip install Pillow
+except ImportError:
+    Image = None
+
+try:
+    from fontTools import subset as font_subset  # Optional: pip install fonttools
+    from fontTools.ttLib import TTFont
+except ImportError:
+    font_subset = None
+
+from daemon_client import DAEMON_SOCKET, run_in_daemon
+
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 ROOT_DIR = os.path.dirname(SCRIPT_DIR)
 COMPONENTS_DIR = os.path.join(SCRIPT_DIR, "components")
@@ -25,17 +61,135 @@ STANDALONE_DIR = os.path.join(SCRIPT_DIR, "standalone")
 CSS_SRC_DIR = os.path.join(SCRIPT_DIR, "css")
 JS_SRC_DIR = os.path.join(SCRIPT_DIR, "js")
 OUTPUT_DIR = ROOT_DIR
+CACHE_DIR = os.path.join(SCRIPT_DIR, ".cache")
 
-# Module-level flag set by main() based on the "min" argument.
+# Module-level flags set by build_site() based on the command line arguments.
 MINIFY = False
+RENAME_JS = False
+INCREMENTAL = False
+SPLIT_BINS = False
 
 # Tracks output files that were actually modified during this build (forward-slash paths
 # relative to ROOT_DIR).  Used by build_sitemap to decide which lastmod dates to bump.
 CHANGED_FILES = set()
 
+# Source path -> ((size, mtime_ns), text) for every template and data file read
+# so far (see read_source).
+SOURCE_CACHE = {}
+
 # Persistent record of per-page lastmod dates so unchanged pages keep their old date.
 SITEMAP_DATES_FILE = os.path.join(SCRIPT_DIR, "components", "data", "sitemap_dates.json")
 
+# Per-demo asset fingerprints (file list, sizes and content hashes) used to detect
+# asset changes for the sitemap, and the untracked cache of file hashes keyed by
+# inode, size and mtime that keeps fingerprinting cheap.
+ASSET_FINGERPRINTS_FILE = os.path.join(SCRIPT_DIR, "components", "data", "asset_fingerprints.json")
+ASSET_HASH_CACHE_FILE = os.path.join(CACHE_DIR, "asset_hashes.json")
+
+# Per-demo size history written by --size-report, and the defaults for what it
+# flags: a demo heavier than the budget, or one that grew by more than the given
+# percentage since its last recorded size.  Only the newest entries are kept.
+SIZE_HISTORY_FILE = os.path.join(SCRIPT_DIR, "components", "data", "size_history.json")
+SIZE_BUDGET_KB = 5 * 1024
+SIZE_GROWTH_PERCENT = 10
+SIZE_HISTORY_LENGTH = 20
+
+# Build manifest mapping each output file (forward-slash path relative to ROOT_DIR)
+# to the hash of the inputs it was last built from, the hashes of the content
+# written, and the size and mtime the file had right after that build.  Lives in
+# the untracked tools/.cache/ folder.  BUILD_MANIFEST_STAMP is the size and mtime
+# of that file when this process last saved it.
+BUILD_MANIFEST_FILE = os.path.join(CACHE_DIR, "build_manifest.json")
+BUILD_MANIFEST = {"outputs": {}}
+BUILD_MANIFEST_STAMP = None
+
+# Hash of this script (SOURCE_KEY) and of the script plus the shared page shell
+# (SITE_KEY), both set by build_site().  Every page key includes one of them so that
+# builder or base template changes rebuild everything.
+SOURCE_KEY = ""
+SITE_KEY = ""
+
+# Logical asset path -> fingerprinted copy (e.g. "js/nav.js" -> "js/nav.3f9a1c2e.js"),
+# both relative to ROOT_DIR.  Empty unless build_site() runs with --hash-assets.
+ASSET_NAMES = {}
+ASSET_DIRS = ["js", "fonts", "img"]
+ASSET_MANIFEST_FILE = os.path.join(OUTPUT_DIR, "asset-manifest.json")
+
+# Resized WebP/AVIF copies of the card images, written to img/cards/ with
+# --image-variants, and the widths they are made in (never wider than the source).
+# Variants are named <source>-<hash>-<width>.<ext> after the source's content
+# hash, so copies of an older version of an image are never linked.  The cache
+# (in tools/.cache/) keeps the source hashes keyed by inode, size and mtime.
+CARD_IMAGE_DIR = os.path.join(OUTPUT_DIR, "img", "cards")
+CARD_IMAGE_WIDTHS = (400, 800, 1200)
+CARD_IMAGE_FORMATS = {".avif": ("AVIF", 50), ".webp": ("WEBP", 75)}
+CARD_IMAGE_SIZES = "(max-width: 480px) 100vw, (max-width: 1200px) 480px, 400px"
+CARD_IMAGE_CACHE_FILE = os.path.join(CACHE_DIR, "card_images.json")
+
+# Card image path (relative to ROOT_DIR) -> dimensions and available variants,
+# set by build_site() before the frontpage is built.
+CARD_IMAGES = {}
+
+# The first cards of the frontpage's first section are above the fold on most
+# screens (one row of the three-column grid).  They load eagerly with high
+# priority, the first one is preloaded as the LCP image, and all other cards
+# load lazily.
+EAGER_CARDS = 3
+
+# Subsets of the web fonts written to fonts/ with --subset-fonts, holding only the
+# characters the site's templates, data and scripts contain.  A subset is named
+# <font>-<hash>.woff2 after the hash of its source font and character set, so it
+# is only made again when either changes.  The cache (in tools/.cache/) maps
+# that key to the subset's unicode-range.
+FONT_SUBSET_CACHE_FILE = os.path.join(CACHE_DIR, "font_subsets.json")
+FONT_SUBSET_RE = re.compile(r'^.+-[0-9a-f]{8}\.woff2$')
+
+# Regular demos ship as a .bin zip archive.  With --split-bins its .js and .wasm
+# are also unpacked into content-hashed files next to it, so the iframe loader
+# can stream-compile the wasm instead of unzipping the archive in JavaScript.
+# This stores every payload a second time, uncompressed, so it is opt-in and
+# the split files are gitignored.  The cache records which split files each
+# archive produced (in tools/.cache/).
+DEMO_SPLIT_EXTENSIONS = (".js", ".wasm")
+DEMO_SPLIT_CACHE_FILE = os.path.join(CACHE_DIR, "demo_splits.json")
+
+# The service worker written to the site root.  It precaches the shell pages,
+# js/ and fonts, and caches demo payloads on first use, evicting the least
+# recently used ones once they take up more than SW_PAYLOAD_LIMIT_MB.
+SW_FILE = os.path.join(OUTPUT_DIR, "sw.js")
+SW_SHELL_PAGES = {"/": "index.html", "/demo/": "demo/index.html", "/404.html": "404.html"}
+SW_PAYLOAD_EXTENSIONS = (".bin", ".data")
+SW_PAYLOAD_LIMIT_MB = 50
+
+# Profile of the current build with --profile (see new_profile), or None, and
+# where the trace goes when --profile is given without a file name.
+PROFILE = None
+PROFILE_FILE = os.path.join(CACHE_DIR, "build_profile.json")
+
+# The ``serve`` development server: the source folders it polls for changes
+# (minus the data files the build itself writes), the poll interval and how
+# long the sources must stay unchanged before a rebuild, both in seconds.  Pages
+# reload themselves through the live reload event stream, which is signalled by
+# bumping RELOAD_GENERATION under RELOAD.
+WATCH_DIRS = [COMPONENTS_DIR, CSS_SRC_DIR, JS_SRC_DIR, STANDALONE_DIR]
+WATCH_IGNORE = {SITEMAP_DATES_FILE, ASSET_FINGERPRINTS_FILE, SIZE_HISTORY_FILE}
+WATCH_POLL_INTERVAL = 0.25
+WATCH_DEBOUNCE = 0.15
+SERVE_PORT = 8000
+LIVE_RELOAD_PATH = "/__livereload"
+RELOAD = threading.Condition()
+RELOAD_GENERATION = 0
+
+# Output types that get precompressed .gz/.br siblings with --compress, and the
+# record of what each sibling was last compressed from (in tools/.cache/).
+COMPRESS_EXTENSIONS = {
+    ".html", ".css", ".js", ".json", ".xml", ".svg", ".txt", ".data", ".wasm",
+    ".ttf", ".woff", ".woff2",
+}
+COMPRESS_INDEX_FILE = os.path.join(CACHE_DIR, "compress_index.json")
+# A sibling is only kept when it is at most this fraction of the original size.
+COMPRESS_MIN_RATIO = 0.95
+
 # Categories in display order (matches frontpage.html tag order)
 CATEGORIES = ["games", "solar2d", "other"]
 
@@ -49,45 +203,95 @@ SITE_BASE_URL = "https://www.xedur.com"
 # ------------------------------------------------------------------------------------
 # Minification and formatting helpers
 
-def minify_html(text):
-    """Remove HTML comments and collapse whitespace, preserving script/style blocks."""
-    text = re.sub(r'<!--.*?-->', '', text, flags=re.DOTALL)
-
-    # Extract <script> and <style> blocks so HTML whitespace collapsing
-    # doesn't destroy JavaScript // comments or CSS syntax.
-    blocks = []
-
-    def _extract(match):
-        blocks.append(match.group(0))
-        return f'\x00BLOCK{len(blocks) - 1}\x00'
+# One scan over the document finds every comment and every raw-text element.
+# Everything in between is ordinary markup whose whitespace can be collapsed.
+# A raw-text element's content is matched a run of non-"<" characters at a
+# time, so the scan doesn't try to match the closing tag at every character.
+HTML_TOKEN_RE = re.compile(
+    r'<!--.*?-->'
+    r'|<(script|style|pre|textarea)\b([^>]*)>([^<]*(?:<(?!/\1\s*>)[^<]*)*)</\1\s*>',
+    re.DOTALL | re.IGNORECASE,
+)
+SCRIPT_TYPE_RE = re.compile(r'\btype\s*=\s*["\']?([^"\'\s>]+)', re.IGNORECASE)
+JS_SCRIPT_TYPES = {"", "module", "text/javascript", "application/javascript"}
 
-    text = re.sub(r'<script[^>]*>.*?</script>', _extract, text,
-                  flags=re.DOTALL | re.IGNORECASE)
-    text = re.sub(r'<style[^>]*>.*?</style>', _extract, text,
-                  flags=re.DOTALL | re.IGNORECASE)
 
-    # Minify HTML (outside script/style blocks).
-    text = re.sub(r'>\s+<', '><', text)
-    text = re.sub(r'\s+', ' ', text)
+def _collapse_markup(text):
+    """Collapse whitespace in markup outside of raw-text elements.
 
-    # Minify and restore each extracted block.
-    for i, block in enumerate(blocks):
-        m = re.match(r'(<script[^>]*>)(.*?)(</script>)',
-                     block, flags=re.DOTALL | re.IGNORECASE)
-        if m:
-            block = m.group(1) + minify_js(m.group(2)) + m.group(3)
+    Every whitespace run becomes one space, and none is left between tags.
+    str.split() finds the same runs as a ``\\s+`` regex but is several times
+    faster on whole pages.
+    """
+    words = text.split()
+    if not words:
+        return " " if text else ""
+    collapsed = " ".join(words)
+    if text[0].isspace():
+        collapsed = " " + collapsed
+    if text[-1].isspace():
+        collapsed += " "
+    return collapsed.replace("> <", "><")
+
+
+def minify_html(text, rename_js=False):
+    """Remove HTML comments and collapse whitespace in a single scan.
+
+    ``<script>`` and ``<style>`` contents are handed to minify_js (which
+    renames locals with ``rename_js``) and minify_css as they are found
+    (scripts with a non-JS ``type`` are kept verbatim), and
+    ``<pre>``/``<textarea>`` contents are kept exactly as written.  Markup
+    between those elements is buffered, with comments dropped, and
+    collapsed once per run.
+    """
+    out = []
+    markup = []
+    pos = 0
+    for match in HTML_TOKEN_RE.finditer(text):
+        markup.append(text[pos:match.start()])
+        pos = match.end()
+        tag = match.group(1)
+        if tag is None:
+            continue  # Comment.
+
+        tag = tag.lower()
+        open_tag = text[match.start():match.start(3)]
+        close_tag = text[match.end(3):match.end()]
+        content = match.group(3)
+        if tag == "script":
+            type_match = SCRIPT_TYPE_RE.search(match.group(2))
+            script_type = type_match.group(1).lower() if type_match else ""
+            if script_type in JS_SCRIPT_TYPES:
+                content = minify_js(content, rename_js)
+        elif tag == "style":
+            content = minify_css(content)
         else:
-            m = re.match(r'(<style[^>]*>)(.*?)(</style>)',
-                         block, flags=re.DOTALL | re.IGNORECASE)
-            if m:
-                block = m.group(1) + minify_css(m.group(2)) + m.group(3)
-        text = text.replace(f'\x00BLOCK{i}\x00', block, 1)
+            # <pre> and <textarea> keep their whitespace.  Their tags take
+            # part in the surrounding markup's whitespace collapsing.
+            markup.append(open_tag)
+            out.append(_collapse_markup("".join(markup)))
+            out.append(content)
+            markup = [close_tag]
+            continue
 
-    return text.strip()
+        out.append(_collapse_markup("".join(markup)))
+        out.append(open_tag)
+        out.append(content)
+        out.append(close_tag)
+        markup = []
+
+    markup.append(text[pos:])
+    out.append(_collapse_markup("".join(markup)))
+    return "".join(out).strip()
 
 
+@functools.lru_cache(maxsize=16)
 def minify_css(text):
-    """Remove CSS comments and collapse whitespace for a smaller file."""
+    """Remove CSS comments and collapse whitespace for a smaller file.
+
+    Memoized, so that repeated builds in one process (``serve``, ``daemon``)
+    only minify a changed stylesheet.
+    """
     text = re.sub(r'/\*.*?\*/', '', text, flags=re.DOTALL)
     text = re.sub(r'\s+', ' ', text)
     text = re.sub(r'\s*([{}:;,>~+])\s*', r'\1', text)
@@ -95,48 +299,675 @@ def minify_css(text):
     return text.strip()
 
 
-def _strip_inline_comment(line):
-    """Remove a trailing // comment from a JS line, preserving // inside strings."""
-    in_single = False
-    in_double = False
-    i = 0
-    while i < len(line):
-        c = line[i]
-        if c == '\\' and (in_single or in_double):
-            i += 2
-            continue
-        if c == "'" and not in_double:
-            in_single = not in_single
-        elif c == '"' and not in_single:
-            in_double = not in_double
-        elif c == '/' and not in_single and not in_double:
-            if i + 1 < len(line) and line[i + 1] == '/':
-                return line[:i].rstrip()
-        i += 1
-    return line
-
-
-def minify_js(text):
-    """Remove JS comments and collapse whitespace for a smaller file.
-
-    Uses a conservative approach suitable for the simple scripts on this site.
+# JavaScript is minified from a token stream so that line breaks can be dropped
+# wherever automatic semicolon insertion doesn't depend on them.
+JS_LINE_TERMINATORS = "\n\r\u2028\u2029"
+
+JS_COMMENT_PATTERN = r"(?P<comment>//[^\n\r\u2028\u2029]*|/\*.*?(?:\*/|\Z))"
+JS_STRING_PATTERN = r"(?P<string>\"(?:[^\"\\\n\r]|\\(?:\r\n|[\s\S]))*\"|'(?:[^'\\\n\r]|\\(?:\r\n|[\s\S]))*')"
+# Each match is one token with the whitespace before it.  Group 1 is set when
+# that whitespace holds a line break.  Whitespace at the end of the text
+# matches as an "end" token.
+JS_TOKEN_RE = re.compile(r"[^\S\n\r\u2028\u2029]*(?:([\n\r\u2028\u2029])\s*)?(?:" + "|".join([
+    JS_COMMENT_PATTERN,
+    JS_STRING_PATTERN,
+    r"(?P<number>0[xXoObB][\da-fA-F_]+n?"
+    r"|(?:\d[\d_]*\.?[\d_]*|\.\d[\d_]*)(?:[eE][+-]?\d[\d_]*)?n?)",
+    r"(?P<name>(?:[A-Za-z_$\u0080-\uffff]|\\u[\da-fA-F]{4}|\\u\{[\da-fA-F]+\})"
+    r"(?:[\w$\u0080-\uffff]|\\u[\da-fA-F]{4}|\\u\{[\da-fA-F]+\})*)",
+    r"(?P<template>`)",
+    r"(?P<slash>/=?)",
+    r"(?P<punct>>>>=|\.\.\.|===|!==|\*\*=|<<=|>>=|>>>|&&=|\|\|=|\?\?=|=>|==|!=|<=|>=|&&"
+    r"|\|\||\?\?|\?\.(?!\d)|\+\+|--|\+=|-=|\*=|%=|&=|\|=|\^=|<<|>>|\*\*"
+    r"|[{}()\[\];,<>+\-*%&|^!~?:=.@#])",
+    r"(?P<end>\Z)",
+]) + ")", re.DOTALL)
+JS_REGEX_RE = re.compile(r"/(?:[^/\\\[\n\r]|\\.|\[(?:[^\]\\\n\r]|\\.)*\])+/[\w$]*")
+JS_TEMPLATE_CHUNK_RE = re.compile(r"(?:[^`\\$]|\\[\s\S]|\$(?!\{))*")
+
+# compact_js only picks out what it can't reflow: comments, strings, template
+# literals and slashes (a division or a regular expression).  Each "code"
+# match is a run of names, numbers, punctuators and whitespace in between,
+# which the regexes below compact.
+JS_SCAN_RE = re.compile("|".join([
+    r"(?P<code>[^\"'`/]+)",
+    JS_COMMENT_PATTERN,
+    JS_STRING_PATTERN,
+    r"(?P<template>`)",
+    r"(?P<slash>/=?)",
+    r"(?P<quote>[\"'])",
+]), re.DOTALL)
+JS_LINE_BREAK_RE = re.compile(r"[\n\r\u2028\u2029]")
+# Whitespace holding a line break becomes one "\n"; the rest of the
+# whitespace (what "\s" matches apart from line terminators) is translated
+# to spaces.
+JS_LINE_SPACE_RE = re.compile(r"[\n\r\u2028\u2029]\s*")
+JS_SPACE_TABLE = str.maketrans(dict.fromkeys(
+    "\t\x0b\x0c\x1c\x1d\x1e\x1f\x85\xa0\u1680\u2000\u2001\u2002\u2003\u2004\u2005\u2006"
+    "\u2007\u2008\u2009\u200a\u202f\u205f\u3000", " "))
+# A line break after a token that can't end a statement (and isn't a
+# keyword or a number like "1."), or before one that can't start a
+# statement after anything but a keyword, is never needed.  The others are
+# decided by _js_code_line_break.
+JS_EXTRA_LINE_BREAK_RE = re.compile(
+    r"\n(?:(?<=[^0-9A-Za-z_$\\\x80-\U0010ffff)\]}+\-.]\n)"
+    r"|(?<=[^0-9A-Za-z_$\\\x80-\U0010ffff]\n)(?![0-9A-Za-z_$\\\x80-\U0010ffff{~!+\-.]))"
+)
+JS_LINE_BREAK_CANDIDATE_RE = re.compile(r"\n")
+# The spaces that keep tokens apart: between two name or number characters,
+# in "+ +", "- -", "- >" and "< !", and (if _js_space_before_dot agrees)
+# before a "." after a number.  These are marked with a quote, which a run
+# of plain code can't hold, and every other space is dropped.
+JS_KEPT_SPACE_RE = re.compile(
+    r" (?=[0-9A-Za-z_$\\\x80-\U0010ffff.+\->!])(?:"
+    r"(?<=[0-9A-Za-z_$\\\x80-\U0010ffff] )(?=[0-9A-Za-z_$\\\x80-\U0010ffff.])"
+    r"|(?<=\+ )(?=\+)|(?<=- )(?=[->])|(?<=< )(?=!))"
+)
+JS_KEPT_SPACE_BEFORE_DOT_RE = re.compile(r"'(?=\.)")
+# A number that a "." right after would become the fraction of, as in "1 .toString()".
+JS_DECIMAL_INTEGER_RE = re.compile(r"\d[\d_]*\Z")
+
+JS_RESERVED = frozenset("""
+    break case catch class const continue debugger default delete do else enum
+    export extends false finally for function if import in instanceof new null
+    return super switch this throw true try typeof var void while with yield let
+    static implements interface package private protected public await async of
+    get set arguments eval undefined NaN Infinity
+""".split())
+
+# Keywords after which a "/" starts a regular expression instead of a division.
+JS_REGEX_AFTER_KEYWORDS = frozenset(
+    "return typeof instanceof in of new delete void throw case do else yield await".split()
+)
+# Keywords that can't be the last token of a statement.
+JS_NON_ENDING_KEYWORDS = frozenset("""
+    break case catch class const continue debugger default delete do else enum export
+    extends finally for function if import in instanceof new return switch throw try
+    typeof var void while with yield let
+""".split())
+# Restricted productions: a newline right after these always ends the statement.
+JS_RESTRICTED_KEYWORDS = frozenset("return break continue throw yield".split())
+# Syntax the local renamer doesn't model; scripts using it are only compacted.
+JS_RENAME_BLOCKERS = frozenset("eval with let const class import export yield async await".split())
+
+JS_SHORT_NAME_CHARS = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ_$"
+
+# ASCII characters that can be part of a name or number.  Any non-ASCII
+# character is treated as one too.
+JS_WORD_CHARS = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_$\\")
+
+# Character pairs that would read as one token when joined, e.g. "a+ +b".
+JS_MERGING_PAIRS = frozenset(("++", "--", "//", "/*", "<!", "->"))
+
+
+def _js_regex_allowed(prev):
+    """Return True if a "/" after the prev token starts a regular expression."""
+    if prev is None:
+        return True
+    kind, value, _ = prev
+    if kind == "name":
+        return value in JS_REGEX_AFTER_KEYWORDS
+    if kind == "punct":
+        return value not in (")", "]", "++", "--")
+    return False
+
+
+def tokenize_js(text, pos=0, in_template=False):
+    """Split JavaScript source into ``(kind, value, newline_before)`` tokens.
+
+    Comments and whitespace are dropped (``/*! ... */`` and ``@license``
+    comments are kept as "comment" tokens), but whether a line break
+    preceded each token is recorded for automatic semicolon insertion.
+    Template literals are kept whole as a single token.  With
+    ``in_template`` the scan stops after the ``}`` closing a ``${``
+    substitution.  Returns the token list and the end position.
+    Raises ValueError on input it can't tokenize.
+
+    Tokens are read with one finditer() pass; the scan only restarts after
+    the tokens the regex can't delimit on its own (regular expressions and
+    template literals).
     """
-    text = re.sub(r'/\*.*?\*/', '', text, flags=re.DOTALL)
-    lines = []
-    for line in text.split('\n'):
-        stripped = line.strip()
-        if stripped.startswith('//'):
+    tokens = []
+    append = tokens.append
+    newline = False
+    depth = 0
+    while True:
+        restart = None
+        for match in JS_TOKEN_RE.finditer(text, pos):
+            if match.start() != pos:
+                raise ValueError(f"unexpected character {text[pos]!r} at offset {pos}")
+            pos = match.end()
+            kind = match.lastgroup
+            if match.start(1) >= 0:
+                newline = True
+            if kind == "name" or kind == "punct":
+                value = match.group(kind)
+                if in_template and kind == "punct":
+                    if value == "{":
+                        depth += 1
+                    elif value == "}":
+                        if depth == 0:
+                            return tokens, pos
+                        depth -= 1
+                append((kind, value, newline))
+                newline = False
+            elif kind == "comment":
+                value = match.group(kind)
+                start = match.start(kind)
+                if value.startswith("/*") and (len(value) < 4 or not value.endswith("*/")):
+                    raise ValueError(f"unterminated comment at offset {start}")
+                if value.startswith("/*!") or "@license" in value:
+                    append(("comment", value, newline))
+                    newline = False
+                elif any(c in value for c in JS_LINE_TERMINATORS):
+                    newline = True
+            elif kind == "slash":
+                prev = tokens[-1] if tokens else None
+                if prev is not None and prev[0] == "comment":
+                    prev = next((t for t in reversed(tokens) if t[0] != "comment"), None)
+                if _js_regex_allowed(prev):
+                    restart = match.start(kind)
+                    regex = JS_REGEX_RE.match(text, restart)
+                    if not regex:
+                        raise ValueError(f"unterminated regular expression at offset {restart}")
+                    append(("regex", regex.group(), newline))
+                    newline = False
+                    pos = regex.end()
+                    break
+                append(("punct", match.group(kind), newline))
+                newline = False
+            elif kind == "template":
+                start = match.start(kind)
+                restart = pos = _js_template_end(text, start)
+                append(("template", text[start:pos], newline))
+                newline = False
+                break
+            elif kind == "end":
+                break
+            else:
+                append((kind, match.group(kind), newline))
+                newline = False
+        if restart is None:
+            break
+    if in_template:
+        raise ValueError("unterminated template substitution")
+    return tokens, pos
+
+
+def _js_can_end_statement(token):
+    kind, value, _ = token
+    if kind == "name":
+        return value not in JS_NON_ENDING_KEYWORDS
+    if kind == "punct":
+        return value in (")", "]", "}", "++", "--")
+    return kind != "comment"
+
+
+def _js_keeps_newline(prev, token):
+    """Return True if dropping the line break between two tokens could change
+    how automatic semicolon insertion splits the statements."""
+    kind, value, _ = token
+    return _js_keeps_line_break(prev, kind, kind in ("name", "number", "string", "regex")
+                                or value in ("{", "!", "~", "++", "--"))
+
+
+def _js_keeps_line_break(prev, kind, starts_statement):
+    """Like _js_keeps_newline, for a next token of the given kind that can
+    (``starts_statement``) or can't start a statement of its own."""
+    if prev[0] == "comment" or kind == "comment":
+        return True
+    if prev[0] == "name" and prev[1] in JS_RESTRICTED_KEYWORDS:
+        return True
+    return starts_statement and _js_can_end_statement(prev)
+
+
+def _js_needs_space(prev, first):
+    """Return True if the prev token and a token starting with ``first``
+    would merge into something else when joined without a space."""
+    last = prev[1][-1]
+    if (last in JS_WORD_CHARS or last > "\x7f") and (first in JS_WORD_CHARS or first > "\x7f"):
+        return True
+    if first == "." and prev[0] == "number" and JS_DECIMAL_INTEGER_RE.match(prev[1]):
+        return True
+    return (last + first) in JS_MERGING_PAIRS
+
+
+def join_js_tokens(tokens):
+    """Join tokens back into source with the least whitespace that keeps the meaning.
+
+    A space goes between two tokens that would merge into something else:
+    two names or numbers, a number and a ".", or a pair like ``+ +``.
+    """
+    out = []
+    append = out.append
+    prev = None
+    for token in tokens:
+        value = token[1]
+        if prev is not None:
+            if token[2] and _js_keeps_newline(prev, token):
+                append("\n")
+            elif _js_needs_space(prev, value[0]):
+                append(" ")
+        append(value)
+        prev = token
+    return "".join(out)
+
+
+def _js_template_end(text, start):
+    """Return the end of the template literal whose backquote is at ``start``."""
+    pos = start + 1
+    while True:
+        pos = JS_TEMPLATE_CHUNK_RE.match(text, pos).end()
+        if pos >= len(text):
+            raise ValueError(f"unterminated template literal at offset {start}")
+        if text[pos] == "`":
+            return pos + 1
+        _, pos = tokenize_js(text, pos + 2, in_template=True)
+
+
+def _js_code_starts_statement(code, pos=0):
+    """Return True if the token at ``pos`` in a run of plain code is one
+    that _js_keeps_newline counts as starting a statement."""
+    first = code[pos]
+    if first in JS_WORD_CHARS or first > "\x7f":
+        return True
+    if first in "{~":
+        return True
+    if first == "!":
+        return code[pos + 1:pos + 2] != "="
+    if first == "+" or first == "-":
+        return code[pos + 1:pos + 2] == first
+    return first == "." and code[pos + 1:pos + 2].isdigit()
+
+
+def _js_after_decimal_point(code, pos):
+    """Return True if the digits at ``pos`` follow a decimal point, as in
+    "1.5" or ".5", rather than a spread ("...5")."""
+    return pos > 0 and code[pos - 1] == "." and code[pos - 2:pos] != ".."
+
+
+def _js_last_token(code, end=None):
+    """Return the token ending at ``end`` in a run of plain code as a
+    ``(kind, value, False)`` tuple.
+
+    Names and numbers come out whole.  Of a punctuator only the last
+    character is kept, apart from telling "++" and "--" from "+" and "-",
+    which is all that _js_can_end_statement and _js_regex_allowed need.
+    """
+    if end is None:
+        end = len(code)
+    last = code[end - 1]
+    start = end - 1
+    if last in JS_WORD_CHARS or last > "\x7f":
+        while start and (code[start - 1] in JS_WORD_CHARS or code[start - 1] > "\x7f"):
+            start -= 1
+        if not code[start].isdigit():
+            return ("name", code[start:end], False)
+        if _js_after_decimal_point(code, start):
+            start -= 1  # The fraction of a number like "1.5".
+        return ("number", code[start:end], False)
+    if last == ".":
+        while start and code[start - 1] in "0123456789_":
+            start -= 1
+        before = code[start - 1] if start else ""
+        if (start < end - 1 and code[start].isdigit() and not (
+                before in JS_WORD_CHARS or before > "\x7f" or _js_after_decimal_point(code, start))):
+            return ("number", code[start:end], False)
+        return ("punct", ".", False)
+    if last == "+" or last == "-":
+        while start and code[start - 1] == last:
+            start -= 1
+        return ("punct", last if (end - start) % 2 else last * 2, False)
+    return ("punct", last, False)
+
+
+def _js_code_line_break(match):
+    """Keep a line break inside a run of plain code if _js_keeps_newline
+    would, else turn it into a space for JS_KEPT_SPACE_RE to judge."""
+    code = match.string
+    pos = match.start()
+    prev = _js_last_token(code, pos)
+    if _js_keeps_line_break(prev, None, _js_code_starts_statement(code, pos + 1)):
+        return "\n"
+    return " "
+
+
+def _js_space_before_dot(match):
+    """Keep the space before a "." only after a decimal integer."""
+    prev = _js_last_token(match.string, match.start())
+    if prev[0] == "number" and JS_DECIMAL_INTEGER_RE.match(prev[1]):
+        return match.group()
+    return ""
+
+
+def _js_compact_code(code):
+    """Reduce the whitespace inside runs of plain code (names, numbers and
+    punctuators) to what keeps tokens apart and statements split."""
+    code = JS_LINE_SPACE_RE.sub("\n", code).translate(JS_SPACE_TABLE)
+    while "  " in code:
+        code = code.replace("  ", " ")
+    code = code.replace(" \n", "\n")
+    code = JS_EXTRA_LINE_BREAK_RE.sub(" ", code)
+    code = JS_LINE_BREAK_CANDIDATE_RE.sub(_js_code_line_break, code)
+    code = JS_KEPT_SPACE_RE.sub("'", code).replace(" ", "")
+    if "'." in code:
+        code = JS_KEPT_SPACE_BEFORE_DOT_RE.sub(_js_space_before_dot, code)
+    return code.replace("'", " ")
+
+
+def compact_js(text):
+    """Minify JavaScript without renaming, for minify_js.
+
+    The output is what joining the tokens of tokenize_js gives, but only
+    comments, strings, template literals and slashes are handled one at a
+    time.  Of the plain code between them only the first and last token
+    are looked at, to decide what separates it from its neighbours; the
+    whitespace inside all of it is reduced at the end with a few regex
+    substitutions over the whole script.  Raises ValueError on input it
+    can't tokenize.
+    """
+    out = []
+    append = out.append
+    code_indexes = []  # where the runs of plain code are in out
+    prev = None        # the last token written
+    code_prev = None   # the last one that isn't a comment
+    gap = newline = False
+    pos = 0
+    while True:
+        restart = None
+        for match in JS_SCAN_RE.finditer(text, pos):
+            kind = match.lastgroup
+            trailing = trailing_newline = False
+            if kind == "code":
+                value = match.group()
+                stripped = value.lstrip()
+                if len(stripped) != len(value):
+                    gap = True
+                    if JS_LINE_BREAK_RE.search(value, 0, len(value) - len(stripped)):
+                        newline = True
+                value = stripped.rstrip()
+                if not value:
+                    continue
+                if len(value) != len(stripped):
+                    trailing = True
+                    trailing_newline = JS_LINE_BREAK_RE.search(stripped, len(value)) is not None
+                starts_statement = _js_code_starts_statement(value)
+                token = _js_last_token(value)
+                code_indexes.append(len(out) + (gap and prev is not None))
+            elif kind == "comment":
+                value = match.group()
+                if value.startswith("/*") and (len(value) < 4 or not value.endswith("*/")):
+                    raise ValueError(f"unterminated comment at offset {match.start()}")
+                if not (value.startswith("/*!") or "@license" in value):
+                    gap = True
+                    if JS_LINE_BREAK_RE.search(value):
+                        newline = True
+                    continue
+                starts_statement = False
+                token = ("comment", value, False)
+            elif kind == "string":
+                value = match.group()
+                starts_statement = True
+                token = ("string", value, False)
+            elif kind == "slash":
+                start = match.start()
+                if _js_regex_allowed(code_prev):
+                    regex = JS_REGEX_RE.match(text, start)
+                    if not regex:
+                        raise ValueError(f"unterminated regular expression at offset {start}")
+                    value = regex.group()
+                    starts_statement = True
+                    token = ("regex", value, False)
+                    restart = regex.end()
+                else:
+                    value = match.group()
+                    starts_statement = False
+                    token = ("punct", value, False)
+            elif kind == "template":
+                start = match.start()
+                restart = _js_template_end(text, start)
+                value = text[start:restart]
+                starts_statement = False
+                token = ("template", value, False)
+            else:
+                raise ValueError(f"unexpected character {match.group()!r} at offset {match.start()}")
+            if gap and prev is not None:
+                if newline and _js_keeps_line_break(prev, token[0], starts_statement):
+                    append("\n")
+                elif _js_needs_space(prev, value[0]):
+                    append(" ")
+                else:
+                    append("")
+            append(value)
+            prev = token
+            if token[0] != "comment":
+                code_prev = token
+            gap = trailing
+            newline = trailing_newline
+            if restart is not None:
+                break
+        if restart is None:
+            break
+        pos = restart
+    # The runs never hold a quote, so they can be compacted in one go.
+    code = _js_compact_code('"'.join([out[i] for i in code_indexes]))
+    for i, value in zip(code_indexes, code.split('"')):
+        out[i] = value
+    return "".join(out)
+
+
+def _js_short_names():
+    """Yield a, b, ..., $, aa, ab, ... skipping reserved words."""
+    first = JS_SHORT_NAME_CHARS
+    rest = JS_SHORT_NAME_CHARS + "0123456789"
+    names = list(first)
+    while True:
+        for name in names:
+            if name not in JS_RESERVED:
+                yield name
+        names = [name + c for name in names for c in rest]
+
+
+def _js_object_brace(prev):
+    """Return True if a "{" after the prev token opens an object literal."""
+    if prev is None or prev[0] == "comment":
+        return False
+    kind, value, _ = prev
+    if kind == "name":
+        return value in ("return", "typeof", "in", "of", "new", "delete", "void",
+                         "case", "throw", "instanceof")
+    if kind == "punct":
+        return value not in (")", "]", "}", ";", "{")
+    return False
+
+
+def rename_js_locals(tokens):
+    """Shorten the names of function-local variables, parameters and functions.
+
+    Only names declared inside a function are renamed; top-level (global)
+    names, object keys and properties keep their spelling.  New names never
+    collide with a global name, a reserved word or a name given to a local
+    of an enclosing function.  Scripts using syntax this scope analysis
+    doesn't model (eval, with, block-scoped declarations, classes, arrow
+    functions, shorthand or accessor properties, ...) are returned unchanged.
+    Returns a new token list.
+    """
+    for kind, value, _ in tokens:
+        if kind == "template" or (kind == "name" and value in JS_RENAME_BLOCKERS):
+            return tokens
+        if kind == "punct" and value in ("=>", "...", "?.", "#", "@"):
+            return tokens
+
+    global_scope = {"parent": None, "declared": set(), "keep": set(), "names": {}}
+    scopes = [global_scope]
+    scope = global_scope
+    refs = []              # (token index, scope the name is used in)
+    brackets = []          # (char, kind, function scope or None)
+    var_depths = []        # bracket depths of the open var statements
+    var_expect = False     # next name is declared by a var statement
+    function_state = None  # (scope, is_declaration) while parsing a function header
+    catch_state = 0        # 1 after "catch", 2 inside its parentheses
+    prev = None
+
+    def declare(target, index):
+        target["declared"].add(tokens[index][1])
+        refs.append((index, target))
+
+    for i, token in enumerate(tokens):
+        kind, value, newline = token
+        if kind == "comment":
             continue
-        if stripped:
-            stripped = _strip_inline_comment(stripped)
-            if stripped:
-                lines.append(stripped)
-    text = '\n'.join(lines)
-    # Collapse horizontal whitespace only. Newlines must be preserved
-    # because JavaScript relies on them for automatic semicolon insertion
-    # and this "homebaked no dependency minifier" isn't a proper minifier.
-    text = re.sub(r'[^\S\n]+', ' ', text)
-    return text.strip()
+        depth = len(brackets)
+
+        # End var statements at ";", at a line break where ASI applies or
+        # when their bracket level closes.
+        if var_depths and depth == var_depths[-1]:
+            if value == ";" or (kind == "name" and value == "in") or (
+                    newline and prev is not None and _js_can_end_statement(prev)
+                    and _js_keeps_newline(prev, token) and prev[1] != "var"):
+                var_depths.pop()
+                var_expect = False
+
+        if kind == "name":
+            if prev is not None and prev[1] == "." and prev[0] == "punct":
+                pass  # Property access.
+            elif brackets and brackets[-1][1] == "object" and prev[1] in ("{", ","):
+                if i + 1 == len(tokens) or tokens[i + 1][1] != ":":
+                    return tokens  # Shorthand, method or accessor property.
+            elif value == "function":
+                is_declaration = prev is None or prev[1] in (";", "{", "}") or (
+                    newline and _js_can_end_statement(prev))
+                parent = scope
+                scope = {"parent": parent, "declared": set(), "keep": set(), "names": {}}
+                scopes.append(scope)
+                function_state = (scope, is_declaration, parent)
+            elif value == "var":
+                var_depths.append(depth)
+                var_expect = True
+            elif value == "catch":
+                catch_state = 1
+            elif value in JS_RESERVED and value not in ("arguments", "undefined", "NaN",
+                                                       "Infinity", "get", "set", "of"):
+                pass
+            elif function_state is not None and prev[1] == "function":
+                own_scope, is_declaration, parent = function_state
+                if is_declaration:
+                    declare(parent, i)
+                else:
+                    # A function expression's name is only bound inside the
+                    # function itself.  It keeps its spelling, which also
+                    # stays safe if the guess between expression and
+                    # declaration was wrong.
+                    declare(own_scope, i)
+                    own_scope["keep"].add(value)
+            elif brackets and brackets[-1][1] == "params":
+                declare(scope, i)
+            elif catch_state == 2:
+                declare(scope, i)
+            elif var_expect and var_depths and depth == var_depths[-1]:
+                declare(scope, i)
+                var_expect = False
+            else:
+                refs.append((i, scope))
+
+        elif kind == "punct":
+            if value == "(":
+                if function_state is not None:
+                    brackets.append(("(", "params", None))
+                elif catch_state == 1:
+                    brackets.append(("(", "catch", None))
+                    catch_state = 2
+                else:
+                    brackets.append(("(", "paren", None))
+            elif value == "[":
+                brackets.append(("[", "index", None))
+            elif value == "{":
+                if function_state is not None:
+                    brackets.append(("{", "body", function_state[2]))
+                    function_state = None
+                elif _js_object_brace(prev):
+                    brackets.append(("{", "object", None))
+                else:
+                    brackets.append(("{", "block", None))
+            elif value in (")", "]", "}"):
+                if not brackets:
+                    return tokens
+                _, bracket_kind, parent = brackets.pop()
+                if bracket_kind == "body":
+                    scope = parent
+                elif bracket_kind == "catch":
+                    catch_state = 0
+                if var_depths and len(brackets) < var_depths[-1]:
+                    var_depths.pop()
+                    var_expect = False
+            elif value == "," and var_depths and depth == var_depths[-1]:
+                var_expect = True
+            elif value == "=" and brackets and brackets[-1][1] == "params":
+                return tokens  # Default parameter values.
+        prev = token
+
+    if brackets or function_state is not None:
+        return tokens
+
+    # Resolve every name use to the scope that declares it.
+    resolved = []
+    global_names = set()
+    for target in scopes:
+        global_names.update(target["keep"])
+    counts = {}
+    for index, use_scope in refs:
+        name = tokens[index][1]
+        target = use_scope
+        while target is not None and name not in target["declared"]:
+            target = target["parent"]
+        if target is None or target is global_scope:
+            global_names.add(name)
+            continue
+        resolved.append((index, target))
+        counts[id(target), name] = counts.get((id(target), name), 0) + 1
+
+    # Hand out short names, most used first, parents before children.
+    for target in scopes[1:]:
+        taken = set(global_names)
+        parent = target["parent"]
+        while parent is not None:
+            taken.update(parent["names"].values())
+            parent = parent["parent"]
+        names = sorted(target["declared"] - target["keep"],
+                       key=lambda n: (-counts.get((id(target), n), 0), n))
+        generator = _js_short_names()
+        for name in names:
+            short = next(generator)
+            while short in taken:
+                short = next(generator)
+            target["names"][name] = short
+            taken.add(short)
+
+    tokens = list(tokens)
+    for index, target in resolved:
+        kind, name, newline = tokens[index]
+        tokens[index] = (kind, target["names"].get(name, name), newline)
+    return tokens
+
+
+def minify_js(text, rename=False):
+    """Minify JavaScript.
+
+    Comments are removed (license comments are kept), whitespace is reduced
+    to what separates tokens, and line breaks are dropped except where
+    automatic semicolon insertion depends on them.  With ``rename``,
+    function-local names are shortened too, which needs the full token
+    stream and takes several times longer.  Scripts that fail to tokenize
+    are returned unchanged.
+    """
+    try:
+        if not rename:
+            return compact_js(text)
+        tokens, _ = tokenize_js(text)
+    except ValueError as e:
+        print(f"  Warning: JS not minified ({e})")
+        return text.strip()
+    return join_js_tokens(rename_js_locals(tokens))
 
 
 def indent_block(text, spaces):
@@ -179,21 +1010,689 @@ def replace_indented(template, tag, content):
     return template.replace(tag, '\n'.join(indented_lines))
 
 
+# ------------------------------------------------------------------------------------
+# Compiled templates
+
+TEMPLATE_TAG_RE = re.compile(r'\{\{(\w+)\}\}')
+
+
+@functools.lru_cache(maxsize=64)
+def compile_template(text):
+    """Parse a template into literal segments and tag slots.
+
+    The result is a tuple whose items are either literal strings or
+    ``(tag_name, indent)`` slot tuples.  ``indent`` is the indentation of the
+    slot's line when the tag is the first thing on that line (the same rule
+    replace_indented uses), otherwise None.  Compiled templates are plain
+    tuples, so they can be passed to worker processes.
+
+    Memoized with room for every template of a build, so that ``serve`` and
+    ``daemon`` keep the current ones compiled while old versions of edited
+    templates fall out of the cache.
+    """
+    parts = []
+    pos = 0
+    for match in TEMPLATE_TAG_RE.finditer(text):
+        start = match.start()
+        if start > pos:
+            parts.append(text[pos:start])
+        line_start = text.rfind('\n', 0, start) + 1
+        prefix = text[line_start:start]
+        indent = " " * len(prefix) if prefix and not prefix.strip() else None
+        parts.append((match.group(1), indent))
+        pos = match.end()
+    if pos < len(text):
+        parts.append(text[pos:])
+    return tuple(parts)
+
+
+def render_template(compiled, values):
+    """Render a compiled template in a single pass.
+
+    Multi-line values placed in an indented slot get every line after the
+    first indented to the slot's level (blank lines are left empty), so the
+    generated HTML nesting stays correct.  Tags missing from ``values`` are
+    left in the output untouched.
+    """
+    out = []
+    for part in compiled:
+        if part.__class__ is str:
+            out.append(part)
+            continue
+        tag, indent = part
+        value = values.get(tag)
+        if value is None:
+            out.append("{{" + tag + "}}")
+        elif indent and '\n' in value:
+            lines = value.split('\n')
+            out.append(lines[0])
+            for line in lines[1:]:
+                out.append('\n' + indent + line if line.strip() else '\n')
+        else:
+            out.append(value)
+    return "".join(out)
+
+
+# ------------------------------------------------------------------------------------
+# Per-page stylesheet pruning
+#
+# Every page inlines the stylesheet, but most pages only use a fraction of it.
+# The stylesheet is parsed once into rules, and each rendered page keeps only
+# the rules whose selectors can match something on that page.
+
+CSS_SCAN_RE = re.compile(
+    r'/\*.*?(?:\*/|\Z)|"(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\'|[{};]', re.DOTALL
+)
+CSS_COMMENT_RE = re.compile(r'/\*.*?(?:\*/|\Z)', re.DOTALL)
+# At-rules whose block holds further rules rather than declarations.
+CSS_GROUPING_AT_RULES = ("@media", "@supports", "@layer", "@container")
+CSS_PSEUDO_RE = re.compile(r'::?[\w-]+(?:\((?:[^()]|\([^()]*\))*\))?')
+CSS_ATTRIBUTE_RE = re.compile(r'\[[^\]]*\]')
+CSS_CLASS_RE = re.compile(r'\.([\w-]+)')
+CSS_ID_RE = re.compile(r'#([\w-]+)')
+CSS_TYPE_RE = re.compile(r'(?:^|[\s>+~])([a-zA-Z][\w-]*)')
+HTML_TAG_NAME_RE = re.compile(r'<([a-zA-Z][\w-]*)')
+HTML_CLASS_ID_RE = re.compile(
+    r'\s(class|id)\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s"\'>]+))', re.IGNORECASE
+)
+HTML_SCRIPT_RE = re.compile(r'<script\b[^>]*>(.*?)</script\s*>', re.DOTALL | re.IGNORECASE)
+JS_STRING_RE = re.compile(r'"(?:[^"\\\n]|\\.)*"|\'(?:[^\'\\\n]|\\.)*\'')
+CSS_NAME_RE = re.compile(r'[\w-]+')
+
+
+def _css_selector_requirements(prelude):
+    """Return, for each selector in a rule's prelude, the (classes, ids, tags)
+    an element on the page must provide for the selector to be able to match.
+
+    Pseudo-classes, pseudo-elements and attribute selectors are ignored, so
+    the check errs on the side of keeping a rule.
+    """
+    prelude = CSS_ATTRIBUTE_RE.sub("", CSS_PSEUDO_RE.sub("", prelude))
+    requirements = []
+    for selector in prelude.split(","):
+        requirements.append((
+            frozenset(CSS_CLASS_RE.findall(selector)),
+            frozenset(CSS_ID_RE.findall(selector)),
+            frozenset(t.lower() for t in CSS_TYPE_RE.findall(selector)),
+        ))
+    return tuple(requirements)
+
+
+def _css_block_end(text, pos):
+    """Return the position just after the "}" closing the block opened before pos."""
+    depth = 1
+    while True:
+        match = CSS_SCAN_RE.search(text, pos)
+        if match is None:
+            return len(text)
+        pos = match.end()
+        token = match.group()
+        if token == "{":
+            depth += 1
+        elif token == "}":
+            depth -= 1
+            if depth == 0:
+                return pos
+
+
+def _parse_css_rules(text, pos):
+    """Parse rules from pos up to the "}" closing the enclosing block (or the end).
+
+    Returns the rules, where the text after the last rule starts and where
+    the enclosing block's "}" is (len(text) at the top level).
+    """
+    rules = []
+    start = pos
+    while True:
+        match = CSS_SCAN_RE.search(text, pos)
+        if match is None:
+            return rules, start, len(text)
+        token = match.group()
+        pos = match.end()
+        if token == "}":
+            return rules, start, match.start()
+        if token == ";":
+            # Statement at-rules such as @import or @charset.
+            rules.append(("keep", text[start:pos]))
+            start = pos
+            continue
+        if token != "{":
+            continue  # Comment or string.
+
+        prelude = CSS_COMMENT_RE.sub("", text[start:match.start()]).strip()
+        if prelude.lower().startswith(CSS_GROUPING_AT_RULES):
+            children, tail_start, close = _parse_css_rules(text, pos)
+            end = min(close + 1, len(text))
+            rules.append(("group", text[start:pos], tuple(children), text[tail_start:end]))
+        else:
+            end = _css_block_end(text, pos)
+            if prelude.startswith("@"):
+                # @font-face, @keyframes, @page, ...
+                rules.append(("keep", text[start:end]))
+            else:
+                rules.append(("rule", text[start:end], _css_selector_requirements(prelude)))
+        start = pos = end
+
+
+@functools.lru_cache(maxsize=16)
+def parse_stylesheet(text):
+    """Split a stylesheet into the rule tuple used by prune_stylesheet.
+
+    Each rule keeps its exact source text (including the whitespace and
+    comments before it), so a stylesheet with every rule kept is
+    reproduced byte for byte.  Rules are plain tuples, so the result can
+    be passed to worker processes, and it is memoized like minify_css.
+    """
+    rules, tail_start, _ = _parse_css_rules(text, 0)
+    rules.append(("keep", text[tail_start:]))
+    return tuple(rules)
+
+
+def js_string_words(text):
+    """Return the class-name-like words found in the string literals of a script."""
+    words = set()
+    for literal in JS_STRING_RE.findall(text):
+        words.update(CSS_NAME_RE.findall(literal))
+    return words
+
+
+def collect_page_names(html, safelist=()):
+    """Return the (classes, ids, tags) that a rendered page can use.
+
+    Classes and ids come from the markup and, because scripts add them at
+    runtime, from the string literals of the page's inline scripts and the
+    given safelist.
+    """
+    tags = {name.lower() for name in HTML_TAG_NAME_RE.findall(html)}
+    classes = set(safelist)
+    ids = set(safelist)
+    for attr, *values in HTML_CLASS_ID_RE.findall(html):
+        names = "".join(values).split()
+        if attr.lower() == "class":
+            classes.update(names)
+        else:
+            ids.update(names)
+    for script in HTML_SCRIPT_RE.findall(html):
+        words = js_string_words(script)
+        classes.update(words)
+        ids.update(words)
+    return classes, ids, tags
+
+
+def prune_stylesheet(rules, used):
+    """Return the CSS text of the rules that can match the used (classes, ids, tags).
+
+    At-rules other than grouping rules (@font-face, @keyframes, ...) are
+    always kept, and grouping rules are dropped once they have no rules left.
+    """
+    classes, ids, tags = used
+    out = []
+    for rule in rules:
+        kind = rule[0]
+        if kind == "rule":
+            if any(c <= classes and i <= ids and t <= tags for c, i, t in rule[2]):
+                out.append(rule[1])
+        elif kind == "group":
+            inner = prune_stylesheet(rule[2], used)
+            if inner.strip():
+                out.append(rule[1] + inner + rule[3])
+        else:
+            out.append(rule[1])
+    return "".join(out)
+
+
 # ------------------------------------------------------------------------------------
 # File loading
 
+def read_source(filepath):
+    """Return the contents of a source file.
+
+    The text is kept in SOURCE_CACHE and only read again once the file's
+    size or mtime changes, so repeated builds in one process (``serve``)
+    don't re-read every template and data file.
+    """
+    st = os.stat(filepath)
+    stamp = (st.st_size, st.st_mtime_ns)
+    cached = SOURCE_CACHE.get(filepath)
+    if cached and cached[0] == stamp:
+        return cached[1]
+    with open(filepath, "r", encoding="utf-8") as f:
+        text = f.read()
+    count_io(read=st.st_size)
+    SOURCE_CACHE[filepath] = (stamp, text)
+    return text
+
+
 def load_file(filename):
     """Read a file from components/templates/ and return its contents as a string."""
-    filepath = os.path.join(TEMPLATES_DIR, filename)
-    with open(filepath, "r", encoding="utf-8") as f:
-        return f.read()
+    return read_source(os.path.join(TEMPLATES_DIR, filename))
 
 
 def load_json(filename):
-    """Read a JSON file from components/data/ and return the parsed object."""
-    filepath = os.path.join(DATA_DIR, filename)
-    with open(filepath, "r", encoding="utf-8") as f:
-        return json.load(f)
+    """Read a JSON file from components/data/ and return the parsed object.
+
+    The object is parsed again only when the file changed (see
+    read_source), so callers must not modify it.
+    """
+    return parse_json(read_source(os.path.join(DATA_DIR, filename)))
+
+
+@functools.lru_cache(maxsize=32)
+def parse_json(text):
+    """json.loads, memoized for load_json."""
+    return json.loads(text)
+
+
+# ------------------------------------------------------------------------------------
+# Build manifest (incremental builds)
+
+def input_key(*parts):
+    """Hash any number of build inputs (strings or JSON-serialisable data) into a key."""
+    h = hashlib.sha256()
+    for part in parts:
+        if not isinstance(part, str):
+            part = json.dumps(part, sort_keys=True)
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def output_rel_path(filepath):
+    """Return the forward-slash path of an output file relative to ROOT_DIR."""
+    return os.path.relpath(filepath, ROOT_DIR).replace("\\", "/")
+
+
+def file_stamp(filepath):
+    """Return ``(size, mtime_ns)`` of a file, or None if it doesn't exist."""
+    try:
+        st = os.stat(filepath)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def load_build_manifest():
+    """Load the build manifest from the previous run (empty if missing or unreadable).
+
+    The manifest this process saved last is kept as it is while the file
+    still has the stats it was saved with.
+    """
+    global BUILD_MANIFEST, BUILD_MANIFEST_STAMP
+    stamp = file_stamp(BUILD_MANIFEST_FILE)
+    if stamp is not None and stamp == BUILD_MANIFEST_STAMP:
+        return
+    BUILD_MANIFEST_STAMP = None
+    BUILD_MANIFEST = {"outputs": {}}
+    if os.path.exists(BUILD_MANIFEST_FILE):
+        try:
+            with open(BUILD_MANIFEST_FILE, "r", encoding="utf-8") as f:
+                BUILD_MANIFEST = json.load(f)
+        except (OSError, ValueError):
+            print("  Warning: build manifest unreadable, doing a full build")
+    BUILD_MANIFEST.setdefault("outputs", {})
+
+
+def save_build_manifest():
+    """Persist the build manifest for the next incremental build."""
+    global BUILD_MANIFEST_STAMP
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(BUILD_MANIFEST_FILE, "w", encoding="utf-8") as f:
+        json.dump(BUILD_MANIFEST, f, indent=1, sort_keys=True)
+        f.write("\n")
+    BUILD_MANIFEST_STAMP = file_stamp(BUILD_MANIFEST_FILE)
+
+
+def record_output(filepath, key=None, digest=None, source=None):
+    """Remember what produced the file currently on disk.
+
+    ``key`` is the input key of the page, ``digest`` the SHA-256 of the bytes
+    written and ``source`` the hash of the content before minification
+    (see emit_file).
+    """
+    st = os.stat(filepath)
+    BUILD_MANIFEST["outputs"][output_rel_path(filepath)] = {
+        "key": key,
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "sha256": digest,
+        "source": source,
+    }
+
+
+def matches_entry(filepath, entry):
+    """Return True if a file still has the size and mtime recorded in its manifest entry."""
+    if not entry:
+        return False
+    try:
+        st = os.stat(filepath)
+    except OSError:
+        return False
+    return st.st_size == entry.get("size") and st.st_mtime_ns == entry.get("mtime_ns")
+
+
+def is_current(filepath, key):
+    """Check whether an output can be skipped in incremental mode.
+
+    The output is current when it was last built from the same input key and
+    the file on disk still has the size and mtime recorded at that time, so
+    outputs that were deleted or edited by hand are rebuilt.
+    """
+    if not INCREMENTAL:
+        return False
+    rel_path = output_rel_path(filepath)
+    entry = BUILD_MANIFEST["outputs"].get(rel_path)
+    if not entry or entry.get("key") != key or not matches_entry(filepath, entry):
+        return False
+    print(f"  Unchanged: {rel_path}")
+    return True
+
+
+# ------------------------------------------------------------------------------------
+# Card images
+
+def image_size(path):
+    """Return the (width, height) of a JPEG or PNG file from its header, or None."""
+    try:
+        with open(path, "rb") as f:
+            head = f.read(24)
+            if head[:8] == b"\x89PNG\r\n\x1a\n" and head[12:16] == b"IHDR":
+                return int.from_bytes(head[16:20], "big"), int.from_bytes(head[20:24], "big")
+            if head[:2] != b"\xff\xd8":
+                return None
+            # Walk the JPEG segments up to the start-of-frame marker.
+            f.seek(2)
+            while True:
+                marker = f.read(4)
+                if len(marker) < 4 or marker[0] != 0xFF:
+                    return None
+                length = int.from_bytes(marker[2:4], "big")
+                if marker[1] in (0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7,
+                                 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF):
+                    frame = f.read(5)
+                    return int.from_bytes(frame[3:5], "big"), int.from_bytes(frame[1:3], "big")
+                f.seek(length - 2, os.SEEK_CUR)
+    except OSError:
+        return None
+
+
+def card_image_paths(demo):
+    """Return the (shown, largest) image paths of a card, relative to ROOT_DIR.
+
+    External cards have one image.  Demo cards show the 600px
+    ``<folder>-small.jpg`` and also have the 1200px ``<folder>-large.jpg``,
+    which is the better source for resized copies.
+    """
+    if is_external(demo):
+        image = demo.get("image", "")
+        return image, image
+    folder = demo.get("folder", "")
+    return f"demo/{folder}/{folder}-small.jpg", f"demo/{folder}/{folder}-large.jpg"
+
+
+def card_image_formats():
+    """Return the CARD_IMAGE_FORMATS extensions the installed Pillow can write."""
+    if Image is None:
+        return []
+    extensions = Image.registered_extensions()
+    return [
+        ext for ext, (fmt, _) in CARD_IMAGE_FORMATS.items()
+        if extensions.get(ext) == fmt and fmt in Image.SAVE
+    ]
+
+
+def write_card_variants(source_path, name, widths, formats):
+    """Write resized copies of one card image to CARD_IMAGE_DIR with Pillow."""
+    with Image.open(source_path) as image:
+        image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+        for width in widths:
+            height = round(image.height * width / image.width)
+            resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+            for ext in formats:
+                fmt, quality = CARD_IMAGE_FORMATS[ext]
+                path = os.path.join(CARD_IMAGE_DIR, f"{name}-{width}{ext}")
+                resized.save(path + ".tmp", fmt, quality=quality)
+                os.replace(path + ".tmp", path)
+                report_write(path, True)
+
+
+def build_card_images(category_data, generate=False):
+    """Collect the dimensions and resized variants of every card image.
+
+    Dimensions are read from the image headers.  With ``generate``, missing
+    WebP/AVIF variants are written (this needs Pillow) and variants of
+    images that are gone or have changed are removed.  Without it, only the
+    variants already in img/cards/ for the current version of each image are
+    used.  Returns the CARD_IMAGES mapping.
+    """
+    try:
+        with open(CARD_IMAGE_CACHE_FILE, "r", encoding="utf-8") as f:
+            hash_cache = json.load(f)
+    except (OSError, ValueError):
+        hash_cache = {}
+
+    formats = card_image_formats()
+    if generate and not formats:
+        print("  WARNING: --image-variants needs Pillow with WebP or AVIF support, skipping")
+        generate = False
+    try:
+        existing = set(os.listdir(CARD_IMAGE_DIR))
+    except OSError:
+        existing = set()
+
+    images = {}
+    sources = set()
+    live = set()
+    for cat_name in CATEGORIES:
+        for demo in category_data.get(cat_name, {}).get("demos", []):
+            shown, largest = card_image_paths(demo)
+            if not shown or shown in images:
+                continue
+            shown_path = os.path.join(ROOT_DIR, shown.replace("/", os.sep))
+            source_path = os.path.join(ROOT_DIR, largest.replace("/", os.sep))
+            info = images[shown] = {"size": image_size(shown_path), "variants": {}}
+            source_size = image_size(source_path)
+            if not source_size:
+                continue
+
+            sources.add(largest)
+            st = os.stat(source_path)
+            stamp = [st.st_ino, st.st_size, st.st_mtime_ns]
+            cached = hash_cache.get(largest)
+            if not (cached and cached[:3] == stamp):
+                cached = hash_cache[largest] = stamp + [hash_file(source_path)]
+            name = f"{os.path.splitext(posixpath.basename(largest))[0]}-{cached[3][:8]}"
+            widths = [width for width in CARD_IMAGE_WIDTHS if width < source_size[0]] + [source_size[0]]
+
+            if generate:
+                missing = [
+                    width for width in widths
+                    if any(f"{name}-{width}{ext}" not in existing for ext in formats)
+                ]
+                if missing:
+                    os.makedirs(CARD_IMAGE_DIR, exist_ok=True)
+                    write_card_variants(source_path, name, missing, formats)
+                    existing.update(f"{name}-{width}{ext}" for width in missing for ext in formats)
+            for ext in CARD_IMAGE_FORMATS:
+                found = [f"{name}-{width}{ext}" for width in widths if f"{name}-{width}{ext}" in existing]
+                if len(found) == len(widths):
+                    info["variants"][ext] = [
+                        [f"img/cards/{filename}", width] for filename, width in zip(found, widths)
+                    ]
+                    live.update(found)
+
+    if generate:
+        for filename in sorted(existing - live):
+            # Fingerprinted copies (--hash-assets) are cleaned up with the other assets.
+            if os.path.splitext(filename)[1] in CARD_IMAGE_FORMATS and not FINGERPRINT_RE.match(filename):
+                os.remove(os.path.join(CARD_IMAGE_DIR, filename))
+                print(f"  Removed stale card image: img/cards/{filename}")
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(CARD_IMAGE_CACHE_FILE, "w", encoding="utf-8") as f:
+        json.dump({path: hash_cache[path] for path in sorted(sources)}, f)
+        f.write("\n")
+    return images
+
+
+# ------------------------------------------------------------------------------------
+# Font subsetting
+
+FONT_FACE_RE = re.compile(r'@font-face\s*\{[^}]*\}')
+FONT_URL_RE = re.compile(r'url\(\s*([\'"]?)([^\'")]+\.woff2)\1\s*\)')
+UNICODE_RANGE_RE = re.compile(r'unicode-range\s*:\s*([^;}]+)')
+
+
+def collect_site_text(category_data):
+    """Return the set of code points that can appear as text on the site.
+
+    Reads every template (except the iframe loader, which doesn't use the
+    site fonts), the page data, the standalone page sources, the site
+    scripts and the stylesheet (for generated ``content``), with HTML
+    entities decoded.  Markup and code are included as
+    well, which only adds ASCII characters that the pages use anyway.
+    """
+    texts = []
+    for filename in sorted(os.listdir(TEMPLATES_DIR)):
+        if filename != "iframe.html":
+            texts.append(load_file(filename))
+    for filename in ["frontpage.json"] + [f"{cat}.json" for cat in category_data]:
+        with open(os.path.join(DATA_DIR, filename), "r", encoding="utf-8") as f:
+            texts.append(f.read())
+    texts.append(json.dumps(category_data, ensure_ascii=False))
+    for directory in (STANDALONE_DIR, JS_SRC_DIR, CSS_SRC_DIR):
+        for entry in scan_files(directory):
+            if entry.name.endswith((".html", ".js", ".css")):
+                with open(entry.path, "r", encoding="utf-8") as f:
+                    texts.append(f.read())
+    return {ord(char) for char in html.unescape("".join(texts)) if char.isprintable() or char == " "}
+
+
+def parse_unicode_range(value):
+    """Return the set of code points in a CSS unicode-range value (None if empty)."""
+    code_points = set()
+    for part in value.split(","):
+        part = part.strip().upper().removeprefix("U+")
+        if not part:
+            continue
+        if "?" in part:
+            start, end = int(part.replace("?", "0"), 16), int(part.replace("?", "F"), 16)
+        elif "-" in part:
+            start, end = (int(bound, 16) for bound in part.split("-", 1))
+        else:
+            start = end = int(part, 16)
+        code_points.update(range(start, end + 1))
+    return code_points or None
+
+
+def format_unicode_range(code_points):
+    """Format a set of code points as a compact CSS unicode-range value."""
+    ranges = []
+    for cp in sorted(code_points):
+        if ranges and cp == ranges[-1][1] + 1:
+            ranges[-1][1] = cp
+        else:
+            ranges.append([cp, cp])
+    return ", ".join(f"U+{start:X}" if start == end else f"U+{start:X}-{end:X}" for start, end in ranges)
+
+
+def subset_font(font_path, code_points, cache):
+    """Write the subset of a woff2 font holding the given code points.
+
+    Returns ``(key, subset_path, unicode_range)``, where ``subset_path`` is
+    None when the font contains none of the code points.  ``cache`` maps
+    subset keys to their unicode-range and is updated in place, so that a
+    subset that already exists is reused without loading the font.
+    """
+    key = input_key(hash_file(font_path), sorted(code_points))
+    stem = os.path.splitext(os.path.basename(font_path))[0]
+    subset_path = os.path.join(os.path.dirname(font_path), f"{stem}-{key[:8]}.woff2")
+    if key in cache and (not cache[key] or os.path.exists(subset_path)):
+        return key, subset_path if cache[key] else None, cache[key]
+
+    font = TTFont(font_path)
+    chars = sorted(code_points & set(font.getBestCmap()))
+    cache[key] = format_unicode_range(chars)
+    if not chars:
+        return key, None, ""
+    options = font_subset.Options()
+    options.flavor = "woff2"
+    options.layout_features = ["*"]
+    subsetter = font_subset.Subsetter(options)
+    subsetter.populate(unicodes=chars)
+    subsetter.subset(font)
+    font.save(subset_path + ".tmp")
+    os.replace(subset_path + ".tmp", subset_path)
+    report_write(subset_path, True)
+    return key, subset_path, cache[key]
+
+
+def subset_fonts(css, code_points):
+    """Add @font-face rules for subsets of the stylesheet's woff2 fonts.
+
+    Every @font-face whose woff2 contains some of ``code_points`` (within its
+    own unicode-range) gets a copy pointing at a subset with just those
+    characters, placed after the last @font-face.  Browsers use the last
+    matching face of a family for each character, so the site's text comes
+    from the small subsets, while anything else (such as text typed into a
+    page) still falls back to the full fonts.  Subsets that are no longer
+    used are removed.  Returns the new stylesheet and a mapping from each
+    font path to its subset, both relative to ROOT_DIR.
+    """
+    try:
+        with open(FONT_SUBSET_CACHE_FILE, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        cache = {}
+
+    faces = []
+    subsets = {}
+    live = {}
+    font_dirs = set()
+    for match in FONT_FACE_RE.finditer(css):
+        rule = match.group(0)
+        url = FONT_URL_RE.search(rule)
+        if not url:
+            continue
+        # Font URLs are relative to css/styles.css.
+        font_path = os.path.normpath(os.path.join(OUTPUT_DIR, "css", url.group(2)))
+        if not os.path.isfile(font_path):
+            continue
+        font_dirs.add(os.path.dirname(font_path))
+        unicode_range = UNICODE_RANGE_RE.search(rule)
+        face_points = parse_unicode_range(unicode_range.group(1)) if unicode_range else None
+        key, subset_path, subset_range = subset_font(
+            font_path, code_points & face_points if face_points else code_points, cache,
+        )
+        live[key] = subset_range
+        if subset_path is None:
+            continue
+
+        subset_url = url.group(2)[:url.group(2).rfind("/") + 1] + os.path.basename(subset_path)
+        face = rule.replace(url.group(2), subset_url)
+        if unicode_range:
+            face = face.replace(unicode_range.group(0), f"unicode-range: {subset_range}")
+        else:
+            face = face[:-1].rstrip() + f"\n    unicode-range: {subset_range};\n}}"
+        faces.append(face)
+        subsets[output_rel_path(font_path)] = output_rel_path(subset_path)
+
+    current = {os.path.basename(path) for path in subsets.values()}
+    for font_dir in sorted(font_dirs):
+        for filename in sorted(os.listdir(font_dir)):
+            if (FONT_SUBSET_RE.match(filename) and not FINGERPRINT_RE.match(filename)
+                    and filename not in current):
+                os.remove(os.path.join(font_dir, filename))
+                print(f"  Removed stale font subset: {output_rel_path(os.path.join(font_dir, filename))}")
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(FONT_SUBSET_CACHE_FILE, "w", encoding="utf-8") as f:
+        json.dump(live, f, indent=1, sort_keys=True)
+        f.write("\n")
+
+    if faces:
+        end = list(FONT_FACE_RE.finditer(css))[-1].end()
+        css = css[:end] + "\n\n" + "\n\n".join(faces) + css[end:]
+    return css, subsets
 
 
 # ------------------------------------------------------------------------------------
@@ -209,66 +1708,113 @@ def is_standalone(demo):
     return demo.get("type") == "standalone"
 
 
-def generate_card(demo, card_template):
-    """Generate a single project card from the card template."""
+def card_image_preload(image):
+    """Return a ``<link rel="preload">`` for a card image that is the page's LCP element.
+
+    When the image has WebP/AVIF variants, the preload uses the same srcset
+    and sizes as the card's first ``<source>`` and carries its type, so
+    browsers fetch exactly the file the ``<picture>`` will pick (or skip the
+    preload if they don't support the format).
+    """
+    variants = CARD_IMAGES.get(image, {}).get("variants", {})
+    for ext, files in variants.items():
+        srcset = ", ".join(f"{path} {width}w" for path, width in files)
+        return (f'<link rel="preload" as="image" href="{image}" imagesrcset="{srcset}" '
+                f'imagesizes="{CARD_IMAGE_SIZES}" type="image/{ext[1:]}" fetchpriority="high">')
+    return f'<link rel="preload" as="image" href="{image}" fetchpriority="high">'
+
+
+def generate_card_image(image, default_size):
+    """Return the ``<source>`` tags and the size of a card image.
+
+    Every WebP/AVIF variant set in CARD_IMAGES gets a ``<source>`` with a
+    srcset, so browsers pick the smallest file that is sharp enough and fall
+    back to the original image.  The size is read from the image header and
+    falls back to ``default_size`` if it can't be.
+    """
+    info = CARD_IMAGES.get(image, {})
+    sources = "".join(
+        f'<source type="image/{ext[1:]}" srcset="'
+        + ", ".join(f"{path} {width}w" for path, width in variants)
+        + f'" sizes="{CARD_IMAGE_SIZES}">'
+        for ext, variants in info.get("variants", {}).items()
+    )
+    return sources, info.get("size") or default_size
+
+
+def generate_card(demo, card_template, eager=False):
+    """Generate a single project card from the card template.
+
+    ``eager`` cards are above the fold: their image loads right away with a
+    high fetch priority.  Other card images are lazy-loaded and decoded
+    off the main thread.
+    """
     if is_external(demo):
         href = demo["externalUrl"]
         target = ' target="_blank"'
         image = demo.get("image", "")
         external_html = '<p class="external-notice">External: This link opens in a new tab.</p>'
-        img_width = "1200"
-        img_height = "630"
+        default_size = (1200, 630)
     else:
         folder = demo.get("folder", "")
         href = f"demo/{folder}/"
         target = ""
         image = f"demo/{folder}/{folder}-small.jpg"
         external_html = ""
-        img_width = "600"
-        img_height = "315"
+        default_size = (600, 315)
+    sources, (img_width, img_height) = generate_card_image(image, default_size)
 
     title = demo.get("title", "")
     alt_text = f"Screenshot of {title}" if title else ""
     tech = demo.get("tech", "")
     tech_html = f'<p class="tech"><b>Tech:</b> {tech}</p>' if tech else ""
 
-    card = card_template
-    card = card.replace("{{cardHref}}", href)
-    card = card.replace("{{cardTarget}}", target)
-    card = card.replace("{{cardTitle}}", title)
-    card = card.replace("{{cardImage}}", image)
-    card = card.replace("{{cardAlt}}", alt_text)
-    card = card.replace("{{cardWidth}}", img_width)
-    card = card.replace("{{cardHeight}}", img_height)
-    card = card.replace("{{cardDescription}}", demo.get("descriptionShort", ""))
-    card = card.replace("{{cardTech}}", tech_html)
-    card = card.replace("{{cardExternal}}", external_html)
+    card = render_template(card_template, {
+        "cardHref": href,
+        "cardTarget": target,
+        "cardTitle": title,
+        "cardImage": image,
+        "cardSources": sources,
+        "cardAlt": alt_text,
+        "cardWidth": str(img_width),
+        "cardHeight": str(img_height),
+        "cardLoading": ' loading="eager" fetchpriority="high"' if eager else ' loading="lazy" decoding="async"',
+        "cardDescription": demo.get("descriptionShort", ""),
+        "cardTech": tech_html,
+        "cardExternal": external_html,
+    })
     return card.rstrip('\n')
 
 
-def generate_section(category_name, data, card_template, section_template):
-    """Generate a full frontpage section from the section and card templates."""
-    demos = data.get("demos", [])
+def generate_section(category_name, data, card_template, section_template, eager_cards=0):
+    """Generate a full frontpage section from the section and card templates.
 
-    cards_html = ""
-    for demo in demos:
-        cards_html += generate_card(demo, card_template) + '\n'
+    The first ``eager_cards`` cards are rendered as above the fold.
+    """
+    demos = data.get("demos", [])
+    cards_html = '\n'.join(
+        generate_card(demo, card_template, i < eager_cards) for i, demo in enumerate(demos)
+    )
 
-    html = section_template
-    html = html.replace("{{sectionId}}", category_name)
-    html = html.replace("{{sectionTitle}}", data.get("sectionTitle", ""))
-    html = html.replace("{{sectionDescription}}", data.get("sectionDescription", ""))
-    html = replace_indented(html, "{{sectionCards}}", cards_html.rstrip('\n'))
+    html = render_template(section_template, {
+        "sectionId": category_name,
+        "sectionTitle": data.get("sectionTitle", ""),
+        "sectionDescription": data.get("sectionDescription", ""),
+        "sectionCards": cards_html,
+    })
     return html.rstrip('\n')
 
 
-def generate_repo_panel(repository, repo_panel_template, private_template=""):
+def generate_repo_panel(repository, repo_panel_template, private_template=(),
+                        base_path=""):
     """Generate the repository link panel from the template."""
     if not repository:
-        return private_template.rstrip('\n')
-
-    html = repo_panel_template
-    html = html.replace("{{repository}}", repository)
+        html = render_template(private_template, {"basePath": base_path})
+    else:
+        html = render_template(repo_panel_template, {
+            "repository": repository,
+            "basePath": base_path,
+        })
     return html.rstrip('\n')
 
 
@@ -312,51 +1858,143 @@ def generate_social_tags(seo, url=""):
     return "\n".join(og_lines) + "\n\n" + "\n".join(twitter_lines)
 
 
-def wrap_in_base(base_template, navbar_html, footer_html, body_content,
-                 page_title, meta_description="", meta_keywords=DEFAULT_KEYWORDS,
-                 og_tags="", base_path="", extra_head=""):
-    """Wrap body content in the base HTML template."""
-    html = base_template
-    # Inline tags (single-line values)
-    html = html.replace("{{metaKeywords}}", meta_keywords)
-    html = html.replace("{{metaDescription}}", meta_description)
-    html = html.replace("{{pageTitle}}", page_title)
-    # Block tags (multi-line content that needs indentation)
-    html = replace_indented(html, "{{ogTags}}", og_tags)
-    html = replace_indented(html, "{{extraHead}}", extra_head)
-    html = replace_indented(html, "{{navbar}}", navbar_html)
-    html = replace_indented(html, "{{bodyContent}}", body_content)
-    html = replace_indented(html, "{{footer}}", footer_html)
-    # Path prefix (inline, applied last, must be after all other replacements
-    # since injected content like extra_head may contain {{basePath}} references)
-    html = html.replace("{{basePath}}", base_path)
-    return html
-
-
-def write_file(filepath, content):
-    """Write content to a file only when it differs from the existing version.
+def render_inline_styles(stylesheet, page_html, base_path=""):
+    """Return the ``<style>`` block holding the stylesheet rules a page uses.
 
-    If MINIFY is enabled and the file is HTML, minify before comparing.
-    Files that are actually written are recorded in CHANGED_FILES so that
-    build_sitemap can update only the dates that need changing.
+    ``stylesheet`` is the dict built by build_site(): the parsed ``rules``, a
+    ``safelist`` of class and id names the site scripts may add at runtime
+    and whether the full sheet is also ``external``.  In that case a
+    non-blocking link to css/styles.css follows the inline styles.
+    """
+    used = collect_page_names(page_html, stylesheet["safelist"])
+    css = prune_stylesheet(stylesheet["rules"], used)
+    # Font URLs in the CSS are relative to css/styles.css (../fonts/).
+    # When inlined into HTML, they must be relative to the page itself.
+    css = css.replace("../fonts/", f"{base_path}fonts/")
+    block = f"<style>{css}</style>"
+    if stylesheet["external"]:
+        href = f"{base_path}css/styles.css"
+        block += (
+            f'\n<link rel="preload" href="{href}" as="style" '
+            f'onload="this.onload=null;this.rel=\'stylesheet\'">'
+            f'\n<noscript><link rel="stylesheet" href="{href}"></noscript>'
+        )
+    return block
+
+
+def wrap_in_base(base_template, navbar_template, footer_template, stylesheet,
+                 body_content, page_title, meta_description="",
+                 meta_keywords=DEFAULT_KEYWORDS, og_tags="", base_path="", extra_head=""):
+    """Wrap body content in the compiled base HTML template.
+
+    The navbar and footer are compiled templates rendered with ``base_path``.
+    ``body_content`` and ``extra_head`` are inserted as-is, so any
+    ``{{basePath}}`` tokens in them must already be resolved by the caller.
+    The inlined styles are pruned to the rules this page's markup can use.
+    """
+    values = {
+        # Inline tags (single-line values)
+        "metaKeywords": meta_keywords,
+        "metaDescription": meta_description,
+        "pageTitle": page_title,
+        "basePath": base_path,
+        # Block tags (multi-line content that gets indented to the tag's level)
+        "ogTags": og_tags,
+        "extraHead": extra_head,
+        "navbar": render_template(navbar_template, {"basePath": base_path}),
+        "bodyContent": body_content,
+        "footer": render_template(footer_template, {"basePath": base_path}),
+    }
+    page_html = "".join(
+        [part for part in base_template if part.__class__ is str]
+        + [values["extraHead"], values["navbar"], body_content, values["footer"]]
+    )
+    values["inlineStyles"] = render_inline_styles(stylesheet, page_html, base_path)
+    return render_template(base_template, values)
+
+
+def emit_file(filepath, content, entry=None, minify=False, asset_names=None, salt="", rename_js=False):
+    """Write an output file, finishing its content, only when it changed.
+
+    Asset references in HTML and CSS files are pointed at their fingerprinted
+    copies, and HTML is minified when ``minify`` is set (inline scripts with
+    local renaming when ``rename_js`` is set too).  ``entry`` is the
+    file's build manifest entry from the last build.  While the file still
+    has the size and mtime recorded there, it is never read back: if the
+    content to finish hashes the same as last time (``salt`` is mixed into
+    that hash, so builder changes count), even minification is skipped,
+    and otherwise the SHA-256 of the finished content is compared with the
+    recorded one.  A file whose stats don't match (edited by hand, fresh
+    checkout, no entry yet) is hashed once from disk instead, which heals
+    its entry.
+
+    Doesn't touch any build state, so it is safe to call from worker
+    processes.  Returns whether the file was written, the SHA-256 of its
+    content and the hash of the unfinished content, for record_output.
     """
-    if MINIFY and filepath.endswith(".html"):
-        content = minify_html(content)
+    if filepath.endswith((".html", ".css")):
+        content = fingerprint_references(content, filepath, asset_names)
+    minify = minify and filepath.endswith(".html")
+    source = input_key(salt, minify, content)
+    known = matches_entry(filepath, entry)
+    if known and entry.get("source") == source and entry.get("sha256"):
+        return False, entry["sha256"], source
+
+    if minify:
+        content = minify_html(content, rename_js)
+    data = content.encode("utf-8")
+    digest = hashlib.sha256(data).hexdigest()
+    if known:
+        unchanged = entry.get("sha256") == digest
+    else:
+        try:
+            unchanged = os.path.getsize(filepath) == len(data)
+        except OSError:
+            unchanged = False
+        if unchanged:
+            with open(filepath, "rb") as f:
+                unchanged = hashlib.sha256(f.read()).hexdigest() == digest
+            count_io(read=len(data))
+    if unchanged:
+        return False, digest, source
+
     os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    with open(filepath, "wb") as f:
+        f.write(data)
+    return True, digest, source
 
+
+def report_write(filepath, changed, key=None, digest=None, source=None):
+    """Log the outcome of emit_file and update the build state.
+
+    Files that were actually written are recorded in CHANGED_FILES so that
+    build_sitemap can update only the dates that need changing.  Written
+    content hashes and the input key, when given, are stored in the build
+    manifest, so that the next build can recognise the file as unchanged
+    without reading it and the next incremental build can skip it entirely.
+    """
     rel_path = os.path.relpath(filepath, ROOT_DIR)
+    if changed:
+        CHANGED_FILES.add(rel_path.replace("\\", "/"))
+        print(f"  Built: {rel_path}")
+        if PROFILE is not None:
+            count_io(written=os.path.getsize(filepath))
+    else:
+        print(f"  Unchanged: {rel_path}")
+    if key or digest:
+        record_output(filepath, key, digest, source)
+
 
-    # Skip writing if the file already exists with identical content.
-    if os.path.exists(filepath):
-        with open(filepath, "r", encoding="utf-8") as f:
-            if f.read() == content:
-                print(f"  Unchanged: {rel_path}")
-                return
+def write_file(filepath, content, key=None):
+    """Write content to a file only when it differs from the existing version.
 
-    with open(filepath, "w", encoding="utf-8") as f:
-        f.write(content)
-    CHANGED_FILES.add(rel_path.replace("\\", "/"))
-    print(f"  Built: {rel_path}")
+    Asset references in HTML and CSS files point at their fingerprinted
+    copies (see ASSET_NAMES).  If MINIFY is enabled and the file is HTML,
+    it is minified unless the build manifest shows it is unchanged.
+    """
+    entry = BUILD_MANIFEST["outputs"].get(output_rel_path(filepath))
+    changed, digest, source = emit_file(filepath, content, entry, MINIFY, ASSET_NAMES, SOURCE_KEY, RENAME_JS)
+    report_write(filepath, changed, key, digest, source)
 
 
 # ------------------------------------------------------------------------------------
@@ -392,31 +2030,133 @@ def collect_site_paths(category_data, include_hashes=False):
     return paths
 
 
-def build_frontpage(base_template, navbar_html, footer_html,
-                    contact_html, frontpage_content, category_data):
-    """Build index.html from frontpage.html and category JSON data."""
+def normalize_site_path(path):
+    """Normalize a path the way the 404 page does before comparing paths."""
+    path = path.lower()
+    if path.endswith("/index.html"):
+        path = path[:-len("index.html")]
+    return path.removesuffix("/") or "/"
+
+
+def slugify(text):
+    """Turn a title or alias into a lowercase, dash-separated path segment."""
+    return re.sub(r'[^a-z0-9]+', '-', text.lower().replace("'", "")).strip("-")
+
+
+def levenshtein(a, b):
+    """Return the edit distance between two strings."""
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(previous[j - 1] if char_a == char_b
+                           else 1 + min(previous[j], current[j - 1], previous[j - 1]))
+        previous = current
+    return previous[-1]
+
+
+def build_bk_tree(keys):
+    """Build a BK-tree over ``keys`` under the Levenshtein distance.
+
+    A node is ``[key_index]`` or ``[key_index, [[distance, child], ...]]``,
+    where every key in a child's subtree is ``distance`` away from the
+    node's key.  A search for keys within ``t`` of a query only needs to
+    descend into children whose distance is within ``t`` of the query's
+    distance to the node.  Returns None if there are no keys.
+    """
+    if not keys:
+        return None
+    root = [0]
+    for index in range(1, len(keys)):
+        node = root
+        while True:
+            distance = levenshtein(keys[index], keys[node[0]])
+            if len(node) == 1:
+                node.append([])
+            child = next((edge[1] for edge in node[1] if edge[0] == distance), None)
+            if child is None:
+                node[1].append([distance, [index]])
+                break
+            node = child
+    return root
+
+
+def build_404_index(site_paths, category_data):
+    """Build the search index the 404 page uses to suggest a page.
+
+    Besides the site paths themselves, every hosted demo can be found by
+    its folder or title, with or without the ``/demo/`` prefix, and by any
+    ``aliases`` listed in its JSON entry.  Keys are normalized like the
+    page normalizes the requested path.  ``targets`` maps every key to the
+    path it leads to, and ``tree`` is a BK-tree over the keys (see
+    build_bk_tree).
+    """
+    entries = [(normalize_site_path(path), path) for path in site_paths]
+    for cat_name in CATEGORIES:
+        for demo in category_data.get(cat_name, {}).get("demos", []):
+            folder = demo.get("folder")
+            if is_external(demo) or not folder:
+                continue
+            path = f"/demo/{folder}/"
+            names = [folder, slugify(demo.get("title", ""))]
+            names += [slugify(alias) for alias in demo.get("aliases", [])]
+            for name in names:
+                if name:
+                    entries += [(f"/demo/{name}", path), (f"/{name}", path)]
+
+    keys = []
+    targets = []
+    seen = set()
+    for key, path in entries:
+        if key not in seen:
+            seen.add(key)
+            keys.append(key)
+            targets.append(site_paths.index(path))
+    return {"paths": site_paths, "keys": keys, "targets": targets, "tree": build_bk_tree(keys)}
+
+
+def build_frontpage(shell, contact_html, frontpage_content, category_data):
+    """Build index.html from frontpage.html and category JSON data.
+
+    ``shell`` is the (base, navbar, footer) tuple of compiled templates plus
+    the parsed stylesheet.
+    """
     card_template = load_file("card.html")
     section_template = load_file("section.html")
+    frontpage_data = load_json("frontpage.json")
 
-    content = frontpage_content
-
-    # Replace snippet tags (indented to match their position in the template)
-    content = replace_indented(content, "{{contact}}", contact_html)
+    output_path = os.path.join(OUTPUT_DIR, "index.html")
+    key = input_key(
+        SITE_KEY, card_template, section_template, contact_html,
+        frontpage_content, frontpage_data, category_data, CARD_IMAGES,
+    )
+    if is_current(output_path, key):
+        return
 
-    # Replace category tags with generated section HTML
+    # Snippet tags are indented to match their position in the template.
+    values = {"contact": contact_html}
+
+    # Category tags are filled with generated section HTML.  Only the first
+    # section with cards has cards above the fold, and its first card image
+    # is the likely LCP element.
+    card_template = compile_template(card_template)
+    section_template = compile_template(section_template)
+    first_section = next((c for c in CATEGORIES if category_data.get(c, {}).get("demos")), None)
+    extra_head = ""
+    if first_section:
+        extra_head = card_image_preload(card_image_paths(category_data[first_section]["demos"][0])[0])
     for cat_name in CATEGORIES:
-        tag = "{{" + cat_name + "}}"
         if cat_name in category_data:
-            section = generate_section(
+            values[cat_name] = generate_section(
                 cat_name, category_data[cat_name],
                 card_template, section_template,
+                EAGER_CARDS if cat_name == first_section else 0,
             )
-            content = replace_indented(content, tag, section)
         else:
-            content = content.replace(tag, "")
+            values[cat_name] = ""
+    content = render_template(compile_template(frontpage_content), values)
 
     # Wrap in base template
-    frontpage_data = load_json("frontpage.json")
     page_title = frontpage_data.get("pageTitle", "")
     meta_desc = frontpage_data.get("metaDescription", "")
     meta_kw = frontpage_data.get("metaKeywords", DEFAULT_KEYWORDS)
@@ -424,26 +2164,32 @@ def build_frontpage(base_template, navbar_html, footer_html,
         frontpage_data.get("seo"), url=f"{SITE_BASE_URL}/"
     )
     page = wrap_in_base(
-        base_template, navbar_html, footer_html,
+        *shell,
         body_content=content,
         page_title=page_title,
         meta_description=meta_desc,
         meta_keywords=meta_kw,
         og_tags=og_tags,
+        extra_head=extra_head,
     )
 
-    write_file(os.path.join(OUTPUT_DIR, "index.html"), page)
+    write_file(output_path, page, key)
 
 
-def build_404(base_template, navbar_html, footer_html, four04_template,
-              valid_paths=None):
-    """Build 404.html, injecting the valid paths list for fuzzy redirect."""
-    body = four04_template
-    paths_json = json.dumps(valid_paths) if valid_paths else "[]"
-    body = body.replace("{{validPaths}}", paths_json)
+def build_404(shell, four04_template, search_index):
+    """Build 404.html, injecting the search index (see build_404_index) for fuzzy redirect."""
+    output_path = os.path.join(OUTPUT_DIR, "404.html")
+    key = input_key(SITE_KEY, four04_template, search_index)
+    if is_current(output_path, key):
+        return
+
+    body = render_template(compile_template(four04_template), {
+        "searchIndex": json.dumps(search_index, separators=(",", ":")),
+        "basePath": "/",
+    })
 
     page = wrap_in_base(
-        base_template, navbar_html, footer_html,
+        *shell,
         body_content=body,
         page_title="XeduR - 404",
         meta_description=(
@@ -453,15 +2199,86 @@ def build_404(base_template, navbar_html, footer_html, four04_template,
         base_path="/",
     )
 
-    write_file(os.path.join(OUTPUT_DIR, "404.html"), page)
+    write_file(output_path, page, key)
 
 
-def build_demo_pages(base_template, navbar_html, footer_html,
-                     demo_template, iframe_template, category_data):
-    """Build individual demo pages for all non-external demos."""
+def render_demo_page(shell, demo_template, repo_panel_template,
+                     repo_private_template, demo):
+    """Render the demo/<folder>/index.html page for a single regular demo."""
+    folder = demo["folder"]
+    title = demo.get("title", "")
+    desc_short = demo.get("descriptionShort", "")
+    desc_long = demo.get("descriptionLong") or desc_short
+    repository = demo.get("repository")
+    seo = demo.get("seo")
+
+    # Build demo page body from template
+    base_path = "../../"
+    body = render_template(demo_template, {
+        "demoTitle": title,
+        "demoImage": f"{folder}-large.jpg",
+        "demoDescriptionLong": desc_long,
+        "demoRepository": generate_repo_panel(
+            repository, repo_panel_template, repo_private_template, base_path,
+        ),
+        "basePath": base_path,
+    })
+    # Determine meta description and OG tags.
+    meta_desc = desc_short
+    demo_url = f"{SITE_BASE_URL}/demo/{folder}/"
+    demo_seo = dict(seo) if seo else {}
+    if seo:
+        meta_desc = seo.get("metaDescription") or desc_short
+    demo_seo["ogImage"] = f"{SITE_BASE_URL}/demo/{folder}/{folder}-large.jpg"
+    og_tags = generate_social_tags(demo_seo, url=demo_url)
+
+    # Wrap in base template
+    return wrap_in_base(
+        *shell,
+        body_content=body,
+        page_title=f"XeduR - {title}",
+        meta_description=meta_desc,
+        og_tags=og_tags,
+        base_path=base_path,
+    )
+
+
+def render_iframe_page(iframe_template, title, desc_short, bin_name, split):
+    """Render the app/index.html iframe loader for a single regular demo.
+
+    ``split`` holds the names of the archive's split .js/.wasm files (empty
+    strings if it has none, which makes the loader use the .bin).
+    """
+    js_name, wasm_name = split
+    return render_template(iframe_template, {
+        "demoTitle": title,
+        "demoBinName": bin_name,
+        "demoJsFile": js_name,
+        "demoWasmFile": wasm_name,
+        "demoDescription": desc_short,
+    })
+
+
+def plan_demo_pages(shell, demo_template, iframe_template, category_data):
+    """Plan the demo page and iframe loader jobs for all regular demos.
+
+    With --split-bins, each demo's .bin is split into hashed .js/.wasm
+    files for its loader first (see split_demo_bin).  Without it, split
+    files left by earlier builds are removed.  Returns a list of page jobs for
+    render_pages().  Pages that are current in incremental mode are left out.
+    """
     repo_panel_template = load_file("repo-panel.html")
     repo_private_template = load_file("repo-panel-private.html")
-
+    try:
+        with open(DEMO_SPLIT_CACHE_FILE, "r", encoding="utf-8") as f:
+            stored_splits = json.load(f)
+    except (OSError, ValueError):
+        stored_splits = {}
+    # split_demo_bin updates the cache in place, so compare against a copy.
+    split_cache = dict(stored_splits)
+    live_splits = {}
+
+    jobs = []
     for cat_name in CATEGORIES:
         if cat_name not in category_data:
             continue
@@ -475,43 +2292,19 @@ def build_demo_pages(base_template, navbar_html, footer_html,
             if not folder:
                 continue
 
-            title = demo.get("title", "")
-            desc_short = demo.get("descriptionShort", "")
-            desc_long = demo.get("descriptionLong") or desc_short
-            repository = demo.get("repository")
-            seo = demo.get("seo")
-
-            # Build demo page body from template
-            body = demo_template
-            body = body.replace("{{demoTitle}}", title)
-            body = body.replace("{{demoImage}}", f"{folder}-large.jpg")
-            body = body.replace("{{demoDescriptionLong}}", desc_long)
-            body = replace_indented(
-                body, "{{demoRepository}}",
-                generate_repo_panel(repository, repo_panel_template, repo_private_template),
-            )
-            # Determine meta description and OG tags.
-            meta_desc = desc_short
-            demo_url = f"{SITE_BASE_URL}/demo/{folder}/"
-            demo_seo = dict(seo) if seo else {}
-            if seo:
-                meta_desc = seo.get("metaDescription") or desc_short
-            demo_seo["ogImage"] = f"{SITE_BASE_URL}/demo/{folder}/{folder}-large.jpg"
-            og_tags = generate_social_tags(demo_seo, url=demo_url)
-
-            # Wrap in base template
-            page = wrap_in_base(
-                base_template, navbar_html, footer_html,
-                body_content=body,
-                page_title=f"XeduR - {title}",
-                meta_description=meta_desc,
-                og_tags=og_tags,
-                base_path="../../",
-            )
-
-            # Write demo page under demo/ subfolder
+            # Demo page under demo/ subfolder
             demo_dir = os.path.join(OUTPUT_DIR, "demo", folder)
-            write_file(os.path.join(demo_dir, "index.html"), page)
+            page_path = os.path.join(demo_dir, "index.html")
+            key = input_key(
+                SITE_KEY, demo_template, repo_panel_template,
+                repo_private_template, demo,
+            )
+            if not is_current(page_path, key):
+                jobs.append((page_path, key, render_demo_page, (
+                    shell, compile_template(demo_template),
+                    compile_template(repo_panel_template),
+                    compile_template(repo_private_template), demo,
+                )))
 
             # Scan app/ folder for the .bin file
             app_dir = os.path.join(demo_dir, "app")
@@ -524,16 +2317,34 @@ def build_demo_pages(base_template, navbar_html, footer_html,
                 print(f"  WARNING: Multiple .bin files in demo/{folder}/app/: {bin_files}")
 
             bin_name = bin_files[0].removesuffix(".bin")
+            title = demo.get("title", "")
+            desc_short = demo.get("descriptionShort", "")
+            bin_path = os.path.join(app_dir, bin_files[0])
+            if SPLIT_BINS:
+                split = split_demo_bin(bin_path, split_cache)
+                live_splits[output_rel_path(bin_path)] = split_cache[output_rel_path(bin_path)]
+            else:
+                split = ("", "")
+                remove_split_files(app_dir)
+
+            # The loader doesn't use the base template, so SITE_KEY isn't needed here.
+            iframe_path = os.path.join(app_dir, "index.html")
+            key = input_key(SOURCE_KEY, MINIFY, iframe_template, title, desc_short, bin_name, split)
+            if not is_current(iframe_path, key):
+                jobs.append((iframe_path, key, render_iframe_page, (
+                    compile_template(iframe_template), title, desc_short, bin_name, split,
+                )))
+
+    if live_splits != stored_splits:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(DEMO_SPLIT_CACHE_FILE, "w", encoding="utf-8") as f:
+            json.dump(live_splits, f, indent=1, sort_keys=True)
+            f.write("\n")
 
-            # Create app/ subfolder with iframe loader
-            iframe_html = iframe_template.replace("{{demoTitle}}", title)
-            iframe_html = iframe_html.replace("{{demoBinName}}", bin_name)
-            iframe_html = iframe_html.replace("{{demoDescription}}", desc_short)
-            write_file(os.path.join(demo_dir, "app", "index.html"), iframe_html)
+    return jobs
 
 
-def build_demo_index(base_template, navbar_html, footer_html,
-                     demo_index_template, category_data):
+def build_demo_index(shell, demo_index_template, category_data):
     """Build demo/index.html with a simple list of all available demos."""
     items = []
     for cat_name in CATEGORIES:
@@ -547,10 +2358,18 @@ def build_demo_index(base_template, navbar_html, footer_html,
             if folder:
                 items.append(f'<li><a href="{folder}/">{title}</a></li>')
 
-    body = replace_indented(demo_index_template, "{{demoList}}", "\n".join(items))
+    output_path = os.path.join(OUTPUT_DIR, "demo", "index.html")
+    key = input_key(SITE_KEY, demo_index_template, items)
+    if is_current(output_path, key):
+        return
+
+    body = render_template(compile_template(demo_index_template), {
+        "demoList": "\n".join(items),
+        "basePath": "../",
+    })
 
     page = wrap_in_base(
-        base_template, navbar_html, footer_html,
+        *shell,
         body_content=body,
         page_title="XeduR - Demos",
         meta_description="List of all demos on XeduR.com.",
@@ -558,16 +2377,44 @@ def build_demo_index(base_template, navbar_html, footer_html,
         extra_head='<meta name="robots" content="noindex">',
     )
 
-    write_file(os.path.join(OUTPUT_DIR, "demo", "index.html"), page)
+    write_file(output_path, page, key)
+
+
+def render_standalone_page(shell, folder, body_content, extra_head, config, demo):
+    """Render the demo/<folder>/index.html page for a single standalone project."""
+    title = config.get("title", demo.get("title", ""))
+    meta_desc = config.get("metaDescription", demo.get("descriptionShort", ""))
+    meta_keywords = config.get("metaKeywords", DEFAULT_KEYWORDS)
+
+    demo_url = f"{SITE_BASE_URL}/demo/{folder}/"
+    standalone_seo = dict(config.get("seo", {}))
+    standalone_seo["ogImage"] = f"{SITE_BASE_URL}/demo/{folder}/{folder}-large.jpg"
+    og_tags = generate_social_tags(standalone_seo, url=demo_url)
+
+    # The output lives at demo/<folder>/index.html, which is 2 levels
+    # below site root, same as regular demo pages.
+    base_path = "../../"
+    return wrap_in_base(
+        *shell,
+        body_content=render_template(body_content, {"basePath": base_path}),
+        page_title=f"XeduR - {title}",
+        meta_description=meta_desc,
+        meta_keywords=meta_keywords,
+        og_tags=og_tags,
+        base_path=base_path,
+        extra_head=render_template(extra_head, {"basePath": base_path}),
+    )
 
 
-def build_standalone_pages(base_template, navbar_html, footer_html, category_data):
-    """Build pages for standalone projects that use their own content templates.
+def plan_standalone_pages(shell, category_data):
+    """Plan page jobs for standalone projects that use their own content templates.
 
     Standalone projects are identified by ``"type": "standalone"`` in their
     JSON data entry.  Source files (content.html, head.html, config.json) are
-    read from tools/standalone/<folder>/.
+    read from tools/standalone/<folder>/ here, so the render step itself
+    doesn't touch the disk.
     """
+    jobs = []
     for cat_name in CATEGORIES:
         if cat_name not in category_data:
             continue
@@ -590,43 +2437,69 @@ def build_standalone_pages(base_template, navbar_html, footer_html, category_dat
             head_path = os.path.join(standalone_dir, "head.html")
             config_path = os.path.join(standalone_dir, "config.json")
 
-            with open(content_path, "r", encoding="utf-8") as f:
-                body_content = f.read()
+            body_content = read_source(content_path)
 
             extra_head = ""
             if os.path.exists(head_path):
-                with open(head_path, "r", encoding="utf-8") as f:
-                    extra_head = f.read()
+                extra_head = read_source(head_path)
 
             config = {}
             if os.path.exists(config_path):
-                with open(config_path, "r", encoding="utf-8") as f:
-                    config = json.load(f)
-
-            title = config.get("title", demo.get("title", ""))
-            meta_desc = config.get("metaDescription", demo.get("descriptionShort", ""))
-            meta_keywords = config.get("metaKeywords", DEFAULT_KEYWORDS)
-
-            demo_url = f"{SITE_BASE_URL}/demo/{folder}/"
-            standalone_seo = dict(config.get("seo", {}))
-            standalone_seo["ogImage"] = f"{SITE_BASE_URL}/demo/{folder}/{folder}-large.jpg"
-            og_tags = generate_social_tags(standalone_seo, url=demo_url)
-
-            # The output lives at demo/<folder>/index.html, which is 2 levels
-            # below site root, same as regular demo pages.
-            page = wrap_in_base(
-                base_template, navbar_html, footer_html,
-                body_content=body_content,
-                page_title=f"XeduR - {title}",
-                meta_description=meta_desc,
-                meta_keywords=meta_keywords,
-                og_tags=og_tags,
-                base_path="../../",
-                extra_head=extra_head,
-            )
+                config = json.loads(read_source(config_path))
 
-            demo_dir = os.path.join(OUTPUT_DIR, "demo", folder)
-            write_file(os.path.join(demo_dir, "index.html"), page)
+            page_path = os.path.join(OUTPUT_DIR, "demo", folder, "index.html")
+            key = input_key(SITE_KEY, body_content, extra_head, config, demo)
+            if not is_current(page_path, key):
+                jobs.append((page_path, key, render_standalone_page, (
+                    shell, folder, compile_template(body_content),
+                    compile_template(extra_head), config, demo,
+                )))
+
+    return jobs
+
+
+def render_page_job(job, entry, minify, asset_names, salt, rename_js):
+    """Render, optionally minify and write a single page job.
+
+    Runs inside a worker process, so it takes the page's manifest entry,
+    the minify flags, the asset names and the builder hash as arguments
+    instead of reading BUILD_MANIFEST, MINIFY, RENAME_JS, ASSET_NAMES and
+    SOURCE_KEY.
+    Returns the job's output path, emit_file's result and the job's start
+    time, wall time, CPU time and process id for --profile.
+    """
+    start, cpu = time.perf_counter(), time.process_time()
+    filepath, _, render, args = job
+    result = emit_file(filepath, render(*args), entry, minify, asset_names, salt, rename_js)
+    return filepath, result, (start, time.perf_counter() - start, time.process_time() - cpu, os.getpid())
+
+
+def render_pages(jobs, workers=None):
+    """Render planned page jobs, spreading them across a process pool.
+
+    Results are reported in plan order regardless of which worker finishes
+    first, so the build log and CHANGED_FILES are the same as a serial build.
+    With one worker (or a single job) everything runs in this process.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(jobs))
+
+    entries = [BUILD_MANIFEST["outputs"].get(output_rel_path(job[0])) for job in jobs]
+    if workers <= 1:
+        results = [render_page_job(job, entry, MINIFY, ASSET_NAMES, SOURCE_KEY, RENAME_JS)
+                   for job, entry in zip(jobs, entries)]
+    else:
+        count = len(jobs)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(render_page_job, jobs, entries, [MINIFY] * count,
+                                    [ASSET_NAMES] * count, [SOURCE_KEY] * count,
+                                    [RENAME_JS] * count))
+
+    for job, (filepath, (changed, digest, source), timing) in zip(jobs, results):
+        report_write(filepath, changed, job[1], digest, source)
+        if PROFILE is not None:
+            profile_page(filepath, changed, timing)
 
 
 def check_images(category_data):
@@ -663,21 +2536,90 @@ def check_images(category_data):
             print(f"    - {m}")
 
 
+def scan_files(directory):
+    """Yield a DirEntry for every file below directory, in sorted order."""
+    try:
+        entries = sorted(os.scandir(directory), key=lambda entry: entry.name)
+    except OSError:
+        return
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            yield from scan_files(entry.path)
+        elif entry.is_file():
+            yield entry
+
+
+def hash_file(path, chunk_size=1 << 20):
+    """Return the SHA-256 of a file, read in chunks so large demo data isn't loaded at once."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+        count_io(read=f.tell())
+    return h.hexdigest()
+
+
+def fingerprint_files(directories, generated, hash_cache):
+    """Return ``{path: [size, sha256]}`` for the files below the given directories.
+
+    Paths are forward-slash paths relative to ROOT_DIR.  Files listed in
+    ``generated`` and the .gz/.br siblings written by --compress are skipped.
+    File hashes are reused from ``hash_cache`` (path -> [inode, size,
+    mtime_ns, sha256]) while a file's stats are unchanged, so an unchanged
+    tree is fingerprinted with stat calls only.  New hashes are added to the
+    cache in place.
+    """
+    fingerprint = {}
+    for directory in directories:
+        for entry in scan_files(directory):
+            rel_path = output_rel_path(entry.path)
+            if rel_path in generated:
+                continue
+            if entry.name.endswith((".gz", ".br")) and os.path.exists(entry.path[:-3]):
+                continue
+            st = entry.stat()
+            stamp = [st.st_ino, st.st_size, st.st_mtime_ns]
+            cached = hash_cache.get(rel_path)
+            if cached and cached[:3] == stamp:
+                digest = cached[3]
+            else:
+                digest = hash_file(entry.path)
+                hash_cache[rel_path] = stamp + [digest]
+            fingerprint[rel_path] = [st.st_size, digest]
+    return fingerprint
+
+
 def check_demo_assets(category_data):
     """Detect non-generated asset changes in demo and standalone directories.
 
-    For regular demos, scans ``demo/<folder>/app/`` (excluding the generated
-    ``index.html``).  For standalone pages, scans both the output directory
-    ``demo/<folder>/`` and the source directory ``tools/standalone/<folder>/``.
-
-    Any demo whose assets were modified after its stored sitemap date is
-    added to CHANGED_FILES so that build_sitemap bumps the lastmod.
+    For regular demos, fingerprints ``demo/<folder>/app/`` (excluding the
+    generated ``index.html`` and the files split from the .bin).  For standalone pages, fingerprints both the
+    output directory ``demo/<folder>/`` and the source directory
+    ``tools/standalone/<folder>/``.
+
+    A fingerprint lists every file with its size and content hash.  The
+    fingerprints are stored in components/data/asset_fingerprints.json, so
+    they survive checkouts that reset mtimes, and any demo whose fingerprint
+    differs from the stored one is added to CHANGED_FILES so that
+    build_sitemap bumps the lastmod.  Returns the fingerprints, keyed by
+    page path.
     """
     existing_dates = {}
     if os.path.exists(SITEMAP_DATES_FILE):
         with open(SITEMAP_DATES_FILE, "r", encoding="utf-8") as f:
             existing_dates = json.load(f)
 
+    stored = {}
+    if os.path.exists(ASSET_FINGERPRINTS_FILE):
+        with open(ASSET_FINGERPRINTS_FILE, "r", encoding="utf-8") as f:
+            stored = json.load(f)
+    try:
+        with open(ASSET_HASH_CACHE_FILE, "r", encoding="utf-8") as f:
+            hash_cache = json.load(f)
+    except (OSError, ValueError):
+        hash_cache = {}
+
+    fingerprints = {}
     for cat_name in CATEGORIES:
         if cat_name not in category_data:
             continue
@@ -690,56 +2632,45 @@ def check_demo_assets(category_data):
             if not folder:
                 continue
 
+            # Collect directories to fingerprint and generated files to skip.
             sitemap_path = f"/demo/{folder}/"
-            stored_date = existing_dates.get(sitemap_path)
-            if not stored_date:
-                continue  # New page — build_sitemap assigns today's date.
-
             output_file = f"demo/{folder}/index.html"
-            if output_file in CHANGED_FILES:
-                continue  # Already marked changed by the build step.
-
-            stored_date_obj = date.fromisoformat(stored_date)
-
-            # Collect directories to scan and generated files to skip.
             dirs_to_scan = []
             generated = {output_file}
 
             if is_standalone(demo):
                 dirs_to_scan.append(os.path.join(OUTPUT_DIR, "demo", folder))
-                standalone_src = os.path.join(STANDALONE_DIR, folder)
-                if os.path.isdir(standalone_src):
-                    dirs_to_scan.append(standalone_src)
+                dirs_to_scan.append(os.path.join(STANDALONE_DIR, folder))
             else:
                 app_dir = os.path.join(OUTPUT_DIR, "demo", folder, "app")
-                if os.path.isdir(app_dir):
-                    dirs_to_scan.append(app_dir)
+                dirs_to_scan.append(app_dir)
                 generated.add(f"demo/{folder}/app/index.html")
+                generated.update(f"demo/{folder}/app/{name}" for name in demo_split_files(app_dir))
 
-            # Walk directories looking for any file newer than the stored date.
-            asset_changed = False
-            for scan_dir in dirs_to_scan:
-                if not os.path.isdir(scan_dir):
-                    continue
-                for dirpath, _, filenames in os.walk(scan_dir):
-                    for fname in filenames:
-                        fpath = os.path.join(dirpath, fname)
-                        rel = os.path.relpath(fpath, ROOT_DIR).replace("\\", "/")
-                        if rel in generated:
-                            continue
-                        mtime = date.fromtimestamp(os.path.getmtime(fpath))
-                        if mtime > stored_date_obj:
-                            asset_changed = True
-                            break
-                    if asset_changed:
-                        break
-                if asset_changed:
-                    break
+            fingerprint = fingerprint_files(dirs_to_scan, generated, hash_cache)
+            fingerprints[sitemap_path] = fingerprint
 
-            if asset_changed:
+            if not existing_dates.get(sitemap_path):
+                continue  # New page — build_sitemap assigns today's date.
+            if output_file in CHANGED_FILES:
+                continue  # Already marked changed by the build step.
+            if sitemap_path in stored and stored[sitemap_path] != fingerprint:
                 CHANGED_FILES.add(output_file)
                 print(f"  Asset changed: demo/{folder}/")
 
+    if fingerprints != stored:
+        with open(ASSET_FINGERPRINTS_FILE, "w", encoding="utf-8") as f:
+            json.dump(fingerprints, f, indent=4, sort_keys=True)
+            f.write("\n")
+
+    # Only keep cache entries for files that still exist.
+    live = {path for fingerprint in fingerprints.values() for path in fingerprint}
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(ASSET_HASH_CACHE_FILE, "w", encoding="utf-8") as f:
+        json.dump({path: hash_cache[path] for path in sorted(live)}, f)
+        f.write("\n")
+    return fingerprints
+
 
 def build_sitemap(site_paths):
     """Generate sitemap.xml, updating lastmod only for pages whose content changed.
@@ -797,100 +2728,1247 @@ def build_sitemap(site_paths):
 # ------------------------------------------------------------------------------------
 # Static assets (CSS / JS)
 
-def build_static_assets():
+def build_static_assets(css_content=None, hash_assets=False):
     """Copy JS source files from tools/ into the site root.
 
-    CSS is inlined into the HTML templates, so only JS files are copied.
-    When MINIFY is enabled the files are minified before writing.
+    CSS is inlined into the pages, so the stylesheet is only written to
+    css/styles.css when ``css_content`` is given (``--external-css``).
+    When MINIFY is enabled the files are minified before writing.  With
+    ``hash_assets`` the js/, fonts/ and img/ files also get fingerprinted
+    copies; the returned dict maps logical names to them (empty otherwise).
+    """
+    if os.path.isdir(JS_SRC_DIR):
+        out_dir = os.path.join(OUTPUT_DIR, "js")
+        for filename in sorted(os.listdir(JS_SRC_DIR)):
+            src_path = os.path.join(JS_SRC_DIR, filename)
+            if not os.path.isfile(src_path):
+                continue
+            content = read_source(src_path)
+            out_path = os.path.join(out_dir, filename)
+            key = input_key(SOURCE_KEY, MINIFY, content)
+            if is_current(out_path, key):
+                continue
+            if MINIFY:
+                content = minify_js(content, RENAME_JS)
+            write_file(out_path, content, key)
+
+    asset_names = build_asset_fingerprints() if hash_assets else {}
+
+    if css_content is not None:
+        out_path = os.path.join(OUTPUT_DIR, "css", "styles.css")
+        key = input_key(SOURCE_KEY, css_content, asset_names)
+        if not is_current(out_path, key):
+            # The font URLs inside are rewritten relative to css/.
+            content = fingerprint_references(css_content, out_path, asset_names)
+            write_file(out_path, content, key)
+    return asset_names
+
+
+# ------------------------------------------------------------------------------------
+# Fingerprinted assets
+#
+# With --hash-assets every file under js/, fonts/ and img/ gets a copy whose
+# name includes a hash of its content, and pages link to those copies.  The
+# files can then be served with long-lived immutable cache headers, since any
+# change to an asset also changes its URL.
+
+FINGERPRINT_RE = re.compile(r'^.+\.[0-9a-f]{8}\.\w+$')
+# A root-relative or relative js/, fonts/ or img/ path (possibly behind ../
+# segments) that isn't part of a longer path or an absolute URL.
+ASSET_REF_RE = re.compile(r'(?<![\w/.:-])(/?(?:\.\./)*(?:js|fonts|img)/[\w./-]*\w)')
+
+
+def build_asset_fingerprints():
+    """Write fingerprinted copies of the js/, fonts/ and img/ files.
+
+    A copy is named ``<name>.<hash>.<ext>`` after the first eight hex digits
+    of the SHA-256 of its content, so an existing copy never needs
+    rewriting.  Copies recorded in the previous asset-manifest.json that no
+    longer match any asset are removed; other files are never deleted, even
+    when their names look fingerprinted.  The name mapping is written to
+    asset-manifest.json and returned.
+    """
+    try:
+        with open(ASSET_MANIFEST_FILE, "r", encoding="utf-8") as f:
+            previous = set(json.load(f).values())
+    except (OSError, ValueError):
+        previous = set()
+
+    names = {}
+    for asset_dir in ASSET_DIRS:
+        for dirpath, dirnames, filenames in os.walk(os.path.join(OUTPUT_DIR, asset_dir)):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                if filename.startswith("."):
+                    continue
+                path = os.path.join(dirpath, filename)
+                # Skip the .gz/.br siblings written by --compress.
+                if filename.endswith((".gz", ".br")) and os.path.exists(path[:-3]):
+                    continue
+                if output_rel_path(path) in previous:
+                    continue
+                with open(path, "rb") as f:
+                    data = f.read()
+                count_io(read=len(data))
+                digest = hashlib.sha256(data).hexdigest()[:8]
+                stem, ext = os.path.splitext(filename)
+                # A copy whose name carries its own hash is one this function
+                # wrote, from a build whose manifest is gone.
+                if FINGERPRINT_RE.match(filename) and stem.endswith("." + digest):
+                    continue
+                hashed_path = os.path.join(dirpath, f"{stem}.{digest}{ext}")
+                if not os.path.exists(hashed_path):
+                    shutil.copyfile(path, hashed_path)
+                    report_write(hashed_path, True)
+                names[output_rel_path(path)] = output_rel_path(hashed_path)
+
+    current = set(names.values())
+    for rel_path in sorted(previous - current):
+        path = os.path.join(ROOT_DIR, rel_path.replace("/", os.sep))
+        if (rel_path.split("/")[0] in ASSET_DIRS and FINGERPRINT_RE.match(os.path.basename(path))
+                and os.path.isfile(path)):
+            os.remove(path)
+            print(f"  Removed stale asset: {rel_path}")
+
+    write_file(ASSET_MANIFEST_FILE, json.dumps(names, indent=2, sort_keys=True) + "\n")
+    return names
+
+
+def fingerprint_references(text, filepath, asset_names):
+    """Point the js/, fonts/ and img/ references in an output file at their
+    fingerprinted copies.
+
+    Relative references are resolved against ``filepath``, so
+    ``../../js/nav.js`` in demo/<folder>/index.html maps to the same asset as
+    ``js/nav.js`` in index.html (and ``/js/nav.js`` in 404.html).  Paths
+    without a fingerprinted copy are left alone.
+    """
+    if not asset_names:
+        return text
+    page_dir = posixpath.dirname(output_rel_path(filepath))
+
+    def replace(match):
+        ref = match.group(1)
+        logical = posixpath.normpath(posixpath.join(page_dir, ref)).lstrip("/")
+        hashed = asset_names.get(logical)
+        if hashed is None:
+            return ref
+        return ref[:ref.rfind("/") + 1] + posixpath.basename(hashed)
+
+    return ASSET_REF_RE.sub(replace, text)
+
+
+# ------------------------------------------------------------------------------------
+# Split demo archives
+
+def demo_split_files(app_dir):
+    """Return the names of the content-hashed .js/.wasm files in a demo's app/ folder."""
+    try:
+        filenames = sorted(os.listdir(app_dir))
+    except OSError:
+        return []
+    return [
+        filename for filename in filenames
+        if FINGERPRINT_RE.match(filename) and filename.endswith(DEMO_SPLIT_EXTENSIONS)
+    ]
+
+
+def remove_split_files(app_dir, keep=()):
+    """Remove the split files in a demo's app/ folder, except those named in keep."""
+    for filename in demo_split_files(app_dir):
+        if filename not in keep:
+            os.remove(os.path.join(app_dir, filename))
+            print(f"  Removed stale split file: {output_rel_path(os.path.join(app_dir, filename))}")
+
+
+def split_demo_bin(bin_path, cache):
+    """Unpack the .js and .wasm of a demo's .bin archive into content-hashed files.
+
+    The files are written next to the archive as ``<name>.<hash>.<ext>``,
+    hashed like the fingerprinted assets, so an existing file never needs
+    rewriting and browsers can cache it indefinitely.  Split files that no
+    longer match the archive are removed.  ``cache`` maps the archive path to
+    ``[size, mtime_ns, js_name, wasm_name]`` so that an unchanged archive isn't
+    decompressed again; it is updated in place.
+
+    Returns ``(js_name, wasm_name)``, or ``("", "")`` when the archive can't
+    be split, in which case the loader only uses the .bin.
     """
-    if not os.path.isdir(JS_SRC_DIR):
+    app_dir = os.path.dirname(bin_path)
+    rel_path = output_rel_path(bin_path)
+    st = os.stat(bin_path)
+    cached = cache.get(rel_path)
+    if (cached and cached[:2] == [st.st_size, st.st_mtime_ns]
+            and all(os.path.exists(os.path.join(app_dir, name)) for name in cached[2:])):
+        return tuple(cached[2:])
+
+    names = {}
+    try:
+        with zipfile.ZipFile(bin_path) as archive:
+            for member in archive.namelist():
+                stem, ext = os.path.splitext(member)
+                if ext not in DEMO_SPLIT_EXTENSIONS or ext in names or "/" in member:
+                    continue
+                data = archive.read(member)
+                names[ext] = f"{stem}.{hashlib.sha256(data).hexdigest()[:8]}{ext}"
+                split_path = os.path.join(app_dir, names[ext])
+                if not os.path.exists(split_path):
+                    # Write under a temporary name, so an interrupted build never
+                    # leaves a truncated file behind under a valid hashed name.
+                    with open(split_path + ".tmp", "wb") as f:
+                        f.write(data)
+                    os.replace(split_path + ".tmp", split_path)
+                    report_write(split_path, True)
+    except (OSError, zipfile.BadZipFile) as e:
+        print(f"  WARNING: Could not unpack {rel_path}: {e}")
+        names = {}
+    count_io(read=st.st_size)
+
+    split = tuple(names.get(ext, "") for ext in DEMO_SPLIT_EXTENSIONS)
+    if not all(split):
+        print(f"  WARNING: {rel_path} has no .js/.wasm pair to split, the loader will use the .bin")
+        split = ("", "")
+
+    remove_split_files(app_dir, keep=split)
+    cache[rel_path] = [st.st_size, st.st_mtime_ns, *split]
+    return split
+
+
+# ------------------------------------------------------------------------------------
+# Service worker
+
+def service_worker_manifest(css_content, demo_fingerprints):
+    """Return the precache and payload manifest embedded in sw.js.
+
+    ``precache`` maps the shell pages (see SW_SHELL_PAGES), the site scripts
+    and the fonts the stylesheet uses to the first eight hex digits of the
+    SHA-256 of their content, under the names the pages link to.
+    ``payloads`` maps the .bin/.data files and split .js/.wasm files of every
+    regular demo to ``[revision, size]``.  Their hashes come from
+    ``demo_fingerprints`` (as returned by check_demo_assets); split files
+    already carry theirs in the name.
+    """
+    def revision(rel_path):
+        return hash_file(os.path.join(OUTPUT_DIR, rel_path))[:8]
+
+    precache = {}
+    for url, rel_path in SW_SHELL_PAGES.items():
+        if os.path.exists(os.path.join(OUTPUT_DIR, rel_path)):
+            precache[url] = revision(rel_path)
+    assets = []
+    if os.path.isdir(JS_SRC_DIR):
+        assets += [f"js/{filename}" for filename in sorted(os.listdir(JS_SRC_DIR))]
+    # Font URLs in the stylesheet are relative to css/.
+    assets += [posixpath.normpath(posixpath.join("css", match.group(2)))
+               for match in FONT_URL_RE.finditer(css_content)]
+    for logical in assets:
+        rel_path = ASSET_NAMES.get(logical, logical)
+        if os.path.exists(os.path.join(OUTPUT_DIR, rel_path)):
+            precache["/" + rel_path] = revision(rel_path)
+
+    payloads = {}
+    for page_path, fingerprint in demo_fingerprints.items():
+        app_path = page_path.lstrip("/") + "app/"
+        for rel_path, (size, digest) in fingerprint.items():
+            if rel_path.startswith(app_path) and rel_path.endswith(SW_PAYLOAD_EXTENSIONS):
+                payloads["/" + rel_path] = [digest[:8], size]
+        app_dir = os.path.join(OUTPUT_DIR, app_path)
+        for filename in demo_split_files(app_dir):
+            payloads["/" + app_path + filename] = [
+                filename.rsplit(".", 2)[1], os.path.getsize(os.path.join(app_dir, filename)),
+            ]
+
+    return {
+        "precache": dict(sorted(precache.items())),
+        "payloads": dict(sorted(payloads.items())),
+        "payloadLimit": SW_PAYLOAD_LIMIT_MB * 1024 * 1024,
+    }
+
+
+def build_service_worker(sw_template, css_content, demo_fingerprints):
+    """Write sw.js from the sw.js template and the manifest of the current outputs.
+
+    Runs after every page is written, since the manifest hashes them.  The
+    file is only rewritten when a hash changes, which is also what makes
+    returning browsers install the new worker.
+    """
+    manifest = service_worker_manifest(css_content, demo_fingerprints)
+    key = input_key(SOURCE_KEY, MINIFY, sw_template, manifest)
+    if is_current(SW_FILE, key):
         return
-    out_dir = os.path.join(OUTPUT_DIR, "js")
-    for filename in sorted(os.listdir(JS_SRC_DIR)):
-        src_path = os.path.join(JS_SRC_DIR, filename)
-        if not os.path.isfile(src_path):
+    content = render_template(compile_template(sw_template), {
+        "swManifest": json.dumps(manifest, separators=(",", ":")),
+    })
+    if MINIFY:
+        content = minify_js(content, RENAME_JS)
+    write_file(SW_FILE, content, key)
+
+
+# ------------------------------------------------------------------------------------
+# Precompression
+#
+# Web servers can send a precompressed .br or .gz sibling instead of
+# compressing on every request (nginx gzip_static/brotli_static, Caddy
+# precompressed, ...).  Siblings are written with the highest compression
+# levels, since that cost is only paid once per changed file.
+
+def format_size(num_bytes):
+    """Format a byte count for the build reports (e.g. "11.2 KB")."""
+    if num_bytes < 1024:
+        return f"{num_bytes} B"
+    for unit in ("KB", "MB", "GB"):
+        num_bytes /= 1024
+        if num_bytes < 1024 or unit == "GB":
+            return f"{num_bytes:.1f} {unit}"
+
+
+def _compress_formats():
+    """Return the (sibling extension, compress function) pairs available here."""
+    formats = [("gz", lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        formats.append(("br", lambda data: brotli.compress(data, quality=11)))
+    return formats
+
+
+def _compressed_is_current(path, entry):
+    """Return True if a file's siblings match its compress index entry, using stats only."""
+    if not entry:
+        return False
+    try:
+        st = os.stat(path)
+    except OSError:
+        return False
+    if st.st_size != entry["size"] or st.st_mtime_ns != entry["mtime_ns"]:
+        return False
+    for ext, _ in _compress_formats():
+        if ext not in entry:
+            return False
+        sibling = f"{path}.{ext}"
+        if entry[ext] and (not os.path.isfile(sibling) or os.path.getsize(sibling) != entry[ext]):
+            return False
+    return True
+
+
+def compress_output(path, entry):
+    """Write the .gz (and, with brotli installed, .br) siblings of one output file.
+
+    Siblings whose source content hash matches ``entry`` are left alone, so a
+    file that was only touched isn't recompressed.  Siblings that wouldn't
+    be meaningfully smaller than the file are removed instead of written.
+    Doesn't touch any build state, so it is safe to call from worker
+    processes.  Returns the path, its new index entry and whether any
+    sibling was written.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    st = os.stat(path)
+    digest = hashlib.sha256(data).hexdigest()
+    entry = entry or {}
+    same_content = entry.get("sha256") == digest
+    new_entry = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": digest}
+    written = False
+
+    formats = _compress_formats()
+    for ext, compress in formats:
+        sibling = f"{path}.{ext}"
+        if same_content and ext in entry:
+            if entry[ext] == 0 and not os.path.exists(sibling):
+                new_entry[ext] = 0
+                continue
+            if entry[ext] and os.path.isfile(sibling) and os.path.getsize(sibling) == entry[ext]:
+                new_entry[ext] = entry[ext]
+                continue
+        blob = compress(data)
+        if len(blob) <= len(data) * COMPRESS_MIN_RATIO:
+            # Replace the sibling in one step, so that a server never sees
+            # (and an interrupted build never leaves) a truncated one.
+            with open(sibling + ".tmp", "wb") as f:
+                f.write(blob)
+            os.replace(sibling + ".tmp", sibling)
+            new_entry[ext] = len(blob)
+            written = True
+        else:
+            if os.path.exists(sibling):
+                os.remove(sibling)
+            new_entry[ext] = 0
+
+    # A format that is no longer available (brotli uninstalled) can't be
+    # kept up to date, so its stale sibling goes.
+    available = {ext for ext, _ in formats}
+    for ext in entry:
+        if ext in ("gz", "br") and ext not in available and not same_content:
+            if os.path.exists(f"{path}.{ext}"):
+                os.remove(f"{path}.{ext}")
+    return path, new_entry, written
+
+
+def collect_compressible_outputs():
+    """Return every output file under OUTPUT_DIR that gets precompressed siblings."""
+    paths = []
+    for dirpath, dirnames, filenames in os.walk(OUTPUT_DIR):
+        if dirpath == OUTPUT_DIR:
+            dirnames[:] = [d for d in dirnames if d != "tools"]
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+        for filename in sorted(filenames):
+            if os.path.splitext(filename)[1].lower() in COMPRESS_EXTENSIONS:
+                paths.append(os.path.join(dirpath, filename))
+    return paths
+
+
+def compress_outputs(workers=None):
+    """Write precompressed siblings for all outputs and print a size report.
+
+    Files whose stats still match the compress index are skipped without
+    being read.  The rest are compressed across a process pool.  Siblings
+    of outputs that no longer exist are removed.
+    """
+    try:
+        with open(COMPRESS_INDEX_FILE, "r", encoding="utf-8") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        index = {}
+
+    paths = collect_compressible_outputs()
+    rel_paths = {path: output_rel_path(path) for path in paths}
+    pending = [path for path in paths if not _compressed_is_current(path, index.get(rel_paths[path]))]
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(pending))
+    entries = [index.get(rel_paths[path]) for path in pending]
+    if workers <= 1:
+        results = [compress_output(path, entry) for path, entry in zip(pending, entries)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(compress_output, pending, entries))
+
+    written = 0
+    for path, entry, changed in results:
+        index[rel_paths[path]] = entry
+        if changed:
+            written += 1
+            print(f"  Compressed: {rel_paths[path]}")
+
+    current = set(rel_paths.values())
+    for rel_path in sorted(set(index) - current):
+        for ext in ("gz", "br"):
+            sibling = os.path.join(ROOT_DIR, f"{rel_path}.{ext}".replace("/", os.sep))
+            if os.path.exists(sibling):
+                os.remove(sibling)
+                print(f"  Removed stale sibling: {rel_path}.{ext}")
+        del index[rel_path]
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(COMPRESS_INDEX_FILE, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+    # Size report, grouped by file type.  Files without a sibling count at
+    # their original size, which is what a client would download.
+    formats = [ext for ext, _ in _compress_formats()]
+    totals = {}
+    for rel_path in sorted(current):
+        entry = index[rel_path]
+        row = totals.setdefault(os.path.splitext(rel_path)[1].lower(), [0, 0] + [0] * len(formats))
+        row[0] += 1
+        row[1] += entry["size"]
+        for i, ext in enumerate(formats):
+            row[2 + i] += entry.get(ext) or entry["size"]
+    total = [sum(column) for column in zip(*totals.values())] if totals else [0, 0] + [0] * len(formats)
+
+    print(f"\n  Precompressed {written} file(s), {len(paths) - len(pending)} already up to date"
+          + ("" if brotli is not None else " (brotli not installed, .gz only)") + ".")
+    header = f"    {'type':<8}{'files':>7}{'raw':>12}" + "".join(f"{'.' + ext:>16}" for ext in formats)
+    print(header)
+    for ext_name, row in sorted(totals.items()) + [("total", total)]:
+        line = f"    {ext_name:<8}{row[0]:>7}{format_size(row[1]):>12}"
+        for size in row[2:]:
+            saved = 100 - size * 100 // row[1] if row[1] else 0
+            line += f"{format_size(size):>11} {saved:>3}%"
+        print(line)
+
+
+# ------------------------------------------------------------------------------------
+# Size report
+
+def measure_demo(folder):
+    """Return the sizes of the files a demo is served from.
+
+    ``files`` maps the .bin, .data, both card images and the two generated
+    pages (paths relative to ``demo/<folder>/``) to their size in bytes, and
+    ``bin`` maps every .bin member to its ``[compressed, uncompressed]`` size.
+    Missing files are left out.  ``total`` is the sum of ``files``.
+    """
+    demo_dir = os.path.join(OUTPUT_DIR, "demo", folder)
+    app_dir = os.path.join(demo_dir, "app")
+    names = [f"{folder}-small.jpg", f"{folder}-large.jpg", "index.html", "app/index.html"]
+    if os.path.isdir(app_dir):
+        names += [
+            f"app/{filename}" for filename in sorted(os.listdir(app_dir))
+            if filename.endswith((".bin", ".data"))
+        ]
+
+    sizes = {"files": {}, "bin": {}}
+    for name in names:
+        path = os.path.join(demo_dir, name.replace("/", os.sep))
+        try:
+            sizes["files"][name] = os.path.getsize(path)
+        except OSError:
             continue
-        with open(src_path, "r", encoding="utf-8") as f:
-            content = f.read()
-        if MINIFY:
-            content = minify_js(content)
-        write_file(os.path.join(out_dir, filename), content)
+        if name.endswith(".bin"):
+            try:
+                with zipfile.ZipFile(path) as archive:
+                    for info in archive.infolist():
+                        sizes["bin"][info.filename] = [info.compress_size, info.file_size]
+            except zipfile.BadZipFile:
+                print(f"  WARNING: demo/{folder}/{name} is not a zip archive")
+    sizes["total"] = sum(sizes["files"].values())
+    return sizes
+
+
+def report_demo_sizes(category_data, budget_kb=SIZE_BUDGET_KB, growth_percent=SIZE_GROWTH_PERCENT,
+                      strict=False):
+    """Print the payload size of every hosted demo and flag regressions.
+
+    A demo is flagged when its total is over ``budget_kb`` or more than
+    ``growth_percent`` above the last size recorded in the size history
+    (components/data/size_history.json).  Sizes that differ from the last
+    recorded ones are added to the history with today's date.  In strict mode
+    flagged demos are not recorded, so the check keeps failing until the demo
+    shrinks or the limits are raised.  Returns the number of flagged demos.
+    """
+    history = {}
+    if os.path.exists(SIZE_HISTORY_FILE):
+        with open(SIZE_HISTORY_FILE, "r", encoding="utf-8") as f:
+            history = json.load(f)
+
+    today = date.today().isoformat()
+    budget = budget_kb * 1024
+    updated = dict(history)
+    rows = []
+    flagged = []
+    for cat_name in CATEGORIES:
+        for demo in category_data.get(cat_name, {}).get("demos", []):
+            folder = demo.get("folder")
+            if is_external(demo) or not folder:
+                continue
+
+            sizes = measure_demo(folder)
+            entries = history.get(folder, [])
+            last = entries[-1] if entries else None
+            change = ""
+            problems = []
+            if last:
+                if last["total"]:
+                    growth = (sizes["total"] - last["total"]) * 100 / last["total"]
+                    change = f"{growth:+.1f}%"
+                    if growth > growth_percent:
+                        problems.append(f"grew {growth:.1f}% since {last['date']}")
+            else:
+                change = "new"
+            if sizes["total"] > budget:
+                problems.append(f"over the {format_size(budget)} budget")
+            if problems:
+                flagged.append((folder, problems))
+
+            if not (last and {k: v for k, v in last.items() if k != "date"} == sizes):
+                if not (strict and problems):
+                    updated[folder] = (entries + [dict(date=today, **sizes)])[-SIZE_HISTORY_LENGTH:]
+
+            files = sizes["files"]
+            bin_size = sum(size for name, size in files.items() if name.endswith(".bin"))
+            unpacked = sum(member[1] for member in sizes["bin"].values())
+            data_size = sum(size for name, size in files.items() if name.endswith(".data"))
+            images = sum(size for name, size in files.items() if name.endswith(".jpg"))
+            html = sum(size for name, size in files.items() if name.endswith(".html"))
+            rows.append((folder, bin_size, unpacked, data_size, images, html, sizes["total"], change))
+
+    if updated != history:
+        # One line per entry keeps the history readable and its diffs small.
+        with open(SIZE_HISTORY_FILE, "w", encoding="utf-8") as f:
+            f.write("{\n" + ",\n".join(
+                f"    {json.dumps(folder)}: [\n"
+                + ",\n".join(f"        {json.dumps(entry, sort_keys=True)}" for entry in entries)
+                + "\n    ]"
+                for folder, entries in sorted(updated.items())
+            ) + "\n}\n")
+
+    width = max([len("demo")] + [len(row[0]) for row in rows])
+    print(f"\n  Demo sizes (budget {format_size(budget)}, max growth {growth_percent}%):")
+    print(f"    {'demo':<{width}}{'.bin':>11}{'unpacked':>11}{'.data':>11}{'images':>11}"
+          f"{'html':>11}{'total':>11}{'change':>9}")
+    for folder, *sizes, change in rows:
+        print(f"    {folder:<{width}}" + "".join(f"{format_size(size) if size else '-':>11}" for size in sizes)
+              + f"{change:>9}")
+    for folder, problems in flagged:
+        print(f"  {'ERROR' if strict else 'WARNING'}: demo/{folder}/ " + ", ".join(problems))
+    return len(flagged)
 
 
 # ------------------------------------------------------------------------------------
-# Main
+# Build profile
+#
+# With --profile, build_site times every stage (wall time, and CPU time
+# including that of the worker processes) and counts the bytes and files it
+# reads and writes.  Pages rendered by render_pages are also timed one by one.
+# The build ends with a summary table, and the full profile is written as a
+# Chrome trace (chrome://tracing, https://ui.perfetto.dev) with one lane per
+# process, so parallel rendering shows up as parallel lanes.
+
+def new_profile():
+    """Return an empty profile for PROFILE."""
+    return {
+        "start": time.perf_counter(),
+        "cpu": time.process_time(),
+        "io": [0, 0, 0, 0],
+        "worker_cpu": 0.0,
+        "stages": [],
+        "pages": [],
+    }
+
+
+def count_io(read=None, written=None):
+    """Count a file read or written, by its size in bytes, while profiling."""
+    if PROFILE is None:
+        return
+    counters = PROFILE["io"]
+    if read is not None:
+        counters[0] += read
+        counters[1] += 1
+    if written is not None:
+        counters[2] += written
+        counters[3] += 1
+
+
+@contextlib.contextmanager
+def profile_stage(name):
+    """Record the time and I/O of the enclosed build stage while profiling."""
+    if PROFILE is None:
+        yield
+        return
+    io_before = list(PROFILE["io"])
+    worker_cpu = PROFILE["worker_cpu"]
+    start, cpu = time.perf_counter(), time.process_time()
+    try:
+        yield
+    finally:
+        io = [after - before for after, before in zip(PROFILE["io"], io_before)]
+        PROFILE["stages"].append({
+            "name": name,
+            "start": start,
+            "wall": time.perf_counter() - start,
+            "cpu": time.process_time() - cpu + PROFILE["worker_cpu"] - worker_cpu,
+            "read": io[0], "files_read": io[1], "written": io[2], "files_written": io[3],
+        })
+
+
+def profile_page(filepath, changed, timing):
+    """Record the render timing a page job returned (see render_page_job)."""
+    start, wall, cpu, pid = timing
+    if pid != os.getpid():
+        PROFILE["worker_cpu"] += cpu
+    PROFILE["pages"].append({
+        "path": output_rel_path(filepath),
+        "start": start,
+        "wall": wall,
+        "cpu": cpu,
+        "pid": pid,
+        "size": os.path.getsize(filepath),
+        "written": changed,
+    })
+
+
+def write_profile_trace(path):
+    """Write PROFILE as a Chrome trace JSON file."""
+    origin = PROFILE["start"]
+    main_pid = os.getpid()
+
+    def event(name, category, start, wall, tid, args):
+        return {
+            "name": name, "cat": category, "ph": "X", "pid": 1, "tid": tid,
+            "ts": round((start - origin) * 1e6), "dur": round(wall * 1e6), "args": args,
+        }
+
+    events = [{"name": "process_name", "ph": "M", "pid": 1, "args": {"name": "update_website.py"}}]
+    workers = sorted({page["pid"] for page in PROFILE["pages"]} - {main_pid})
+    for tid, name in [(main_pid, "build")] + [(pid, f"worker {pid}") for pid in workers]:
+        events.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": name}})
+    wall = time.perf_counter() - origin
+    events.append(event("build", "build", origin, wall, main_pid, {}))
+    for stage in PROFILE["stages"]:
+        args = {key: stage[key] for key in ("cpu", "read", "files_read", "written", "files_written")}
+        events.append(event(stage["name"], "stage", stage["start"], stage["wall"], main_pid, args))
+    for page in PROFILE["pages"]:
+        args = {key: page[key] for key in ("cpu", "size", "written")}
+        events.append(event(page["path"], "page", page["start"], page["wall"], page["pid"], args))
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {
+                "mode": "minified" if MINIFY else "standard",
+                "incremental": INCREMENTAL,
+                "wall": wall,
+                "cpu": time.process_time() - PROFILE["cpu"] + PROFILE["worker_cpu"],
+                "date": date.today().isoformat(),
+            },
+        }, f, indent=1)
+        f.write("\n")
 
-def main():
-    global MINIFY
-    MINIFY = len(sys.argv) > 1 and sys.argv[1] == "min"
 
-    mode = "minified" if MINIFY else "standard"
-    print(f"Building site ({mode})...")
+def report_profile(path, slowest=10):
+    """Print the per-stage table and the slowest pages, then write the trace to ``path``."""
+    wall = time.perf_counter() - PROFILE["start"]
+    cpu = time.process_time() - PROFILE["cpu"] + PROFILE["worker_cpu"]
+    print(f"\n  Build profile: {wall * 1000:.0f} ms wall, {cpu * 1000:.0f} ms CPU")
+    print(f"    {'stage':<24}{'wall ms':>9}{'cpu ms':>9}{'read':>11}{'files':>7}{'written':>11}{'files':>7}")
+    for stage in PROFILE["stages"]:
+        print(f"    {stage['name']:<24}{stage['wall'] * 1000:>9.1f}{stage['cpu'] * 1000:>9.1f}"
+              f"{format_size(stage['read']):>11}{stage['files_read']:>7}"
+              f"{format_size(stage['written']):>11}{stage['files_written']:>7}")
+    pages = sorted(PROFILE["pages"], key=lambda page: page["wall"], reverse=True)[:slowest]
+    if pages:
+        print(f"\n    Slowest of {len(PROFILE['pages'])} rendered page(s):")
+        print(f"    {'page':<42}{'wall ms':>9}{'cpu ms':>9}{'size':>11}")
+        for page in pages:
+            print(f"    {page['path']:<42}{page['wall'] * 1000:>9.1f}{page['cpu'] * 1000:>9.1f}"
+                  f"{format_size(page['size']):>11}{'  written' if page['written'] else ''}")
+    write_profile_trace(path)
+    print(f"\n  Profile trace written to {os.path.relpath(path, ROOT_DIR)}")
 
-    # Load all source files and inline CSS into the base template so pages
-    # don't need an external stylesheet (eliminates a render-blocking request).
-    base_template = load_file("base.html")
 
-    css_path = os.path.join(CSS_SRC_DIR, "styles.css")
-    with open(css_path, "r", encoding="utf-8") as f:
-        css_content = f.read()
-    if MINIFY:
-        css_content = minify_css(css_content)
-    # Font URLs in the CSS are relative to css/styles.css (../fonts/).
-    # When inlined into HTML, they must be relative to the page itself.
-    css_content = css_content.replace("../fonts/", "{{basePath}}fonts/")
-    base_template = replace_indented(
-        base_template, "{{inlineStyles}}", f"<style>{css_content}</style>"
-    )
-    navbar_html = load_file("navbar.html")
-    footer_html = load_file("footer.html")
-    contact_html = load_file("contact.html")
-    demo_template = load_file("demo.html")
-    iframe_template = load_file("iframe.html")
-    frontpage_content = load_file("frontpage.html")
-    four04_template = load_file("404.html")
-    demo_index_template = load_file("demo-index.html")
-
-    # Load category JSON data
-    category_data = {}
-    for cat in CATEGORIES:
-        json_path = os.path.join(DATA_DIR, f"{cat}.json")
-        if os.path.exists(json_path):
-            category_data[cat] = load_json(f"{cat}.json")
-
-    # Collect site paths for sitemap and 404 fuzzy matching
-    site_paths = collect_site_paths(category_data)
-    fuzzy_paths = collect_site_paths(category_data, include_hashes=True)
-
-    # Copy (and optionally minify) CSS and JS assets
-    build_static_assets()
+# ------------------------------------------------------------------------------------
+# Development server
+#
+# ``update_website.py serve`` builds the site, serves it on localhost and
+# rebuilds it in-process whenever a source changes.  The rebuilds are
+# incremental and the sources stay in SOURCE_CACHE, so only the changed files
+# are read and only the outputs depending on them are written.  Served pages
+# get a small script that reloads them when a rebuild wrote anything.
+
+LIVE_RELOAD_SCRIPT = (
+    f'<script>if (window.top === window) new EventSource("{LIVE_RELOAD_PATH}")'
+    '.onmessage = function() { location.reload(); };</script>'
+)
+# Served in place of sw.js, so that a service worker installed by an earlier
+# visit removes itself instead of answering requests from its cache.
+SERVE_SERVICE_WORKER = """\
+self.addEventListener("install", function() { self.skipWaiting(); });
+self.addEventListener("activate", function(event) {
+    event.waitUntil(self.registration.unregister());
+});
+"""
 
-    # Build all pages
-    build_frontpage(
-        base_template, navbar_html, footer_html,
-        contact_html, frontpage_content, category_data,
+
+def snapshot_sources():
+    """Return ``{path: (size, mtime_ns)}`` for every file in the watched folders."""
+    snapshot = {}
+    for directory in WATCH_DIRS:
+        for entry in scan_files(directory):
+            if entry.path not in WATCH_IGNORE:
+                st = entry.stat()
+                snapshot[entry.path] = (st.st_size, st.st_mtime_ns)
+    return snapshot
+
+
+def watch_sources():
+    """Poll the watched folders and yield the sorted paths that changed.
+
+    A change is only reported once the folders have stayed the same for
+    WATCH_DEBOUNCE seconds, since editors often save a file in several
+    writes and a checkout touches many files at once.
+    """
+    known = snapshot_sources()
+    while True:
+        time.sleep(WATCH_POLL_INTERVAL)
+        current = snapshot_sources()
+        if current == known:
+            continue
+        while True:
+            time.sleep(WATCH_DEBOUNCE)
+            settled = snapshot_sources()
+            if settled == current:
+                break
+            current = settled
+        changed = sorted(path for path in known.keys() | current.keys()
+                         if known.get(path) != current.get(path))
+        known = current
+        yield changed
+
+
+def notify_reload():
+    """Tell every open live reload stream to reload its page."""
+    global RELOAD_GENERATION
+    with RELOAD:
+        RELOAD_GENERATION += 1
+        RELOAD.notify_all()
+
+
+class DevRequestHandler(http.server.SimpleHTTPRequestHandler):
+    """Serve the site like the live host does, plus the live reload stream.
+
+    Nothing is cached, HTML pages get LIVE_RELOAD_SCRIPT, and unknown paths
+    get 404.html like on GitHub Pages.
+    """
+
+    def end_headers(self):
+        self.send_header("Cache-Control", "no-store")
+        super().end_headers()
+
+    def log_message(self, format, *args):
+        # Keep the console for the build output.
+        pass
+
+    def do_GET(self):
+        path = urllib.parse.urlsplit(self.path).path
+        if path == LIVE_RELOAD_PATH:
+            self.send_reload_stream()
+            return
+        if path == "/sw.js":
+            self.send_text(SERVE_SERVICE_WORKER, "text/javascript")
+            return
+        filepath = self.translate_path(self.path)
+        if os.path.isdir(filepath) and path.endswith("/"):
+            filepath = os.path.join(filepath, "index.html")
+        if not os.path.exists(filepath):
+            self.send_page(os.path.join(OUTPUT_DIR, "404.html"), 404)
+        elif filepath.endswith(".html"):
+            self.send_page(filepath)
+        else:
+            super().do_GET()
+
+    def send_text(self, text, content_type, status=200):
+        data = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_page(self, filepath, status=200):
+        try:
+            with open(filepath, "r", encoding="utf-8") as f:
+                page = f.read()
+        except OSError:
+            self.send_error(404)
+            return
+        end = page.rfind("</body>")
+        if end < 0:
+            end = len(page)
+        self.send_text(page[:end] + LIVE_RELOAD_SCRIPT + page[end:], "text/html", status)
+
+    def send_reload_stream(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        with RELOAD:
+            generation = RELOAD_GENERATION
+        try:
+            while True:
+                with RELOAD:
+                    RELOAD.wait_for(lambda: RELOAD_GENERATION != generation, timeout=15)
+                    current = RELOAD_GENERATION
+                # A comment line on timeout keeps proxies from closing the stream.
+                self.wfile.write(b"data: reload\n\n" if current != generation else b": ping\n\n")
+                self.wfile.flush()
+                generation = current
+        except OSError:
+            pass  # The page was closed or reloaded.
+
+
+def serve(args):
+    """Build the site, serve it on localhost and rebuild it whenever a source changes.
+
+    Rebuilds are always incremental.  A rebuild that fails (a typo in a
+    JSON file, say) prints its traceback and the server keeps running with
+    the previous outputs.
+    """
+    args.incremental = True
+    build_site(args)
+
+    handler = functools.partial(DevRequestHandler, directory=OUTPUT_DIR)
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", args.port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"\nServing the site at http://127.0.0.1:{args.port}/ (Ctrl+C to stop)")
+
+    try:
+        for changed in watch_sources():
+            start = time.perf_counter()
+            print(f"\nChanged: {', '.join(os.path.relpath(path, SCRIPT_DIR) for path in changed)}")
+            try:
+                build_site(args)
+            except Exception:
+                traceback.print_exc()
+                continue
+            if CHANGED_FILES:
+                notify_reload()
+            print(f"Rebuilt in {(time.perf_counter() - start) * 1000:.0f} ms")
+    except KeyboardInterrupt:
+        print("\nStopped.")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+# ------------------------------------------------------------------------------------
+# Build daemon
+#
+# ``update_website.py daemon`` keeps one builder process running.  Later
+# command lines hand their build to it over DAEMON_SOCKET (see daemon_client.py,
+# which does so without importing this module) and reuse what the daemon
+# already has in memory: the source files (SOURCE_CACHE), the parsed JSON, the
+# compiled templates, the minified and parsed stylesheet and the build manifest.
+# All of them are invalidated by file stats, so a build in the daemon writes
+# exactly what a fresh process would.
+
+def daemon_build(conn):
+    """Run the build a client sent over ``conn``, streaming its output back.
+
+    The build runs in the client's working directory, so that relative
+    paths on its command line (``--profile trace.json``) resolve as they
+    would in the client's own process.
+    """
+    with conn.makefile("rb") as f:
+        request = f.readline()
+    if not request:
+        return  # A connection check, see run_daemon.
+    request = json.loads(request)
+    argv = request["argv"]
+    start = time.perf_counter()
+    stream = conn.makefile("w", encoding="utf-8", buffering=1)
+    daemon_cwd = os.getcwd()
+    with contextlib.redirect_stdout(stream), contextlib.redirect_stderr(stream):
+        try:
+            os.chdir(request["cwd"])
+            args = parse_args(argv)
+            if args.serve or args.daemon:
+                print("serve and daemon can't run inside the build daemon")
+                status = 2
+            else:
+                status = run_build(args)
+        except SystemExit as e:  # argparse errors and --help
+            status = e.code if isinstance(e.code, int) else int(e.code is not None)
+        except Exception:
+            traceback.print_exc()
+            status = 1
+        finally:
+            os.chdir(daemon_cwd)
+    stream.flush()
+    conn.sendall(b"\0" + str(status).encode("ascii"))
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"  {' '.join(argv) or '(default build)'}: exit status {status} in {elapsed:.0f} ms")
+
+
+def run_daemon():
+    """Serve builds over DAEMON_SOCKET until interrupted or this script changes.
+
+    A change to update_website.py stops the daemon, since it would keep
+    building with the old code; the build that noticed runs in its own
+    process instead.  Returns the exit status.
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        print("The build daemon needs Unix domain sockets, which this platform doesn't have.")
+        return 1
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(DAEMON_SOCKET)
+        except OSError:
+            pass
+        else:
+            print("A build daemon is already running.")
+            return 1
+    # Whatever is left is the socket file of a daemon that didn't exit cleanly.
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(DAEMON_SOCKET)
+
+    script_path = os.path.abspath(__file__)
+    script_stamp = file_stamp(script_path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(DAEMON_SOCKET)
+    os.chmod(DAEMON_SOCKET, 0o600)
+    server.listen()
+    print(f"Build daemon listening on {os.path.relpath(DAEMON_SOCKET, SCRIPT_DIR)} (Ctrl+C to stop)")
+    try:
+        while True:
+            conn, _ = server.accept()
+            with conn:
+                if file_stamp(script_path) != script_stamp:
+                    conn.makefile("rb").readline()
+                    conn.sendall(b"\0restart")
+                    print("update_website.py changed, stopping.")
+                    break
+                try:
+                    daemon_build(conn)
+                except OSError:
+                    print("  Client disconnected during the build.")
+    except KeyboardInterrupt:
+        print("\nStopped.")
+    finally:
+        server.close()
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(DAEMON_SOCKET)
+    return 0
+
+
+# ------------------------------------------------------------------------------------
+# Main
+
+def parse_args(argv=None):
+    """Parse the command line arguments."""
+    parser = argparse.ArgumentParser(description="Static site builder for www.xedur.com.")
+    parser.add_argument(
+        "mode", nargs="*", metavar="{min,serve,daemon}",
+        help="'min' builds with minified HTML, CSS and JS; 'serve' serves the site on "
+             "localhost and rebuilds it whenever a source changes; 'daemon' keeps a "
+             "builder running that later builds are handed to",
     )
-    build_404(base_template, navbar_html, footer_html, four04_template, fuzzy_paths)
-    build_demo_pages(
-        base_template, navbar_html, footer_html,
-        demo_template, iframe_template, category_data,
+    parser.add_argument(
+        "-i", "--incremental", action="store_true",
+        help="skip pages whose inputs haven't changed since the last build",
     )
-    build_standalone_pages(
-        base_template, navbar_html, footer_html, category_data,
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=None, metavar="N",
+        help="worker processes for rendering demo pages (default: CPU count)",
     )
-    build_demo_index(
-        base_template, navbar_html, footer_html,
-        demo_index_template, category_data,
+    parser.add_argument(
+        "--rename-js", action="store_true",
+        help="with min, also shorten the names of function-local variables in the scripts (slower)",
     )
-    check_images(category_data)
-    check_demo_assets(category_data)
-    build_sitemap(site_paths)
+    parser.add_argument(
+        "--external-css", action="store_true",
+        help="also write the full stylesheet to css/styles.css and load it asynchronously",
+    )
+    parser.add_argument(
+        "--hash-assets", action="store_true",
+        help="link pages to content-hashed copies of the js/, fonts/ and img/ files",
+    )
+    parser.add_argument(
+        "--compress", action="store_true",
+        help="write precompressed .gz (and .br, if brotli is installed) siblings of the outputs",
+    )
+    parser.add_argument(
+        "--image-variants", action="store_true",
+        help="write resized WebP/AVIF copies of the card images to img/cards/ (needs Pillow)",
+    )
+    parser.add_argument(
+        "--subset-fonts", action="store_true",
+        help="use fonts/ subsets holding only the characters the site uses (needs fonttools and brotli)",
+    )
+    parser.add_argument(
+        "--split-bins", action="store_true",
+        help="unpack each demo's .js and .wasm next to its .bin for the streaming loader "
+             "(stores every payload twice)",
+    )
+    parser.add_argument(
+        "--size-report", action="store_true",
+        help="report the payload size of every demo and record it in components/data/size_history.json",
+    )
+    parser.add_argument(
+        "--size-budget", type=int, default=SIZE_BUDGET_KB, metavar="KB",
+        help=f"with --size-report, flag demos heavier than this (default: {SIZE_BUDGET_KB})",
+    )
+    parser.add_argument(
+        "--size-growth", type=float, default=SIZE_GROWTH_PERCENT, metavar="PCT",
+        help=f"with --size-report, flag demos that grew by more than this (default: {SIZE_GROWTH_PERCENT})",
+    )
+    parser.add_argument(
+        "--strict", action="store_true",
+        help="with --size-report, exit with status 1 if any demo is flagged",
+    )
+    parser.add_argument(
+        "--profile", nargs="?", const=PROFILE_FILE, default=None, metavar="FILE",
+        help="time every build stage and rendered page, print a summary and write a Chrome "
+             f"trace to FILE (default: {os.path.relpath(PROFILE_FILE, SCRIPT_DIR)})",
+    )
+    parser.add_argument(
+        "--port", type=int, default=SERVE_PORT,
+        help=f"with serve, the port to listen on (default: {SERVE_PORT})",
+    )
+    parser.add_argument(
+        "--no-daemon", action="store_true",
+        help="build in this process even if a build daemon is running",
+    )
+    args = parser.parse_args(argv)
+    for word in args.mode:
+        if word not in ("min", "serve", "daemon"):
+            parser.error(f"argument mode: invalid choice: {word!r} (choose from 'min', 'serve', 'daemon')")
+    args.minify = "min" in args.mode
+    args.serve = "serve" in args.mode
+    args.daemon = "daemon" in args.mode
+    if args.serve and args.daemon:
+        parser.error("serve and daemon can't be combined")
+    return args
+
+
+def build_site(args):
+    """Build the whole site once, as configured by the parsed command line.
+
+    Returns the number of demos flagged by the size report (0 without
+    ``--size-report``).
+    """
+    global MINIFY, RENAME_JS, INCREMENTAL, SPLIT_BINS, SOURCE_KEY, SITE_KEY, ASSET_NAMES, CARD_IMAGES, PROFILE
+    MINIFY = args.minify
+    RENAME_JS = args.minify and args.rename_js
+    SPLIT_BINS = args.split_bins
+    INCREMENTAL = args.incremental
+    CHANGED_FILES.clear()
+    PROFILE = new_profile() if args.profile else None
+
+    mode = "minified" if MINIFY else "standard"
+    if RENAME_JS:
+        mode += ", renamed locals"
+    if INCREMENTAL:
+        mode += ", incremental"
+    print(f"Building site ({mode})...")
+
+    with profile_stage("load_sources"):
+        load_build_manifest()
+        # Every output key includes SOURCE_KEY, so --rename-js is folded in
+        # here to rebuild all scripts when it is toggled.
+        with open(os.path.abspath(__file__), "r", encoding="utf-8") as f:
+            SOURCE_KEY = input_key(f.read(), RENAME_JS)
+
+        # Load all source files.  CSS is inlined into every page so pages don't
+        # need a render-blocking stylesheet request, but each page only gets the
+        # rules its own markup (or the site scripts) can use.
+        base_template = load_file("base.html")
+
+        # Load category JSON data
+        category_data = {}
+        for cat in CATEGORIES:
+            json_path = os.path.join(DATA_DIR, f"{cat}.json")
+            if os.path.exists(json_path):
+                category_data[cat] = load_json(f"{cat}.json")
+
+        css_content = read_source(os.path.join(CSS_SRC_DIR, "styles.css"))
+
+    if args.subset_fonts:
+        # Font subsets go to fonts/, so they are made before the assets are
+        # fingerprinted.  The font preloads in base.html follow the subsets.
+        if font_subset is None or brotli is None:
+            print("  WARNING: --subset-fonts needs fonttools and brotli, skipping")
+        else:
+            with profile_stage("subset_fonts"):
+                css_content, font_subsets = subset_fonts(css_content, collect_site_text(category_data))
+            for font, subset in font_subsets.items():
+                base_template = base_template.replace(f'"{{{{basePath}}}}{font}"', f'"{{{{basePath}}}}{subset}"')
+
+    with profile_stage("prepare_stylesheet"):
+        if MINIFY:
+            css_content = minify_css(css_content)
+        # Class names the shared scripts add at runtime (e.g. "copied" or "active")
+        # never show up in the markup, so every page keeps the rules using them.
+        safelist = set()
+        if os.path.isdir(JS_SRC_DIR):
+            for filename in sorted(os.listdir(JS_SRC_DIR)):
+                safelist.update(js_string_words(read_source(os.path.join(JS_SRC_DIR, filename))))
+        stylesheet = {
+            "rules": parse_stylesheet(css_content),
+            "safelist": frozenset(safelist),
+            "external": args.external_css,
+        }
+
+    # Card image variants go to img/, so they are made before the assets
+    # are fingerprinted.
+    with profile_stage("build_card_images"):
+        CARD_IMAGES = build_card_images(category_data, args.image_variants)
+
+    # Copy (and optionally minify) CSS and JS assets.  This runs before any
+    # page is rendered, since pages link to the fingerprinted asset names.
+    with profile_stage("build_static_assets"):
+        ASSET_NAMES = build_static_assets(
+            css_content if args.external_css else None, args.hash_assets
+        )
+
+    with profile_stage("load_templates"):
+        navbar_html = load_file("navbar.html")
+        footer_html = load_file("footer.html")
+        SITE_KEY = input_key(SOURCE_KEY, MINIFY, base_template, navbar_html, footer_html,
+                             css_content, sorted(safelist), args.external_css, ASSET_NAMES)
+        shell = (
+            compile_template(base_template),
+            compile_template(navbar_html),
+            compile_template(footer_html),
+            stylesheet,
+        )
+        contact_html = load_file("contact.html")
+        demo_template = load_file("demo.html")
+        iframe_template = load_file("iframe.html")
+        frontpage_content = load_file("frontpage.html")
+        four04_template = load_file("404.html")
+        demo_index_template = load_file("demo-index.html")
+        sw_template = load_file("sw.js")
+
+        # Collect site paths for sitemap and 404 fuzzy matching
+        site_paths = collect_site_paths(category_data)
+        fuzzy_paths = collect_site_paths(category_data, include_hashes=True)
+
+    # Build all pages
+    with profile_stage("build_frontpage"):
+        build_frontpage(shell, contact_html, frontpage_content, category_data)
+    with profile_stage("build_404"):
+        build_404(shell, four04_template, build_404_index(fuzzy_paths, category_data))
+    # Plan every demo and standalone page first, then render them in parallel.
+    with profile_stage("plan_demo_pages"):
+        page_jobs = plan_demo_pages(shell, demo_template, iframe_template, category_data)
+    with profile_stage("plan_standalone_pages"):
+        page_jobs += plan_standalone_pages(shell, category_data)
+    with profile_stage("render_pages"):
+        render_pages(page_jobs, args.jobs)
+    with profile_stage("build_demo_index"):
+        build_demo_index(shell, demo_index_template, category_data)
+    with profile_stage("check_images"):
+        check_images(category_data)
+    with profile_stage("check_demo_assets"):
+        demo_fingerprints = check_demo_assets(category_data)
+    with profile_stage("build_sitemap"):
+        build_sitemap(site_paths)
+    with profile_stage("build_service_worker"):
+        build_service_worker(sw_template, css_content, demo_fingerprints)
+    if args.compress:
+        with profile_stage("compress_outputs"):
+            compress_outputs(args.jobs)
+    flagged = 0
+    if args.size_report or args.strict:
+        with profile_stage("report_demo_sizes"):
+            flagged = report_demo_sizes(category_data, args.size_budget, args.size_growth, args.strict)
+    with profile_stage("save_build_manifest"):
+        save_build_manifest()
 
     if CHANGED_FILES:
         print(f"\n  {len(CHANGED_FILES)} file(s) updated.")
     else:
         print("\n  All files up to date — nothing written.")
+    if PROFILE is not None:
+        report_profile(args.profile)
     print("Build complete.")
+    return flagged
+
+
+def run_build(args):
+    """Build the site and return the exit status for the command line."""
+    flagged = build_site(args)
+    if flagged and args.strict:
+        print(f"Size check failed for {flagged} demo(s).")
+        return 1
+    return 0
+
+
+def main(use_daemon=True):
+    if use_daemon:
+        status = run_in_daemon(sys.argv[1:])
+        if status is not None:
+            sys.exit(status)
+    args = parse_args()
+    if args.serve:
+        serve(args)
+    elif args.daemon:
+        sys.exit(run_daemon())
+    else:
+        sys.exit(run_build(args))
 
 
 if __name__ == "__main__":